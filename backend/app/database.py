@@ -1,20 +1,256 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from contextlib import contextmanager
+import logging
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./careops.db")
 
+
+# Query parameters asyncpg takes as they are; libpq's sslmode becomes its `ssl`
+_ASYNCPG_PARAMS = {"ssl", "prepared_statement_cache_size"}
+
+
+def _async_url(url: str) -> str:
+    """Same database through its asyncio driver (asyncpg / aiosqlite)"""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if not scheme.startswith("postgresql"):
+        return url
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    unsupported = sorted(set(query) - _ASYNCPG_PARAMS)
+    if unsupported:
+        raise RuntimeError(
+            f"DATABASE_URL parameters {', '.join(unsupported)} have no asyncpg equivalent; "
+            "set ASYNC_DATABASE_URL for the async engine"
+        )
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Connection budget: DB_MAX_CONNECTIONS is what the database lets this service
+# use in total, split across WEB_CONCURRENCY worker processes. Each process
+# splits its share between the sync and async engines (DB_ASYNC_POOL_SHARE
+# goes to async), and each pool keeps half of its part open and may burst to
+# the rest.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "60"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.5"))
+_per_worker = max(4, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)
+_async_share = min(_per_worker - 2, max(2, round(_per_worker * DB_ASYNC_POOL_SHARE)))
+_sync_share = _per_worker - _async_share
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(_sync_share // 2)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(_sync_share - _sync_share // 2)))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(_async_share // 2)))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(_async_share - _async_share // 2)))
+if DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW > _per_worker:
+    logger.warning(
+        f"Sync + async pools allow {DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW} "
+        f"connections per worker, over this worker's share of DB_MAX_CONNECTIONS ({_per_worker})"
+    )
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle below the server/proxy idle timeout (e.g. PgBouncer, cloud LBs)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+class PoolMetrics:
+    """Checkout-wait and in-use gauges, fed by the pool and its events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_wait_ms = 0.0
+        self.slow_waits = 0
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.last_wait_ms = wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.total_wait_ms += wait_ms
+            if wait_ms >= 100:
+                self.slow_waits += 1
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def checked_in(self):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def invalidated(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "last_wait_ms": round(self.last_wait_ms, 2),
+                "max_wait_ms": round(self.max_wait_ms, 2),
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "slow_waits": self.slow_waits,
+            }
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """Times how long each checkout waits for a free connection"""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+pool_options = dict(
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
 # For PostgreSQL
 if DATABASE_URL.startswith("postgresql"):
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, **pool_options)
 else:
     # For SQLite (development)
     engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False}
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **pool_options
     )
 
+
+# Async routes (asyncpg / aiosqlite); its own part of the budget, pool and gauges
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **{
+        **pool_options,
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": DB_ASYNC_POOL_SIZE,
+        "max_overflow": DB_ASYNC_MAX_OVERFLOW,
+    }
+)
+
+
+def _instrument(target_engine, metrics: PoolMetrics):
+    event.listen(target_engine, "checkout", lambda dbapi_connection, record, proxy: metrics.checked_out())
+    event.listen(target_engine, "checkin", lambda dbapi_connection, record: metrics.checked_in())
+    event.listen(target_engine, "invalidate", lambda dbapi_connection, record, exception: metrics.invalidated())
+
+
+_instrument(engine, pool_metrics)
+_instrument(async_engine.sync_engine, async_pool_metrics)
+
+
+def _pool_snapshot(pool, max_overflow: int, metrics: PoolMetrics):
+    return {
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": pool.checkedout(),
+        "saturated": pool.checkedout() >= pool.size() + max_overflow,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeout": DB_POOL_TIMEOUT,
+        "recycle": DB_POOL_RECYCLE,
+        "pre_ping": DB_POOL_PRE_PING,
+        **metrics.snapshot(),
+    }
+
+
+def pool_status():
+    """Pool configuration, current occupancy and checkout telemetry"""
+    return {
+        **_pool_snapshot(engine.pool, DB_MAX_OVERFLOW, pool_metrics),
+        "async": _pool_snapshot(async_engine.sync_engine.pool, DB_ASYNC_MAX_OVERFLOW, async_pool_metrics),
+    }
+
+
+@contextmanager
+def count_queries(*engines):
+    """
+    Record every statement sent through `engines` (default: both app
+    engines) while the block runs; yields the list of SQL strings
+    """
+    targets = [getattr(e, "sync_engine", e) for e in (engines or (engine, async_engine))]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", record)
+
+
+def check_database():
+    """Round-trip a trivial query; returns (ok, latency_ms, error)"""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True, round((time.perf_counter() - started) * 1000, 2), None
+    except Exception as e:
+        return False, round((time.perf_counter() - started) * 1000, 2), str(e)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes can't lazy-load on an AsyncSession, so
+# objects must stay readable after commit for the response models
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -23,3 +259,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
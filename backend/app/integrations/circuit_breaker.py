@@ -0,0 +1,129 @@
+"""
+Circuit breakers for outbound providers (SMTP, Twilio)
+
+A breaker counts consecutive failures for one provider; a call slower than
+the latency threshold counts as a failure even if it succeeded. After
+CIRCUIT_FAILURE_THRESHOLD of them the breaker opens and every send fails
+immediately with a "circuit open" result instead of waiting on timeouts.
+After CIRCUIT_RESET_TIMEOUT seconds it goes half-open and lets a single
+probe through: success closes it, failure opens it again. A probe that
+records neither (the caller raised or was cancelled first) is given up on
+after CIRCUIT_PROBE_TIMEOUT seconds and another one is let through.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_LATENCY_THRESHOLD = float(os.getenv("CIRCUIT_LATENCY_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+CIRCUIT_PROBE_TIMEOUT = float(os.getenv("CIRCUIT_PROBE_TIMEOUT", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 latency_threshold: float = CIRCUIT_LATENCY_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+                 probe_timeout: float = CIRCUIT_PROBE_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "trips": 0}
+
+    def allow(self) -> bool:
+        """True if a call may go to the provider now"""
+        with self._lock:
+            if self.state == CLOSED:
+                self._stats["calls"] += 1
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open, probing provider")
+            if self.state == HALF_OPEN and self._probe_in_flight and now - self._probe_started >= self.probe_timeout:
+                logger.warning(f"Circuit {self.name} probe never reported back, probing again")
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = now
+                self._stats["calls"] += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self, duration: float):
+        if duration > self.latency_threshold:
+            with self._lock:
+                self._stats["slow_calls"] += 1
+            self.record_failure(f"slow call: {duration:.2f}s")
+            return
+        with self._lock:
+            self._probe_in_flight = False
+            self._failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = CLOSED
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self._probe_in_flight = False
+            self._failures += 1
+            self._stats["failures"] += 1
+            self._last_error = error
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._stats["trips"] += 1
+                    logger.warning(f"Circuit {self.name} open after {self._failures} failures: {error}")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def rejection(self) -> Dict[str, Any]:
+        """Result returned instead of calling the provider while open"""
+        return {"status": "failed", "error": f"{self.name} circuit open", "circuit": self.state}
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 2)
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": retry_in,
+                "last_error": self._last_error,
+                **self._stats,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for a provider, created on first use"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_status() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.status() for breaker in breakers}
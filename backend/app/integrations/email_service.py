@@ -1,7 +1,143 @@
 import smtplib
 import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Optional
+from app.integrations.circuit_breaker import get_breaker
+from app.integrations.templates import template_registry, DEFAULT_LOCALE
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP sessions alive between messages
+
+    - At most `max_size` sessions exist at once; extra senders wait
+    - Sessions idle longer than `check_after` seconds are NOOP-checked before reuse
+    - Sessions idle longer than `max_idle` seconds, or that have sent
+      `max_messages` messages, are closed and replaced
+    - A refused recipient leaves the session usable (smtplib resets it), so
+      it goes back to the pool; any other error discards it
+    """
+
+    # Errors raised after smtplib has already reset the session
+    _SESSION_OK_ERRORS = (smtplib.SMTPRecipientsRefused,)
+
+    def __init__(self, host: str, port: int, user: str, password: str, use_tls: bool = True,
+                 max_size: int = 4, check_after: float = 30, max_idle: float = 300,
+                 max_messages: int = 100, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.stats = {"connects": 0, "reused": 0, "stale": 0, "discarded": 0}
+
+    def _connect(self) -> _PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.stats["connects"] += 1
+        return _PooledConnection(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_usable(self, conn: _PooledConnection) -> bool:
+        idle = time.monotonic() - conn.last_used
+        if idle > self.max_idle or conn.messages_sent >= self.max_messages:
+            return False
+        if idle > self.check_after:
+            try:
+                return conn.server.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+
+    def _checkout(self, fresh: bool = False) -> _PooledConnection:
+        if fresh:
+            return self._connect()
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_usable(conn):
+                self.stats["reused"] += 1
+                return conn
+            self.stats["stale"] += 1
+            self._close(conn.server)
+
+    def _checkin(self, conn: _PooledConnection):
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    @contextmanager
+    def connection(self, fresh: bool = False):
+        """
+        Borrow a live session; it goes back to the pool unless the send broke
+        it. `fresh` skips the idle sessions and opens a new one.
+        """
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout(fresh)
+            yield conn.server
+            conn.messages_sent += 1
+            self._checkin(conn)
+        except self._SESSION_OK_ERRORS:
+            if conn is not None:
+                self._checkin(conn)
+            raise
+        except Exception:
+            if conn is not None:
+                self.stats["discarded"] += 1
+                self._close(conn.server)
+            raise
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.server)
+
 
 class EmailService:
     def __init__(self):
@@ -9,59 +145,85 @@ class EmailService:
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
         self.sender_email = os.getenv("SMTP_USER")
         self.sender_password = os.getenv("SMTP_PASSWORD")
+        self.pool = SMTPConnectionPool(
+            self.smtp_host,
+            self.smtp_port,
+            self.sender_email,
+            self.sender_password,
+            use_tls=os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+            max_size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+            check_after=float(os.getenv("SMTP_POOL_CHECK_AFTER", "30")),
+            max_idle=float(os.getenv("SMTP_POOL_MAX_IDLE", "300")),
+            max_messages=int(os.getenv("SMTP_POOL_MAX_MESSAGES", "100")),
+            timeout=float(os.getenv("SMTP_TIMEOUT", "10")),
+        )
+        self.breaker = get_breaker("smtp")
     
-    def send_email(self, to_email: str, subject: str, body: str, is_html: bool = True):
+    def send_email(self, to_email: str, subject: str, body: str, is_html: bool = True, text_body: Optional[str] = None):
+        if not self.breaker.allow():
+            return {**self.breaker.rejection(), "to": to_email}
+        
+        started = time.monotonic()
         try:
             message = MIMEMultipart("alternative")
             message["Subject"] = subject
             message["From"] = self.sender_email
             message["To"] = to_email
             
+            # Plain part first: clients show the last alternative they support
+            if text_body and is_html:
+                message.attach(MIMEText(text_body, "plain", "utf-8"))
             if is_html:
-                part = MIMEText(body, "html")
+                part = MIMEText(body, "html", "utf-8")
             else:
-                part = MIMEText(body, "plain")
+                part = MIMEText(body, "plain", "utf-8")
             
             message.attach(part)
+            payload = message.as_string()
             
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.sendmail(self.sender_email, to_email, message.as_string())
+            try:
+                with self.pool.connection() as server:
+                    server.sendmail(self.sender_email, to_email, payload)
+            except smtplib.SMTPServerDisconnected:
+                # Server dropped a pooled session between the check and the send; retry once on a
+                # new connection (another idle session may be just as stale)
+                logger.info("SMTP session dropped, retrying on a new connection")
+                with self.pool.connection(fresh=True) as server:
+                    server.sendmail(self.sender_email, to_email, payload)
             
+            self.breaker.record_success(time.monotonic() - started)
             return {"status": "sent", "to": to_email}
+        except smtplib.SMTPRecipientsRefused as e:
+            # A bad address says nothing about the server's health
+            self.breaker.record_success(time.monotonic() - started)
+            return {"status": "failed", "error": str(e)}
         except Exception as e:
+            self.breaker.record_failure(str(e))
             return {"status": "failed", "error": str(e)}
     
-    def send_booking_confirmation(self, contact_email: str, booking_details: dict):
-        subject = "Booking Confirmation"
-        body = f"""
-        <h2>Booking Confirmation</h2>
-        <p>Thank you for booking with us!</p>
-        <p><strong>Type:</strong> {booking_details.get('booking_type')}</p>
-        <p><strong>Date & Time:</strong> {booking_details.get('scheduled_at')}</p>
-        <p><strong>Duration:</strong> {booking_details.get('duration_minutes')} minutes</p>
-        <p>We look forward to seeing you!</p>
-        """
-        return self.send_email(contact_email, subject, body)
+    def close(self):
+        self.pool.close_all()
     
-    def send_welcome_message(self, contact_email: str, contact_name: str):
-        subject = "Welcome to Our Service"
-        body = f"""
-        <h2>Welcome {contact_name}!</h2>
-        <p>Thank you for reaching out. We'll be in touch shortly.</p>
-        <p>Our team will respond to your inquiry within 24 hours.</p>
-        """
-        return self.send_email(contact_email, subject, body)
+    def send_template(self, to_email: str, template: str, context: dict, workspace_id: Optional[int] = None, locale: str = DEFAULT_LOCALE):
+        rendered = template_registry.render(template, context, workspace_id, locale)
+        return self.send_email(to_email, rendered.subject, rendered.html, text_body=rendered.text)
     
-    def send_form_reminder(self, contact_email: str, form_name: str):
-        subject = f"Reminder: {form_name} Pending"
-        body = f"""
-        <h2>Form Reminder</h2>
-        <p>We noticed that <strong>{form_name}</strong> is still pending.</p>
-        <p>Please complete it at your earliest convenience.</p>
-        """
-        return self.send_email(contact_email, subject, body)
+    def send_booking_confirmation(self, contact_email: str, booking_details: dict, workspace_id: Optional[int] = None):
+        return self.send_template(contact_email, "email.booking_confirmation", booking_details, workspace_id)
+    
+    def send_welcome_message(self, contact_email: str, contact_name: str, workspace_id: Optional[int] = None):
+        return self.send_template(contact_email, "email.welcome", {"contact_name": contact_name}, workspace_id)
+    
+    def send_form_reminder(self, contact_email: str, form_name: str, workspace_id: Optional[int] = None):
+        return self.send_template(contact_email, "email.form_reminder", {"form_name": form_name}, workspace_id)
+    
+    def send_form_digest(self, contact_email: str, form_names: list, workspace_id: Optional[int] = None):
+        context = {"form_names": form_names, "form_count": len(form_names)}
+        return self.send_template(contact_email, "email.form_digest", context, workspace_id)
+    
+    def send_inventory_alert(self, contact_email: str, item_name: str, quantity: int, low_threshold: int, workspace_id: Optional[int] = None):
+        context = {"item_name": item_name, "quantity": quantity, "low_threshold": low_threshold}
+        return self.send_template(contact_email, "email.inventory_low", context, workspace_id)
 
 # Singleton instance
 email_service = EmailService()
@@ -1,6 +1,69 @@
 import os
+import asyncio
+import random
+import threading
+import time
+import logging
 from typing import Optional, Dict
+import httpx
 import requests
+from app.integrations.circuit_breaker import get_breaker
+from app.integrations.templates import template_registry, DEFAULT_LOCALE
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter shared by the sync and async send paths
+
+    `rate` tokens are added per second up to `capacity`; `reserve()` takes a
+    token and returns how long the caller must wait before using it, and
+    `try_acquire()` takes one only if it is available now. Sync callers run
+    on shared worker threads, so they use `try_acquire()` rather than sleep
+    and report how long until the next token (`retry_after()`).
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+    
+    def retry_after(self) -> float:
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.rate)
+    
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
 
 class SMSService:
     """
@@ -11,8 +74,25 @@ class SMSService:
         self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
         self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
         self.from_number = os.getenv("TWILIO_PHONE_NUMBER")
-        self.api_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+        self.api_base = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+        self.api_url = f"{self.api_base}/2010-04-01/Accounts/{self.account_sid}/Messages.json"
         self.is_configured = bool(self.account_sid and self.auth_token and self.from_number)
+        self.connect_timeout = float(os.getenv("SMS_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = float(os.getenv("SMS_READ_TIMEOUT", "10"))
+        self.max_retries = int(os.getenv("SMS_MAX_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("SMS_BACKOFF_BASE", "0.5"))
+        self.backoff_max = float(os.getenv("SMS_BACKOFF_MAX", "8"))
+        self.max_connections = int(os.getenv("SMS_MAX_CONNECTIONS", "20"))
+        # Twilio long codes accept ~1 message/sec; raise for toll-free/short codes
+        self.rate_limiter = TokenBucket(
+            rate=float(os.getenv("SMS_RATE_PER_SEC", "1")),
+            capacity=float(os.getenv("SMS_RATE_BURST", "5"))
+        )
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self._session = requests.Session()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self.breaker = get_breaker("twilio")
     
     def send_sms(self, to_phone: str, message: str) -> Dict:
         """
@@ -31,6 +111,20 @@ class SMSService:
                 "message": "SMS not configured. Set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER"
             }
         
+        if not self.rate_limiter.try_acquire():
+            # Fail fast instead of holding a shared thread; the outbox reschedules
+            # throttled rows without counting an attempt, so send SMS through it
+            return {
+                "status": "failed",
+                "error": "SMS rate limit reached",
+                "code": 429,
+                "throttled": True,
+                "retry_after": self.rate_limiter.retry_after()
+            }
+        
+        if not self.breaker.allow():
+            return {**self.breaker.rejection(), "to": to_phone}
+        
         try:
             auth = (self.account_sid, self.auth_token)
             data = {
@@ -39,7 +133,16 @@ class SMSService:
                 "Body": message
             }
             
-            response = requests.post(self.api_url, data=data, auth=auth)
+            started = time.monotonic()
+            try:
+                response = self._session.post(
+                    self.api_url, data=data, auth=auth,
+                    timeout=(self.connect_timeout, self.read_timeout)
+                )
+            except requests.RequestException as e:
+                self.breaker.record_failure(str(e))
+                raise
+            self._record_response(response.status_code, time.monotonic() - started)
             
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -61,7 +164,126 @@ class SMSService:
                 "error": str(e)
             }
     
-    def send_verification_code(self, phone: str, code: str) -> Dict:
+    def _record_response(self, status_code: int, duration: float):
+        # 4xx other than 429 is a problem with the message (bad number etc.), not with Twilio
+        if status_code in RETRYABLE_STATUS:
+            self.breaker.record_failure(f"HTTP {status_code}")
+        else:
+            self.breaker.record_success(duration)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        # AsyncClient connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                auth=(self.account_sid, self.auth_token),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self.transport
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+    
+    async def send_sms_async(self, to_phone: str, message: str) -> Dict:
+        """
+        Send SMS message via Twilio on the shared keep-alive client
+        
+        Retries 429/5xx responses and transport errors with jittered
+        exponential backoff (honouring Retry-After), and waits on the
+        client-side token bucket before every attempt.
+        
+        Returns:
+            Same status dicts as send_sms
+        """
+        if not self.is_configured:
+            return {
+                "status": "skipped",
+                "message": "SMS not configured. Set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER"
+            }
+        
+        data = {
+            "From": self.from_number,
+            "To": to_phone,
+            "Body": message
+        }
+        client = self._get_client()
+        last_error = "Unknown error"
+        
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                return {**self.breaker.rejection(), "to": to_phone}
+            await self.rate_limiter.acquire_async()
+            retry_after = None
+            started = time.monotonic()
+            try:
+                response = await client.post(self.api_url, data=data)
+                self._record_response(response.status_code, time.monotonic() - started)
+                if response.status_code in [200, 201]:
+                    result = response.json()
+                    return {
+                        "status": "sent",
+                        "message_sid": result.get("sid"),
+                        "to": to_phone
+                    }
+                try:
+                    last_error = response.json().get("message", "Unknown error")
+                except ValueError:
+                    last_error = response.text or "Unknown error"
+                if response.status_code not in RETRYABLE_STATUS:
+                    return {
+                        "status": "failed",
+                        "error": last_error,
+                        "code": response.status_code
+                    }
+                retry_after = response.headers.get("Retry-After")
+            except httpx.TransportError as e:
+                last_error = str(e) or e.__class__.__name__
+                self.breaker.record_failure(last_error)
+            
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.info(f"SMS to {to_phone} failed ({last_error}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        
+        return {
+            "status": "failed",
+            "error": last_error
+        }
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def send_template(self, phone: str, template: str, context: Dict, workspace_id: Optional[int] = None, locale: str = DEFAULT_LOCALE) -> Dict:
+        """
+        Render an SMS template (workspace override or default) and send it
+        
+        Args:
+            phone: Recipient phone number
+            template: Template name, e.g. "sms.booking_reminder"
+            context: Values for the template placeholders
+            workspace_id: Workspace whose customised wording to use, if any
+        
+        Returns:
+            Status dict
+        """
+        message = template_registry.render(template, context, workspace_id, locale).text
+        return self.send_sms(phone, message)
+    
+    def send_verification_code(self, phone: str, code: str, workspace_id: Optional[int] = None) -> Dict:
         """
         Send SMS verification code
         
@@ -72,10 +294,9 @@ class SMSService:
         Returns:
             Status dict
         """
-        message = f"🎯 CareOps Verification Code: {code}\n\nThis code expires in 10 minutes."
-        return self.send_sms(phone, message)
+        return self.send_template(phone, "sms.verification_code", {"code": code}, workspace_id)
     
-    def send_booking_reminder(self, phone: str, booking_details: Dict) -> Dict:
+    def send_booking_reminder(self, phone: str, booking_details: Dict, workspace_id: Optional[int] = None) -> Dict:
         """
         Send booking reminder SMS
         
@@ -86,10 +307,9 @@ class SMSService:
         Returns:
             Status dict
         """
-        message = f"📅 Reminder: {booking_details.get('booking_type')} scheduled at {booking_details.get('scheduled_at')}\n\nReply CONFIRM to confirm or CANCEL to cancel."
-        return self.send_sms(phone, message)
+        return self.send_template(phone, "sms.booking_reminder", booking_details, workspace_id)
     
-    def send_booking_confirmation(self, phone: str, booking_details: Dict) -> Dict:
+    def send_booking_confirmation(self, phone: str, booking_details: Dict, workspace_id: Optional[int] = None) -> Dict:
         """
         Send booking confirmation SMS
         
@@ -100,10 +320,10 @@ class SMSService:
         Returns:
             Status dict
         """
-        message = f"✅ Booking Confirmed!\n\n📋 Type: {booking_details.get('booking_type')}\n⏰ Time: {booking_details.get('scheduled_at')}\n\nConfirmation: {booking_details.get('confirmation_code', 'N/A')}"
-        return self.send_sms(phone, message)
+        context = {**booking_details, "confirmation_code": booking_details.get('confirmation_code', 'N/A')}
+        return self.send_template(phone, "sms.booking_confirmation", context, workspace_id)
     
-    def send_form_reminder(self, phone: str, form_name: str) -> Dict:
+    def send_form_reminder(self, phone: str, form_name: str, workspace_id: Optional[int] = None) -> Dict:
         """
         Send form completion reminder
         
@@ -114,10 +334,23 @@ class SMSService:
         Returns:
             Status dict
         """
-        message = f"📋 Reminder: {form_name} is pending.\n\nPlease complete it at your earliest convenience."
-        return self.send_sms(phone, message)
+        return self.send_template(phone, "sms.form_reminder", {"form_name": form_name}, workspace_id)
     
-    def send_inventory_alert(self, phone: str, item_name: str, quantity: int) -> Dict:
+    def send_form_digest(self, phone: str, form_names: list, workspace_id: Optional[int] = None) -> Dict:
+        """
+        Send one reminder covering several pending forms
+        
+        Args:
+            phone: Recipient phone number
+            form_names: Names of the forms to complete
+        
+        Returns:
+            Status dict
+        """
+        context = {"form_names": form_names, "form_count": len(form_names)}
+        return self.send_template(phone, "sms.form_digest", context, workspace_id)
+    
+    def send_inventory_alert(self, phone: str, item_name: str, quantity: int, workspace_id: Optional[int] = None) -> Dict:
         """
         Send low inventory alert
         
@@ -129,8 +362,7 @@ class SMSService:
         Returns:
             Status dict
         """
-        message = f"⚠️ Low Stock Alert\n\n{item_name}: {quantity} units remaining"
-        return self.send_sms(phone, message)
+        return self.send_template(phone, "sms.inventory_alert", {"item_name": item_name, "quantity": quantity}, workspace_id)
 
 
 # Singleton instance
@@ -0,0 +1,239 @@
+"""
+Message templates for outbound email and SMS
+
+Templates use `{field}` placeholders; `{field|list}` renders a list as
+<li> items in HTML and bullet lines in text. Each template is parsed once
+into literal/field segments, so rendering is a single join. Compiled
+templates are cached per (workspace, template, locale) in an LRU with a TTL,
+so workspace overrides stored in `message_templates` are picked up by every
+worker within TEMPLATE_CACHE_TTL seconds of being changed.
+"""
+import html
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "1024"))
+TEMPLATE_CACHE_TTL = float(os.getenv("TEMPLATE_CACHE_TTL", "300"))
+DEFAULT_LOCALE = os.getenv("TEMPLATE_DEFAULT_LOCALE", "en")
+
+# name -> parts; email templates have subject/html/text, SMS templates only text
+DEFAULT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "email.booking_confirmation": {
+        "subject": "Booking Confirmation",
+        "html": """
+        <h2>Booking Confirmation</h2>
+        <p>Thank you for booking with us!</p>
+        <p><strong>Type:</strong> {booking_type}</p>
+        <p><strong>Date & Time:</strong> {scheduled_at}</p>
+        <p><strong>Duration:</strong> {duration_minutes} minutes</p>
+        <p>We look forward to seeing you!</p>
+        """,
+        "text": "Booking Confirmation\n\nThank you for booking with us!\n\nType: {booking_type}\nDate & Time: {scheduled_at}\nDuration: {duration_minutes} minutes\n\nWe look forward to seeing you!",
+    },
+    "email.welcome": {
+        "subject": "Welcome to Our Service",
+        "html": """
+        <h2>Welcome {contact_name}!</h2>
+        <p>Thank you for reaching out. We'll be in touch shortly.</p>
+        <p>Our team will respond to your inquiry within 24 hours.</p>
+        """,
+        "text": "Welcome {contact_name}!\n\nThank you for reaching out. We'll be in touch shortly.\nOur team will respond to your inquiry within 24 hours.",
+    },
+    "email.form_reminder": {
+        "subject": "Reminder: {form_name} Pending",
+        "html": """
+        <h2>Form Reminder</h2>
+        <p>We noticed that <strong>{form_name}</strong> is still pending.</p>
+        <p>Please complete it at your earliest convenience.</p>
+        """,
+        "text": "Form Reminder\n\nWe noticed that {form_name} is still pending.\nPlease complete it at your earliest convenience.",
+    },
+    "email.form_digest": {
+        "subject": "Reminder: {form_count} Forms Pending",
+        "html": """
+        <h2>Form Reminder</h2>
+        <p>The following forms are still pending:</p>
+        <ul>{form_names|list}</ul>
+        <p>Please complete them at your earliest convenience.</p>
+        """,
+        "text": "Form Reminder\n\nThe following forms are still pending:\n{form_names|list}\n\nPlease complete them at your earliest convenience.",
+    },
+    "email.inventory_low": {
+        "subject": "Low Inventory Alert: {item_name}",
+        "html": "<h2>Low Inventory Alert</h2><p>{item_name} is at {quantity} units (threshold: {low_threshold})</p>",
+        "text": "Low Inventory Alert\n\n{item_name} is at {quantity} units (threshold: {low_threshold})",
+    },
+    "sms.verification_code": {
+        "text": "🎯 CareOps Verification Code: {code}\n\nThis code expires in 10 minutes.",
+    },
+    "sms.booking_reminder": {
+        "text": "📅 Reminder: {booking_type} scheduled at {scheduled_at}\n\nReply CONFIRM to confirm or CANCEL to cancel.",
+    },
+    "sms.booking_confirmation": {
+        "text": "✅ Booking Confirmed!\n\n📋 Type: {booking_type}\n⏰ Time: {scheduled_at}\n\nConfirmation: {confirmation_code}",
+    },
+    "sms.form_reminder": {
+        "text": "📋 Reminder: {form_name} is pending.\n\nPlease complete it at your earliest convenience.",
+    },
+    "sms.form_digest": {
+        "text": "📋 Reminder: {form_count} forms are pending.\n\n{form_names|list}\n\nPlease complete them at your earliest convenience.",
+    },
+    "sms.inventory_alert": {
+        "text": "⚠️ Low Stock Alert\n\n{item_name}: {quantity} units remaining",
+    },
+}
+
+
+@dataclass
+class RenderedMessage:
+    subject: Optional[str]
+    html: Optional[str]
+    text: Optional[str]
+
+
+Segment = Tuple[str, Optional[str], Optional[str]]  # literal, field, filter
+
+
+def _compile(source: Optional[str]) -> Optional[List[Segment]]:
+    if source is None:
+        return None
+    segments = []
+    for literal, field, _, _ in Formatter().parse(source):
+        name, _, flt = (field or "").partition("|")
+        segments.append((literal, name or None, flt or None))
+    return segments
+
+
+def _render(segments: Optional[List[Segment]], context: Dict[str, Any], escape: bool) -> Optional[str]:
+    if segments is None:
+        return None
+    out = []
+    for literal, name, flt in segments:
+        out.append(literal)
+        if name is None:
+            continue
+        value = context.get(name, "")
+        if flt == "list":
+            items = [html.escape(str(v)) if escape else str(v) for v in (value or [])]
+            out.append("".join(f"<li>{v}</li>" for v in items) if escape else "\n".join(f"• {v}" for v in items))
+        else:
+            value = "" if value is None else str(value)
+            out.append(html.escape(value) if escape else value)
+    return "".join(out)
+
+
+def check_override(name: str, parts: Dict[str, Optional[str]]):
+    """Raise ValueError unless `parts` can override template `name`"""
+    if name not in DEFAULT_TEMPLATES:
+        raise ValueError(f"Unknown template: {name}")
+    for part, source in parts.items():
+        if source is None:
+            continue
+        if part not in DEFAULT_TEMPLATES[name]:
+            raise ValueError(f"{name} has no {part} part")
+        _compile(source)  # unbalanced braces raise ValueError
+
+
+class CompiledTemplate:
+    __slots__ = ("name", "subject", "html", "text")
+
+    def __init__(self, name: str, parts: Dict[str, Optional[str]]):
+        self.name = name
+        self.subject = _compile(parts.get("subject"))
+        self.html = _compile(parts.get("html"))
+        self.text = _compile(parts.get("text"))
+
+    def render(self, context: Dict[str, Any]) -> RenderedMessage:
+        return RenderedMessage(
+            subject=_render(self.subject, context, escape=False),
+            html=_render(self.html, context, escape=True),
+            text=_render(self.text, context, escape=False),
+        )
+
+
+def load_workspace_override(workspace_id: int, name: str, locale: str) -> Optional[Dict[str, Optional[str]]]:
+    """Fetch a workspace's customised template from the database, if any"""
+    from app.database import SessionLocal
+    from app.models.models import MessageTemplate
+
+    db = SessionLocal()
+    try:
+        row = db.query(MessageTemplate).filter(
+            MessageTemplate.workspace_id == workspace_id,
+            MessageTemplate.name == name,
+            MessageTemplate.locale.in_([locale, DEFAULT_LOCALE])
+        ).order_by((MessageTemplate.locale == locale).desc()).first()
+        if not row:
+            return None
+        return {"subject": row.subject, "html": row.html_body, "text": row.text_body}
+    finally:
+        db.close()
+
+
+class TemplateRegistry:
+    def __init__(self, max_size: int = TEMPLATE_CACHE_SIZE, ttl: float = TEMPLATE_CACHE_TTL,
+                 override_loader: Callable[[int, str, str], Optional[Dict[str, Optional[str]]]] = load_workspace_override):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.override_loader = override_loader
+        self._defaults: Dict[str, CompiledTemplate] = {
+            name: CompiledTemplate(name, parts) for name, parts in DEFAULT_TEMPLATES.items()
+        }
+        self._cache: "OrderedDict[Tuple[Optional[int], str, str], Tuple[float, CompiledTemplate]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, name: str, workspace_id: Optional[int] = None, locale: str = DEFAULT_LOCALE) -> CompiledTemplate:
+        if workspace_id is None:
+            return self._defaults[name]
+        key = (workspace_id, name, locale)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        compiled = self._defaults[name]
+        try:
+            parts = self.override_loader(workspace_id, name, locale)
+            if parts:
+                # Parts a workspace left empty fall back to the default wording
+                default_parts = DEFAULT_TEMPLATES[name]
+                compiled = CompiledTemplate(name, {part: parts.get(part) or default_parts.get(part) for part in default_parts})
+        except Exception as e:
+            logger.error(f"Template override lookup failed for {key}: {e}")
+
+        with self._lock:
+            self._cache[key] = (now + self.ttl, compiled)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.stats["evictions"] += 1
+        return compiled
+
+    def render(self, name: str, context: Dict[str, Any], workspace_id: Optional[int] = None,
+               locale: str = DEFAULT_LOCALE) -> RenderedMessage:
+        return self.get(name, workspace_id, locale).render(context)
+
+    def invalidate(self, workspace_id: Optional[int] = None):
+        with self._lock:
+            if workspace_id is None:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if key[0] == workspace_id]:
+                del self._cache[key]
+
+
+# Singleton instance
+template_registry = TemplateRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Enum, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, Float, Enum, JSON, Index, UniqueConstraint, DDL, event, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -23,6 +23,9 @@ class User(Base):
 
 class Workspace(Base):
     __tablename__ = "workspaces"
+    __table_args__ = (
+        Index("ix_workspaces_owner_id", "owner_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -30,6 +33,8 @@ class Workspace(Base):
     address = Column(String)
     timezone = Column(String, default="UTC")
     contact_email = Column(String)
+    reminder_lead_minutes = Column(Integer, default=1440)  # booking reminder SMS lead time
+    working_hours = Column(JSON, nullable=True)  # local {"mon": [["09:00", "17:00"]], ...}; see app.services.availability
     is_active = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -44,6 +49,9 @@ class Workspace(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_workspace_id", "workspace_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workspace_id = Column(Integer, ForeignKey("workspaces.id"))
@@ -57,8 +65,16 @@ class Contact(Base):
     conversations = relationship("Conversation", back_populates="contact", cascade="all, delete-orphan")
     bookings = relationship("Booking", back_populates="contact")
 
+# Case-insensitive prefix filters on the contact list
+Index("ix_contacts_workspace_name_lower", Contact.workspace_id, func.lower(Contact.name))
+Index("ix_contacts_workspace_email_lower", Contact.workspace_id, func.lower(Contact.email))
+
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_workspace_updated_at", "workspace_id", "updated_at"),
+        Index("ix_conversations_workspace_open_updated_at", "workspace_id", "is_open", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workspace_id = Column(Integer, ForeignKey("workspaces.id"))
@@ -66,6 +82,10 @@ class Conversation(Base):
     is_open = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Inbox summary, kept current by app.services.conversation_summary
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    unread_count = Column(Integer, default=0, nullable=False, server_default="0")  # customer messages since staff last opened it
     
     workspace = relationship("Workspace", back_populates="conversations")
     contact = relationship("Contact", back_populates="conversations")
@@ -73,6 +93,9 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_created_at", "conversation_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"))
@@ -91,6 +114,21 @@ class BookingTypeEnum(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_workspace_scheduled_at", "workspace_id", "scheduled_at"),
+        Index("ix_bookings_workspace_created_at", "workspace_id", "created_at"),
+        Index("ix_bookings_workspace_status_scheduled_at", "workspace_id", "status", "scheduled_at"),
+        # Overlap checks per location (app.services.booking_conflicts)
+        Index("ix_bookings_workspace_location_scheduled_at", "workspace_id", "location", "scheduled_at"),
+        # Analytics rollup watermark scan (app.services.analytics_rollups)
+        Index("ix_bookings_updated_at", "updated_at", "id"),
+        # Reminder engine window loads only look at confirmed bookings not yet reminded
+        Index(
+            "ix_bookings_reminder_due", "scheduled_at",
+            postgresql_where=text("status = 'confirmed' AND reminder_sent_at IS NULL"),
+            sqlite_where=text("status = 'confirmed' AND reminder_sent_at IS NULL")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workspace_id = Column(Integer, ForeignKey("workspaces.id"))
@@ -102,13 +140,31 @@ class Booking(Base):
     status = Column(String, default="confirmed")  # confirmed, completed, no_show, cancelled
     notes = Column(Text)
     forms_sent = Column(Boolean, default=False)
+    reminder_sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     workspace = relationship("Workspace", back_populates="bookings")
     contact = relationship("Contact", back_populates="bookings")
 
+# On PostgreSQL the database also refuses overlapping active bookings at one
+# location, which closes the race between two concurrent conflict checks.
+# Cancelled, completed and no-show bookings don't hold their slot.
+BOOKING_OVERLAP_CONSTRAINT = "ex_bookings_location_overlap"
+BOOKING_INACTIVE_STATUSES = ("cancelled", "completed", "no_show")
+event.listen(Booking.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"))
+event.listen(Booking.__table__, "after_create", DDL(
+    f"ALTER TABLE bookings ADD CONSTRAINT {BOOKING_OVERLAP_CONSTRAINT} EXCLUDE USING gist ("
+    "workspace_id WITH =, location WITH =, "
+    "tsrange(scheduled_at, scheduled_at + coalesce(duration_minutes, 60) * interval '1 minute') WITH &&"
+    ") WHERE (status NOT IN ('cancelled', 'completed', 'no_show') AND location IS NOT NULL)"
+).execute_if(dialect="postgresql"))
+
 class Form(Base):
     __tablename__ = "forms"
+    __table_args__ = (
+        Index("ix_forms_workspace_id", "workspace_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workspace_id = Column(Integer, ForeignKey("workspaces.id"))
@@ -123,6 +179,11 @@ class Form(Base):
 
 class FormSubmission(Base):
     __tablename__ = "form_submissions"
+    __table_args__ = (
+        Index("ix_form_submissions_status_due_at", "status", "due_at"),
+        Index("ix_form_submissions_booking_id", "booking_id"),
+        Index("ix_form_submissions_submitted_at", "submitted_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     form_id = Column(Integer, ForeignKey("forms.id"))
@@ -132,11 +193,15 @@ class FormSubmission(Base):
     submitted_at = Column(DateTime)
     status = Column(String, default="pending")  # pending, completed, overdue
     due_at = Column(DateTime)
+    reminded_at = Column(DateTime)  # set when the form_reminders job claims it
     
     form = relationship("Form", back_populates="submissions")
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (
+        Index("ix_inventory_items_workspace_id", "workspace_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workspace_id = Column(Integer, ForeignKey("workspaces.id"))
@@ -174,3 +239,91 @@ class Integration(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     workspace = relationship("Workspace", back_populates="integrations")
+
+class Outbox(Base):
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_status_available_at", "status", "available_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), nullable=True)
+    channel = Column(String)  # "email", "sms"
+    kind = Column(String)  # handler name, e.g. "email.booking_confirmation"
+    recipient = Column(String)
+    payload = Column(JSON)
+    status = Column(String, default="pending")  # pending, sent, dead
+    attempts = Column(Integer, default=0)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+    
+    job_name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+
+class MessageTemplate(Base):
+    __tablename__ = "message_templates"
+    __table_args__ = (
+        UniqueConstraint("workspace_id", "name", "locale", name="uq_message_templates_workspace_name_locale"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"))
+    name = Column(String)  # e.g. "email.booking_confirmation", "sms.booking_reminder"
+    locale = Column(String, default="en")
+    subject = Column(String, nullable=True)
+    html_body = Column(Text, nullable=True)
+    text_body = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WorkspaceStats(Base):
+    __tablename__ = "workspace_stats"
+    
+    # Dashboard counters, kept current by app.services.workspace_stats
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), primary_key=True)
+    today_bookings = Column(Integer, default=0, nullable=False)
+    upcoming_bookings = Column(Integer, default=0, nullable=False)
+    new_inquiries = Column(Integer, default=0, nullable=False)  # open conversations
+    pending_forms = Column(Integer, default=0, nullable=False)
+    overdue_forms = Column(Integer, default=0, nullable=False)
+    low_inventory = Column(Integer, default=0, nullable=False)
+    day_start = Column(DateTime)  # workspace's local midnight, in UTC
+    day_end = Column(DateTime)  # next local midnight; the row is stale once this passes
+    reconciled_at = Column(DateTime)
+
+class BookingDailyRollup(Base):
+    __tablename__ = "booking_daily_rollups"
+    
+    # Bookings created per local day, by type and current status (app.services.analytics_rollups)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    booking_type = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    bookings = Column(Integer, default=0, nullable=False)
+
+class FormDailyRollup(Base):
+    __tablename__ = "form_daily_rollups"
+    
+    # Form submissions completed per local day and how long after the booking they came in
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    completed = Column(Integer, default=0, nullable=False)
+    latency_seconds = Column(Float, default=0.0, nullable=False)  # sum, for the mean
+    latency_histogram = Column(JSON)  # counts per analytics_rollups.LATENCY_BUCKETS_HOURS bucket
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+    
+    # Last (timestamp, id) a rollup has processed
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=True)
+    last_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Optional
+from app.database import get_db
+from app.models.models import Workspace
+from app.schemas.schemas import BookingAnalyticsResponse, FormAnalyticsResponse
+from app.services.analytics_rollups import analytics_rollups, bookings_series, check_range, forms_series
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
+
+router = APIRouter()
+
+def resolve_range(date_from: Optional[date], date_to: Optional[date], interval: str):
+    """Default to the 12 months up to today"""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=364)
+    check_range(date_from, date_to, interval)
+    return date_from, date_to
+
+def owned_workspace(db: Session, workspace_id: int, user_id: int) -> Workspace:
+    workspace = db.query(Workspace).filter(
+        Workspace.id == workspace_id,
+        Workspace.owner_id == user_id
+    ).first()
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    return workspace
+
+# Both read only the rollup tables (app.services.analytics_rollups); the
+# rollup job bumps the cache version when it changes a workspace's rows
+
+@router.get("/{workspace_id}/bookings", response_model=BookingAnalyticsResponse)
+def booking_analytics(workspace_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      interval: str = "week", if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    date_from, date_to = resolve_range(date_from, date_to, interval)
+    route = f"analytics.bookings:{date_from}:{date_to}:{interval}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+
+    owned_workspace(db, workspace_id, user_id)
+    series = bookings_series(db, workspace_id, date_from, date_to, interval)
+    series["as_of"] = analytics_rollups.as_of(db, "bookings")
+    return response_cache.put(route, workspace_id, version, user_id, BookingAnalyticsResponse, series).response(if_none_match)
+
+@router.get("/{workspace_id}/forms", response_model=FormAnalyticsResponse)
+def form_analytics(workspace_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                   interval: str = "week", if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    date_from, date_to = resolve_range(date_from, date_to, interval)
+    route = f"analytics.forms:{date_from}:{date_to}:{interval}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+
+    owned_workspace(db, workspace_id, user_id)
+    series = forms_series(db, workspace_id, date_from, date_to, interval)
+    series["as_of"] = analytics_rollups.as_of(db, "form_submissions")
+    return response_cache.put(route, workspace_id, version, user_id, FormAnalyticsResponse, series).response(if_none_match)
@@ -4,7 +4,9 @@ from app.database import get_db
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserResponse, Token, SMSVerificationRequest, LoginRequest
 from app.services.auth_service import get_password_hash, verify_password, create_access_token
-from app.integrations.sms_service import sms_service
+from app.services.principal import get_current_user_id
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services import outbox_service
 from datetime import timedelta, datetime
 import random
 import string
@@ -50,13 +52,18 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             verification_code_expires=datetime.utcnow() + timedelta(minutes=10) if verification_code else None
         )
         db.add(db_user)
+        
+        # Queue the SMS in the same transaction so a throttled send is retried, not lost
+        outbox_ids = []
+        if verification_code and user.phone_number:
+            row = outbox_service.enqueue(db, "sms.verification_code", user.phone_number, {"code": verification_code})
+            db.flush()
+            outbox_ids.append(row.id)
         db.commit()
         db.refresh(db_user)
         
-        # Send SMS if phone number provided
-        if verification_code and user.phone_number:
-            sms_result = sms_service.send_verification_code(user.phone_number, verification_code)
-            print(f"SMS verification sent: {sms_result}")
+        if outbox_ids:
+            notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, outbox_ids)
         
         return db_user
     except HTTPException:
@@ -116,11 +123,13 @@ def resend_sms(email: str, db: Session = Depends(get_db)):
         verification_code = generate_verification_code()
         user.verification_code = verification_code
         user.verification_code_expires = datetime.utcnow() + timedelta(minutes=10)
+        row = outbox_service.enqueue(db, "sms.verification_code", user.phone_number, {"code": verification_code})
+        db.flush()
+        outbox_ids = [row.id]
         db.commit()
         
         # Send SMS
-        sms_result = sms_service.send_verification_code(user.phone_number, verification_code)
-        print(f"SMS resent: {sms_result}")
+        notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, outbox_ids)
         
         return {"status": "success", "message": "Verification code resent"}
     except HTTPException:
@@ -154,13 +163,7 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Login failed")
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(token: str, db: Session = Depends(get_db)):
-    from app.services.auth_service import decode_token
-    payload = decode_token(token)
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user_id = int(payload["sub"])
+def get_current_user(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,40 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.models import Booking, Workspace, Contact, InventoryItem, Message, Conversation
-from app.schemas.schemas import BookingCreate, BookingResponse, BookingUpdate
-from datetime import datetime
-from app.integrations.email_service import email_service
-from app.integrations.sms_service import sms_service
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.database import get_async_db
+from app.models.models import BOOKING_INACTIVE_STATUSES, Booking, Workspace, Contact, Message, Conversation
+from app.schemas.schemas import AvailabilityResponse, BookingCreate, BookingResponse, BookingUpdate
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services import inventory_service, outbox_service
+from app.services.availability import availability, check_range
+from app.services.booking_conflicts import check_duration, conflict_error, find_conflicts, is_overlap_violation
+from app.services.timeutil import naive_utc
+from app.services.inbox_events import inbox_events
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate
+from app.services.reminder_engine import reminder_engine
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.post("/{workspace_id}/{contact_id}/create", response_model=BookingResponse)
-def create_booking(workspace_id: int, contact_id: int, booking: BookingCreate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def create_booking(workspace_id: int, contact_id: int, booking: BookingCreate, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    contact = db.query(Contact).filter(
+    contact = await db.scalar(select(Contact).where(
         Contact.id == contact_id,
         Contact.workspace_id == workspace_id
-    ).first()
+    ))
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
+    check_duration(booking.duration_minutes)
+    # Stored as naive UTC; the object outlives the commit and is compared with utcnow()
+    booking.scheduled_at = naive_utc(booking.scheduled_at)
+    conflicts = await find_conflicts(db, workspace_id, booking.location, booking.scheduled_at, booking.duration_minutes)
+    if conflicts:
+        raise conflict_error(conflicts)
+    
     db_booking = Booking(
         workspace_id=workspace_id,
         contact_id=contact_id,
@@ -47,39 +57,52 @@ def create_booking(workspace_id: int, contact_id: int, booking: BookingCreate, t
     )
     db.add(db_booking)
     
-    # Update inventory if applicable
-    inventory_items = db.query(InventoryItem).filter(InventoryItem.workspace_id == workspace_id).all()
-    for item in inventory_items:
-        item.quantity -= item.quantity_per_booking
+    # Update inventory if applicable (one UPDATE for all items)
+    low_items = await inventory_service.deduct_for_booking(db, workspace_id)
     
-    db.commit()
-    db.refresh(db_booking)
+    booking_details = {
+        'booking_type': db_booking.booking_type,
+        'scheduled_at': db_booking.scheduled_at.strftime('%B %d, %Y at %I:%M %p'),
+        'duration_minutes': db_booking.duration_minutes,
+        'location': db_booking.location or 'Online'
+    }
+    
+    # Record confirmation email/SMS in the outbox, in the same transaction as the booking
+    outbox_rows = []
+    if contact.email:
+        outbox_rows.append(outbox_service.enqueue(db, "email.booking_confirmation", contact.email, booking_details, workspace_id))
+    if contact.phone:
+        outbox_rows.append(outbox_service.enqueue(db, "sms.booking_confirmation", contact.phone, booking_details, workspace_id))
+    await db.flush()
+    outbox_ids = [row.id for row in outbox_rows]
     
-    # Send booking confirmation email
     try:
-        booking_details = {
-            'booking_type': db_booking.booking_type,
-            'scheduled_at': db_booking.scheduled_at.strftime('%B %d, %Y at %I:%M %p'),
-            'duration_minutes': db_booking.duration_minutes,
-            'location': db_booking.location or 'Online'
-        }
-        email_service.send_booking_confirmation(contact.email, booking_details)
-    except Exception as e:
-        print(f"Email confirmation failed: {e}")
+        await db.commit()
+    except IntegrityError as e:
+        # A concurrent booking took the slot after our check (PostgreSQL exclusion constraint)
+        await db.rollback()
+        if not is_overlap_violation(e):
+            raise
+        raise conflict_error(await find_conflicts(db, workspace_id, booking.location, booking.scheduled_at, booking.duration_minutes))
+    response_cache.bump(workspace_id)
+    availability.invalidate(workspace, (db_booking.scheduled_at, db_booking.duration_minutes))
+    # BookingResponse needs the contact; we already have it, so no lazy load
+    set_committed_value(db_booking, "contact", contact)
     
-    # Send SMS confirmation if phone available
-    if contact.phone:
-        try:
-            sms_service.send_booking_confirmation(contact.phone, booking_details)
-        except Exception as e:
-            print(f"SMS confirmation failed: {e}")
+    # Deliver right away off the request path; outbox workers retry anything left behind
+    if outbox_ids:
+        notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, outbox_ids)
+    if low_items:
+        notification_dispatcher.submit("inventory_low", inventory_service.notify_low_stock, workspace_id, low_items)
+    
+    reminder_engine.schedule(db_booking.id, db_booking.scheduled_at, db_booking.status, workspace.reminder_lead_minutes)
     
     # Log booking confirmation message to conversation
     try:
-        conversation = db.query(Conversation).filter(
+        conversation = await db.scalar(select(Conversation).where(
             Conversation.contact_id == contact_id,
             Conversation.workspace_id == workspace_id
-        ).first()
+        ))
         if conversation:
             confirm_msg = Message(
                 conversation_id=conversation.id,
@@ -89,46 +112,123 @@ def create_booking(workspace_id: int, contact_id: int, booking: BookingCreate, t
                 channel="system"
             )
             db.add(confirm_msg)
-            db.commit()
+            await db.commit()
+            response_cache.bump(workspace_id)
+            await inbox_events.message_created(workspace_id, conversation, confirm_msg)
     except Exception as e:
         print(f"Failed to log confirmation message: {e}")
     
     return db_booking
 
 @router.get("/{workspace_id}/list", response_model=list[BookingResponse])
-def list_bookings(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def list_bookings(workspace_id: int, response: Response,
+                        scheduled_from: Optional[datetime] = None, scheduled_to: Optional[datetime] = None,
+                        status: Optional[str] = None, cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                        user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """Bookings in schedule order, optionally within [scheduled_from, scheduled_to) and/or with one status"""
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    bookings = db.query(Booking).filter(Booking.workspace_id == workspace_id).all()
+    query = select(Booking).where(Booking.workspace_id == workspace_id).options(selectinload(Booking.contact))
+    if scheduled_from:
+        query = query.where(Booking.scheduled_at >= scheduled_from)
+    if scheduled_to:
+        query = query.where(Booking.scheduled_at < scheduled_to)
+    if status:
+        query = query.where(Booking.status == status)
+    limit = page_limit(limit)
+    keys = (Booking.scheduled_at, Booking.id)
+    bookings, next_cursor = page(await db.scalars(paginate(query, keys, cursor, limit)), keys, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return bookings
 
+@router.get("/{workspace_id}/availability", response_model=AvailabilityResponse)
+async def get_availability(workspace_id: int, date_from: date, date_to: Optional[date] = None,
+                           slot_minutes: int = 30, location: Optional[str] = None,
+                           user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """
+    Free slots per local day from date_from to date_to (inclusive, default a
+    week) within the workspace's working hours. With `location`, only
+    bookings there make a slot busy
+    """
+    workspace = await db.scalar(select(Workspace).where(
+        Workspace.id == workspace_id,
+        Workspace.owner_id == user_id
+    ))
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    
+    date_to = date_to or date_from + timedelta(days=6)
+    check_range(date_from, date_to, slot_minutes)
+    days = await availability.free_slots(db, workspace, date_from, date_to, slot_minutes, location)
+    
+    tz = availability.zone(workspace)
+    now = datetime.utcnow()
+    return AvailabilityResponse(
+        timezone=str(tz),
+        slot_minutes=slot_minutes,
+        location=location,
+        days=[
+            {"date": day, "slots": [
+                {"start": start.replace(tzinfo=timezone.utc).astimezone(tz), "end": end.replace(tzinfo=timezone.utc).astimezone(tz)}
+                for start, end in slots if start >= now
+            ]}
+            for day, slots in days.items()
+        ]
+    )
+
 @router.patch("/{workspace_id}/{booking_id}", response_model=BookingResponse)
-def update_booking(workspace_id: int, booking_id: int, booking_update: BookingUpdate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def update_booking(workspace_id: int, booking_id: int, booking_update: BookingUpdate, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    booking = db.query(Booking).filter(
+    booking = await db.scalar(select(Booking).where(
         Booking.id == booking_id,
         Booking.workspace_id == workspace_id
-    ).first()
+    ).options(selectinload(Booking.contact)))
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
+    if booking_update.scheduled_at:
+        booking_update.scheduled_at = naive_utc(booking_update.scheduled_at)
+    moved = bool(booking_update.scheduled_at) and booking_update.scheduled_at != booking.scheduled_at
+    active = booking_update.status not in BOOKING_INACTIVE_STATUSES
+    reactivated = booking.status in BOOKING_INACTIVE_STATUSES and active
+    if active and (moved or reactivated):
+        conflicts = await find_conflicts(db, workspace_id, booking.location,
+                                         booking_update.scheduled_at if moved else booking.scheduled_at,
+                                         booking.duration_minutes, exclude_id=booking.id)
+        if conflicts:
+            raise conflict_error(conflicts)
+    
+    previous_slot = (booking.scheduled_at, booking.duration_minutes)
     booking.status = booking_update.status
     if booking_update.notes:
         booking.notes = booking_update.notes
+    if moved:
+        booking.scheduled_at = booking_update.scheduled_at
+        booking.reminder_sent_at = None
+    
+    # Rolling back expires the booking, so keep what the 409 needs
+    slot = (booking.location, booking.scheduled_at, booking.duration_minutes)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if not is_overlap_violation(e):
+            raise
+        raise conflict_error(await find_conflicts(db, workspace_id, *slot, exclude_id=booking_id))
+    response_cache.bump(workspace_id)
+    availability.invalidate(workspace, previous_slot, slot[1:])
     
-    db.commit()
-    db.refresh(booking)
+    reminder_engine.schedule(booking.id, booking.scheduled_at, booking.status, workspace.reminder_lead_minutes)
     return booking
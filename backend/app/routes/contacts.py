@@ -1,30 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.models import Contact, Workspace, Conversation, Message
 from app.schemas.schemas import ContactCreate, ContactResponse
 from datetime import datetime
-from app.integrations.email_service import email_service
-from app.integrations.sms_service import sms_service
+from typing import Optional
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services import outbox_service
+from app.services.inbox_events import inbox_events
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate, prefix_range
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.post("/{workspace_id}/create", response_model=ContactResponse)
-def create_contact(workspace_id: int, contact: ContactCreate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def create_contact(workspace_id: int, contact: ContactCreate, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
@@ -36,7 +32,7 @@ def create_contact(workspace_id: int, contact: ContactCreate, token: str, db: Se
         last_contacted=datetime.utcnow()
     )
     db.add(db_contact)
-    db.commit()
+    await db.flush()
     
     # Create conversation
     db_conversation = Conversation(
@@ -44,6 +40,7 @@ def create_contact(workspace_id: int, contact: ContactCreate, token: str, db: Se
         contact_id=db_contact.id
     )
     db.add(db_conversation)
+    await db.flush()
     
     # Send welcome message (system)
     welcome_msg = Message(
@@ -54,52 +51,73 @@ def create_contact(workspace_id: int, contact: ContactCreate, token: str, db: Se
         channel="system"
     )
     db.add(welcome_msg)
-    db.commit()
-    db.refresh(db_contact)
-    
-    # Send welcome email
-    try:
-        email_service.send_welcome_message(contact.email, contact.name)
-    except Exception as e:
-        print(f"Welcome email failed: {e}")
     
-    # Send welcome SMS if phone provided
+    # Record welcome email/SMS in the outbox, in the same transaction as the contact
+    outbox_rows = []
+    if contact.email:
+        outbox_rows.append(outbox_service.enqueue(db, "email.welcome", contact.email, {"name": contact.name}, workspace_id))
     if contact.phone:
-        try:
-            sms_msg = f"👋 Hi {contact.name}! Thank you for reaching out. Our team will contact you within 24 hours."
-            sms_service.send_sms(contact.phone, sms_msg)
-        except Exception as e:
-            print(f"Welcome SMS failed: {e}")
+        sms_msg = f"👋 Hi {contact.name}! Thank you for reaching out. Our team will contact you within 24 hours."
+        outbox_rows.append(outbox_service.enqueue(db, "sms.text", contact.phone, {"message": sms_msg}, workspace_id))
+    await db.flush()
+    outbox_ids = [row.id for row in outbox_rows]
+    
+    await db.commit()
+    response_cache.bump(workspace_id)
+    await inbox_events.conversation_created(workspace_id, db_conversation, db_contact)
+    await inbox_events.message_created(workspace_id, db_conversation, welcome_msg)
+    
+    # Deliver right away off the request path; outbox workers retry anything left behind
+    if outbox_ids:
+        notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, outbox_ids)
     
     return db_contact
 
 @router.get("/{workspace_id}/list", response_model=list[ContactResponse])
-def list_contacts(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def list_contacts(workspace_id: int, name: Optional[str] = None, email: Optional[str] = None,
+                        cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                        if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """Contacts by id; `name` / `email` are case-insensitive prefix filters"""
+    limit = page_limit(limit)
+    route = f"contacts.list:{name}:{email}:{cursor}:{limit}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+    
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    contacts = db.query(Contact).filter(Contact.workspace_id == workspace_id).all()
-    return contacts
+    query = select(Contact).where(Contact.workspace_id == workspace_id)
+    # Prefix ranges on lower(...) so the expression indexes serve them
+    if name:
+        query = query.where(*prefix_range(func.lower(Contact.name), name.lower()))
+    if email:
+        query = query.where(*prefix_range(func.lower(Contact.email), email.lower()))
+    keys = (Contact.id,)
+    contacts, next_cursor = page(await db.scalars(paginate(query, keys, cursor, limit)), keys, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return response_cache.put(
+        route, workspace_id, version, user_id, list[ContactResponse], contacts, headers
+    ).response(if_none_match)
 
 @router.get("/{workspace_id}/{contact_id}", response_model=ContactResponse)
-def get_contact(workspace_id: int, contact_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
+async def get_contact(workspace_id: int, contact_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    workspace = await db.scalar(select(Workspace).where(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
-    ).first()
+    ))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    contact = db.query(Contact).filter(
+    contact = await db.scalar(select(Contact).where(
         Contact.id == contact_id,
         Contact.workspace_id == workspace_id
-    ).first()
+    ))
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
@@ -1,86 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database import get_db
-from app.models.models import Workspace, Booking, Contact, FormSubmission, InventoryItem, Conversation
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.database import get_async_db
+from app.models.models import Workspace, WorkspaceStats, Booking, Conversation
 from app.schemas.schemas import DashboardStats, DashboardResponse
-from datetime import datetime, timedelta
+from app.services.response_cache import response_cache
+from app.services.workspace_stats import workspace_stats
+from app.services.principal import get_current_user_id
+from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.get("/{workspace_id}", response_model=DashboardResponse)
-def get_dashboard(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspace = db.query(Workspace).filter(
-        Workspace.id == workspace_id,
-        Workspace.owner_id == user_id
-    ).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Get stats
-    today = datetime.utcnow().date()
-    today_bookings = db.query(Booking).filter(
-        and_(
-            Booking.workspace_id == workspace_id,
-            Booking.scheduled_at >= datetime.combine(today, datetime.min.time()),
-            Booking.scheduled_at < datetime.combine(today + timedelta(days=1), datetime.min.time())
-        )
-    ).count()
-    
-    upcoming_bookings = db.query(Booking).filter(
-        and_(
-            Booking.workspace_id == workspace_id,
-            Booking.scheduled_at > datetime.combine(today + timedelta(days=1), datetime.min.time())
-        )
-    ).count()
-    
-    new_inquiries = db.query(Conversation).filter(
-        and_(
-            Conversation.workspace_id == workspace_id,
-            Conversation.is_open == True
-        )
-    ).count()
-    
-    pending_forms = db.query(FormSubmission).join(Booking).filter(
-        and_(
-            Booking.workspace_id == workspace_id,
-            FormSubmission.status == "pending"
-        )
-    ).count()
-    
-    # Get overdue forms count
-    overdue_forms = db.query(FormSubmission).join(Booking).filter(
-        and_(
-            Booking.workspace_id == workspace_id,
-            FormSubmission.status == "pending",
-            FormSubmission.due_at < datetime.utcnow()
-        )
-    ).count()
+async def get_dashboard(workspace_id: int, if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get("dashboard", workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
     
-    # Get completed forms count
-    completed_forms = db.query(FormSubmission).join(Booking).filter(
-        and_(
-            Booking.workspace_id == workspace_id,
-            FormSubmission.status == "completed"
-        )
-    ).count()
+    # Counters come from the workspace's rollup row (kept current by
+    # app.services.workspace_stats); the join doubles as the ownership check
+    owned_stats = select(WorkspaceStats).join(
+        Workspace, Workspace.id == WorkspaceStats.workspace_id
+    ).where(WorkspaceStats.workspace_id == workspace_id, Workspace.owner_id == user_id)
+    counts = await db.scalar(owned_stats)
+    if not counts or not counts.day_end or counts.day_end <= datetime.utcnow():
+        # Missing, or its local day ended before the rollover job got to it
+        workspace = await db.scalar(select(Workspace).where(
+            Workspace.id == workspace_id,
+            Workspace.owner_id == user_id
+        ))
+        if not workspace:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        await db.run_sync(lambda session: workspace_stats.refresh(session, [workspace_id]))
+        counts = await db.scalar(owned_stats.execution_options(populate_existing=True))
     
-    low_inventory = db.query(InventoryItem).filter(
-        and_(
-            InventoryItem.workspace_id == workspace_id,
-            InventoryItem.quantity <= InventoryItem.low_threshold
-        )
-    ).count()
+    today_bookings = counts.today_bookings
+    upcoming_bookings = counts.upcoming_bookings
+    new_inquiries = counts.new_inquiries
+    pending_forms = counts.pending_forms
+    overdue_forms = counts.overdue_forms
+    low_inventory = counts.low_inventory
     
     stats = DashboardStats(
         today_bookings=today_bookings,
@@ -101,18 +63,21 @@ def get_dashboard(workspace_id: int, token: str, db: Session = Depends(get_db)):
     if low_inventory > 0:
         alerts.append({"type": "alert", "message": f"{low_inventory} inventory items low"})
     
-    # Get recent data
-    recent_bookings = db.query(Booking).filter(
+    # Get recent data; relationships are joined in so each list is one round trip
+    recent_bookings = (await db.scalars(select(Booking).where(
         Booking.workspace_id == workspace_id
-    ).order_by(Booking.created_at.desc()).limit(5).all()
+    ).order_by(Booking.created_at.desc()).limit(5).options(joinedload(Booking.contact)))).all()
     
-    recent_conversations = db.query(Conversation).filter(
+    recent_conversations = (await db.scalars(select(Conversation).where(
         Conversation.workspace_id == workspace_id
-    ).order_by(Conversation.updated_at.desc()).limit(5).all()
+    ).order_by(Conversation.updated_at.desc()).limit(5).options(
+        joinedload(Conversation.contact)
+    ))).all()
     
-    return DashboardResponse(
+    dashboard = DashboardResponse(
         stats=stats,
         alerts=alerts,
         recent_bookings=recent_bookings,
         recent_conversations=recent_conversations
     )
+    return response_cache.put("dashboard", workspace_id, version, user_id, DashboardResponse, dashboard).response(if_none_match)
@@ -1,23 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.database import get_db
 from app.models.models import Form, Workspace
 from app.schemas.schemas import FormCreate, FormResponse
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.post("/{workspace_id}/create", response_model=FormResponse)
-def create_form(workspace_id: int, form: FormCreate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def create_form(workspace_id: int, form: FormCreate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
@@ -34,12 +29,20 @@ def create_form(workspace_id: int, form: FormCreate, token: str, db: Session = D
     )
     db.add(db_form)
     db.commit()
+    response_cache.bump(workspace_id)
     db.refresh(db_form)
     return db_form
 
 @router.get("/{workspace_id}/list", response_model=list[FormResponse])
-def list_forms(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def list_forms(workspace_id: int, cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+               if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    limit = page_limit(limit)
+    route = f"forms.list:{cursor}:{limit}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+    
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
@@ -47,5 +50,9 @@ def list_forms(workspace_id: int, token: str, db: Session = Depends(get_db)):
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    forms = db.query(Form).filter(Form.workspace_id == workspace_id).all()
-    return forms
+    keys = (Form.id,)
+    forms, next_cursor = page(db.scalars(paginate(
+        select(Form).where(Form.workspace_id == workspace_id), keys, cursor, limit
+    )), keys, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return response_cache.put(route, workspace_id, version, user_id, list[FormResponse], forms, headers).response(if_none_match)
@@ -1,55 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from app.database import AsyncSessionLocal, get_async_db
 from app.models.models import Conversation, Message, Workspace, Contact, StaffUser
-from app.schemas.schemas import MessageCreate, ConversationResponse
+from app.schemas.schemas import MessageCreate, MessageResponse, ConversationResponse, ConversationSummary
 from app.services.role_checker import RoleChecker
 from app.services.automation_service import automation_service
+from app.services.conversation_summary import mark_read
+from app.services.inbox_events import CLOSED, inbox_events
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id, user_id_from_token
 from datetime import datetime
+from typing import Optional
+import asyncio
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
-@router.get("/{workspace_id}/conversations", response_model=list[ConversationResponse])
-def get_conversations(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    # Check if owner or staff with inbox permission
-    try:
-        user_id = RoleChecker.check_staff_permission(workspace_id, token, 'inbox', db)
-    except HTTPException:
-        # If not staff, check if owner
-        user_id = RoleChecker.check_workspace_owner(workspace_id, token, db)
+@router.get("/{workspace_id}/conversations", response_model=list[ConversationSummary])
+async def get_conversations(workspace_id: int, response: Response, is_open: Optional[bool] = None,
+                            cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                            user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """
+    Most recently active first; `is_open` filters open / closed conversations.
+    Summaries only - messages are paged from /conversations/{id}/messages
+    """
+    # Owner, or staff with inbox permission
+    await db.run_sync(lambda session: RoleChecker.check_staff_permission(workspace_id, user_id, 'inbox', session))
     
-    conversations = db.query(Conversation).filter(Conversation.workspace_id == workspace_id).all()
+    query = select(Conversation).where(Conversation.workspace_id == workspace_id).options(
+        joinedload(Conversation.contact)
+    )
+    if is_open is not None:
+        query = query.where(Conversation.is_open == is_open)
+    limit = page_limit(limit)
+    keys = (Conversation.updated_at, Conversation.id)
+    conversations, next_cursor = page(
+        await db.scalars(paginate(query, keys, cursor, limit, descending=True)), keys, limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return conversations
 
 @router.post("/{workspace_id}/conversations/{conversation_id}/send", response_model=dict)
-def send_message(workspace_id: int, conversation_id: int, message: MessageCreate, token: str, db: Session = Depends(get_db)):
-    # Check if owner or staff with inbox permission
-    try:
-        user_id = RoleChecker.check_staff_permission(workspace_id, token, 'inbox', db)
-    except HTTPException:
-        # If not staff, check if owner
-        user_id = RoleChecker.check_workspace_owner(workspace_id, token, db)
+async def send_message(workspace_id: int, conversation_id: int, message: MessageCreate, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    # Owner, or staff with inbox permission
+    await db.run_sync(lambda session: RoleChecker.check_staff_permission(workspace_id, user_id, 'inbox', session))
     
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = await db.get(Workspace, workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    conversation = db.query(Conversation).filter(
+    conversation = await db.scalar(select(Conversation).where(
         and_(
             Conversation.id == conversation_id,
             Conversation.workspace_id == workspace_id
         )
-    ).first()
+    ))
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
@@ -62,41 +71,146 @@ def send_message(workspace_id: int, conversation_id: int, message: MessageCreate
     )
     db.add(db_message)
     
-    # Update conversation
-    conversation.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(db_message)
+    # Conversation summary (last message, updated_at) is maintained on flush
+    await db.commit()
+    response_cache.bump(workspace_id)
+    await inbox_events.message_created(workspace_id, conversation, db_message)
     
     # Trigger automation on staff reply
     if message.sender_type == "staff":
         try:
-            automation_service.on_staff_reply(db_message, conversation, db)
+            await db.run_sync(lambda session: automation_service.on_staff_reply(db_message, conversation, session))
         except Exception as e:
             print(f"Automation trigger failed: {e}")
     
     return {"status": "sent", "message_id": db_message.id}
 
 @router.get("/{workspace_id}/conversations/{conversation_id}", response_model=ConversationResponse)
-def get_conversation(workspace_id: int, conversation_id: int, token: str, db: Session = Depends(get_db)):
-    # Check if owner or staff with inbox permission
-    try:
-        user_id = RoleChecker.check_staff_permission(workspace_id, token, 'inbox', db)
-    except HTTPException:
-        # If not staff, check if owner
-        user_id = RoleChecker.check_workspace_owner(workspace_id, token, db)
+async def get_conversation(workspace_id: int, conversation_id: int, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    # Owner, or staff with inbox permission
+    await db.run_sync(lambda session: RoleChecker.check_staff_permission(workspace_id, user_id, 'inbox', session))
     
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+    workspace = await db.get(Workspace, workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    conversation = db.query(Conversation).filter(
+    conversation = await db.scalar(select(Conversation).where(
         and_(
             Conversation.id == conversation_id,
             Conversation.workspace_id == workspace_id
         )
-    ).first()
+    ).options(
+        selectinload(Conversation.contact),
+        selectinload(Conversation.messages)
+    ))
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
+    if await db.run_sync(lambda session: mark_read(session, conversation_id)):
+        await db.commit()
+        response_cache.bump(workspace_id)
+        await inbox_events.conversation_updated(workspace_id, conversation)
     return conversation
+
+@router.get("/{workspace_id}/conversations/{conversation_id}/messages", response_model=list[MessageResponse])
+async def get_messages(workspace_id: int, conversation_id: int, response: Response,
+                       cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                       user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """
+    Newest first; follow X-Next-Cursor for older messages. Reading the
+    first page marks the conversation read
+    """
+    # Owner, or staff with inbox permission
+    await db.run_sync(lambda session: RoleChecker.check_staff_permission(workspace_id, user_id, 'inbox', session))
+    
+    conversation = await db.scalar(select(Conversation).where(
+        and_(
+            Conversation.id == conversation_id,
+            Conversation.workspace_id == workspace_id
+        )
+    ))
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    limit = page_limit(limit)
+    keys = (Message.created_at, Message.id)
+    messages, next_cursor = page(
+        await db.scalars(paginate(select(Message).where(Message.conversation_id == conversation_id),
+                                  keys, cursor, limit, descending=True)),
+        keys, limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    if not cursor and await db.run_sync(lambda session: mark_read(session, conversation_id)):
+        await db.commit()
+        response_cache.bump(workspace_id)
+        await inbox_events.conversation_updated(workspace_id, conversation)
+    return messages
+
+async def authorize_stream(workspace_id: int, user_id: int):
+    """
+    Same inbox permission as the routes above, checked once at subscribe
+    time on a short-lived session so an open stream doesn't hold a pooled
+    connection
+    """
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(lambda session: RoleChecker.check_staff_permission(workspace_id, user_id, 'inbox', session))
+
+@router.websocket("/{workspace_id}/ws")
+async def inbox_socket(websocket: WebSocket, workspace_id: int, token: str):
+    """Inbox events for the workspace as JSON text frames (see app.services.inbox_events)"""
+    try:
+        await authorize_stream(workspace_id, user_id_from_token(token))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not inbox_events.available:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    await websocket.accept()
+    
+    async with inbox_events.subscribe(workspace_id) as subscription:
+        async def push():
+            while (event := await subscription.next()) is not CLOSED:
+                await websocket.send_text(event)
+        
+        async def receive():
+            # Nothing is expected from the client; this notices it going away
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                pass
+        
+        tasks = [asyncio.create_task(push()), asyncio.create_task(receive())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    if tasks[0] in done:
+        # Shutting down, or the send failed
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+@router.get("/{workspace_id}/events")
+async def inbox_event_stream(workspace_id: int, user_id: int = Depends(get_current_user_id)):
+    """The same inbox events as Server-Sent Events, for clients without WebSockets"""
+    await authorize_stream(workspace_id, user_id)
+    if not inbox_events.available:
+        raise HTTPException(status_code=503, detail="Inbox events are unavailable; poll the conversation list")
+    
+    async def stream():
+        async with inbox_events.subscribe(workspace_id) as subscription:
+            yield "retry: 5000\n\n"
+            # StreamingResponse cancels this generator when the client disconnects
+            while (event := await subscription.next()) is not CLOSED:
+                yield f"data: {event}\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # don't let a proxy buffer the stream
+    })
@@ -1,23 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.database import get_db
 from app.models.models import InventoryItem, Workspace
-from app.schemas.schemas import InventoryItemCreate, InventoryItemResponse
+from app.schemas.schemas import InventoryForecastResponse, InventoryItemCreate, InventoryItemResponse
+from app.services.inventory_forecast import INVENTORY_FORECAST_DEFAULT_WEEKS, check_weeks, forecast, local_date
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.post("/{workspace_id}/create", response_model=InventoryItemResponse)
-def create_inventory_item(workspace_id: int, item: InventoryItemCreate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def create_inventory_item(workspace_id: int, item: InventoryItemCreate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
@@ -34,12 +30,38 @@ def create_inventory_item(workspace_id: int, item: InventoryItemCreate, token: s
     )
     db.add(db_item)
     db.commit()
+    response_cache.bump(workspace_id)
     db.refresh(db_item)
     return db_item
 
 @router.get("/{workspace_id}/list", response_model=list[InventoryItemResponse])
-def list_inventory(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def list_inventory(workspace_id: int, cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                   if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    limit = page_limit(limit)
+    route = f"inventory.list:{cursor}:{limit}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+    
+    workspace = db.query(Workspace).filter(
+        Workspace.id == workspace_id,
+        Workspace.owner_id == user_id
+    ).first()
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    
+    keys = (InventoryItem.id,)
+    items, next_cursor = page(db.scalars(paginate(
+        select(InventoryItem).where(InventoryItem.workspace_id == workspace_id), keys, cursor, limit
+    )), keys, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return response_cache.put(route, workspace_id, version, user_id, list[InventoryItemResponse], items, headers).response(if_none_match)
+
+@router.get("/{workspace_id}/forecast", response_model=InventoryForecastResponse)
+def forecast_inventory(workspace_id: int, weeks: int = INVENTORY_FORECAST_DEFAULT_WEEKS,
+                       if_none_match: Optional[str] = Header(None), user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    check_weeks(weeks)
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
@@ -47,5 +69,11 @@ def list_inventory(workspace_id: int, token: str, db: Session = Depends(get_db))
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
     
-    items = db.query(InventoryItem).filter(InventoryItem.workspace_id == workspace_id).all()
-    return items
+    # Booking and inventory writes bump the version; the local date rolls the projection over at midnight
+    route = f"inventory.forecast:{weeks}:{local_date(workspace.timezone)}"
+    version = response_cache.version(workspace_id)
+    cached = response_cache.get(route, workspace_id, version, user_id, if_none_match)
+    if cached:
+        return cached.response(if_none_match)
+    return response_cache.put(route, workspace_id, version, user_id, InventoryForecastResponse,
+                              forecast(db, workspace, weeks)).response(if_none_match)
@@ -1,25 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.models import Workspace, User, Contact, Booking, Form, InventoryItem
-from app.schemas.schemas import WorkspaceCreate, WorkspaceResponse, DashboardStats, DashboardResponse
+from app.models.models import Workspace, User, Contact, Booking, Form, InventoryItem, MessageTemplate
+from app.schemas.schemas import WorkspaceCreate, WorkspaceUpdate, WorkspaceResponse, DashboardStats, DashboardResponse, MessageTemplateUpdate, MessageTemplateResponse
 from datetime import datetime, timedelta
+from typing import Optional
+from app.services.availability import check_working_hours
+from app.services.pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, page, page_limit, paginate
+from app.services.response_cache import response_cache
+from app.services.principal import get_current_user_id
+from app.integrations.templates import DEFAULT_LOCALE, check_override, template_registry
 
 router = APIRouter()
 
-def get_current_user_id(token: str = None) -> int:
-    # This is simplified - in production use proper dependency injection
-    from app.services.auth_service import decode_token
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return int(payload["sub"])
-
 @router.post("/create", response_model=WorkspaceResponse)
-def create_workspace(workspace: WorkspaceCreate, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def create_workspace(workspace: WorkspaceCreate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -30,6 +26,8 @@ def create_workspace(workspace: WorkspaceCreate, token: str, db: Session = Depen
         address=workspace.address,
         timezone=workspace.timezone,
         contact_email=workspace.contact_email,
+        reminder_lead_minutes=workspace.reminder_lead_minutes,
+        working_hours=check_working_hours(workspace.working_hours),
         is_active=False
     )
     db.add(db_workspace)
@@ -38,25 +36,49 @@ def create_workspace(workspace: WorkspaceCreate, token: str, db: Session = Depen
     return db_workspace
 
 @router.get("/list", response_model=list[WorkspaceResponse])
-def list_workspaces(token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
-    workspaces = db.query(Workspace).filter(Workspace.owner_id == user_id).all()
+def list_workspaces(response: Response, cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT,
+                    user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    limit = page_limit(limit)
+    keys = (Workspace.id,)
+    workspaces, next_cursor = page(db.scalars(paginate(
+        select(Workspace).where(Workspace.owner_id == user_id), keys, cursor, limit
+    )), keys, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return workspaces
 
 @router.get("/{workspace_id}", response_model=WorkspaceResponse)
-def get_workspace(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def get_workspace(workspace_id: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    workspace = db.query(Workspace).filter(
+        Workspace.id == workspace_id,
+        Workspace.owner_id == user_id
+    ).first()
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    return workspace
+
+@router.patch("/{workspace_id}", response_model=WorkspaceResponse)
+def update_workspace(workspace_id: int, workspace_update: WorkspaceUpdate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
     ).first()
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
+    
+    changes = workspace_update.model_dump(exclude_unset=True)
+    if "working_hours" in changes:
+        check_working_hours(changes["working_hours"])
+    for field, value in changes.items():
+        # null resets working_hours to the default; other fields can't be cleared
+        if value is not None or field == "working_hours":
+            setattr(workspace, field, value)
+    db.commit()
+    response_cache.bump(workspace_id)
     return workspace
 
 @router.post("/{workspace_id}/activate")
-def activate_workspace(workspace_id: int, token: str, db: Session = Depends(get_db)):
-    user_id = get_current_user_id(token)
+def activate_workspace(workspace_id: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     workspace = db.query(Workspace).filter(
         Workspace.id == workspace_id,
         Workspace.owner_id == user_id
@@ -91,3 +113,63 @@ def activate_workspace(workspace_id: int, token: str, db: Session = Depends(get_
     workspace.is_active = True
     db.commit()
     return {"status": "activated", "message": "Workspace is now live!"}
+
+def owned_workspace(db: Session, workspace_id: int, user_id: int) -> Workspace:
+    workspace = db.query(Workspace).filter(
+        Workspace.id == workspace_id,
+        Workspace.owner_id == user_id
+    ).first()
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    return workspace
+
+# Workspace wording for outbound email/SMS. Rendering caches compiled templates,
+# so every write invalidates this process's entries; other workers pick the
+# change up within TEMPLATE_CACHE_TTL.
+
+@router.get("/{workspace_id}/templates", response_model=list[MessageTemplateResponse])
+def list_templates(workspace_id: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    owned_workspace(db, workspace_id, user_id)
+    return db.query(MessageTemplate).filter(
+        MessageTemplate.workspace_id == workspace_id
+    ).order_by(MessageTemplate.name, MessageTemplate.locale).all()
+
+@router.put("/{workspace_id}/templates/{name}", response_model=MessageTemplateResponse)
+def put_template(workspace_id: int, name: str, template: MessageTemplateUpdate, locale: str = DEFAULT_LOCALE,
+                 user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    owned_workspace(db, workspace_id, user_id)
+    try:
+        check_override(name, {"subject": template.subject, "html": template.html_body, "text": template.text_body})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    row = db.query(MessageTemplate).filter(
+        MessageTemplate.workspace_id == workspace_id,
+        MessageTemplate.name == name,
+        MessageTemplate.locale == locale
+    ).first()
+    if not row:
+        row = MessageTemplate(workspace_id=workspace_id, name=name, locale=locale)
+        db.add(row)
+    row.subject = template.subject
+    row.html_body = template.html_body
+    row.text_body = template.text_body
+    db.commit()
+    db.refresh(row)
+    template_registry.invalidate(workspace_id)
+    return row
+
+@router.delete("/{workspace_id}/templates/{name}")
+def delete_template(workspace_id: int, name: str, locale: str = DEFAULT_LOCALE,
+                    user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    owned_workspace(db, workspace_id, user_id)
+    deleted = db.query(MessageTemplate).filter(
+        MessageTemplate.workspace_id == workspace_id,
+        MessageTemplate.name == name,
+        MessageTemplate.locale == locale
+    ).delete(synchronize_session=False)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Template override not found")
+    db.commit()
+    template_registry.invalidate(workspace_id)
+    return {"status": "deleted", "message": f"{name} ({locale}) reverts to the default wording"}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
 
 # Auth Schemas
 class UserCreate(BaseModel):
@@ -37,12 +37,16 @@ class WorkspaceCreate(BaseModel):
     address: Optional[str] = None
     timezone: str = "UTC"
     contact_email: EmailStr
+    reminder_lead_minutes: int = 1440
+    working_hours: Optional[Dict[str, List[List[str]]]] = None  # {"mon": [["09:00", "17:00"]], ...}
 
 class WorkspaceUpdate(BaseModel):
     name: Optional[str] = None
     address: Optional[str] = None
     timezone: Optional[str] = None
     contact_email: Optional[EmailStr] = None
+    reminder_lead_minutes: Optional[int] = None
+    working_hours: Optional[Dict[str, List[List[str]]]] = None
 
 class WorkspaceResponse(BaseModel):
     id: int
@@ -50,12 +54,31 @@ class WorkspaceResponse(BaseModel):
     address: Optional[str]
     timezone: str
     contact_email: str
+    reminder_lead_minutes: Optional[int] = None
+    working_hours: Optional[Dict[str, List[List[str]]]] = None
     is_active: bool
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+# Message template overrides (wording per workspace; see app.integrations.templates)
+class MessageTemplateUpdate(BaseModel):
+    subject: Optional[str] = None
+    html_body: Optional[str] = None
+    text_body: Optional[str] = None
+
+class MessageTemplateResponse(BaseModel):
+    name: str
+    locale: str
+    subject: Optional[str]
+    html_body: Optional[str]
+    text_body: Optional[str]
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
 # Contact Schemas
 class ContactCreate(BaseModel):
     name: str
@@ -84,6 +107,7 @@ class BookingCreate(BaseModel):
 class BookingUpdate(BaseModel):
     status: str  # confirmed, completed, no_show, cancelled
     notes: Optional[str] = None
+    scheduled_at: Optional[datetime] = None
 
 class BookingResponse(BaseModel):
     id: int
@@ -98,6 +122,31 @@ class BookingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingConflict(BaseModel):
+    id: int
+    booking_type: str
+    scheduled_at: datetime
+    duration_minutes: int
+    location: Optional[str]
+    status: str
+    
+    class Config:
+        from_attributes = True
+
+class AvailabilitySlot(BaseModel):
+    start: datetime  # local time with offset
+    end: datetime
+
+class AvailabilityDay(BaseModel):
+    date: date
+    slots: List[AvailabilitySlot]
+
+class AvailabilityResponse(BaseModel):
+    timezone: str
+    slot_minutes: int
+    location: Optional[str]
+    days: List[AvailabilityDay]
+
 # Message Schemas
 class MessageCreate(BaseModel):
     content: str
@@ -127,6 +176,31 @@ class ConversationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ConversationSummary(BaseModel):
+    id: int
+    contact: ContactResponse
+    is_open: bool
+    last_message_preview: Optional[str]
+    last_message_at: Optional[datetime]
+    unread_count: int
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ConversationState(BaseModel):
+    id: int
+    contact_id: int
+    is_open: bool
+    last_message_preview: Optional[str]
+    last_message_at: Optional[datetime]
+    unread_count: int
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 # Form Schemas
 class FormCreate(BaseModel):
     name: str
@@ -174,6 +248,22 @@ class InventoryItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class InventoryForecastItem(BaseModel):
+    item_id: int
+    name: str
+    quantity: int
+    quantity_per_booking: int
+    low_threshold: Optional[int]
+    levels: List[int]
+    low_date: Optional[date]
+    stockout_date: Optional[date]
+
+class InventoryForecastResponse(BaseModel):
+    start_date: date
+    timezone: str
+    bookings_per_day: List[int]
+    items: List[InventoryForecastItem]
+
 # Dashboard Schemas
 class DashboardStats(BaseModel):
     today_bookings: int
@@ -187,4 +277,34 @@ class DashboardResponse(BaseModel):
     stats: DashboardStats
     alerts: List[dict]
     recent_bookings: List[BookingResponse]
-    recent_conversations: List[ConversationResponse]
+    recent_conversations: List[ConversationSummary]
+
+# Analytics Schemas
+class BookingAnalyticsPeriod(BaseModel):
+    start: date
+    bookings: int
+    completed: int
+    no_show: int
+    cancelled: int
+    cancellation_rate: Optional[float]
+    no_show_rate: Optional[float]
+
+class BookingAnalyticsResponse(BaseModel):
+    interval: str
+    as_of: Optional[datetime]
+    periods: List[BookingAnalyticsPeriod]
+    by_type: Dict[str, int]
+
+class FormAnalyticsPeriod(BaseModel):
+    start: date
+    completed: int
+    mean_latency_hours: Optional[float]
+    median_latency_hours: Optional[float]
+    p90_latency_hours: Optional[float]
+    latency_histogram: List[int]
+
+class FormAnalyticsResponse(BaseModel):
+    interval: str
+    as_of: Optional[datetime]
+    latency_buckets_hours: List[int]
+    periods: List[FormAnalyticsPeriod]
@@ -0,0 +1,321 @@
+"""
+Analytics Rollups - Daily booking and form aggregates for the analytics API
+
+Charts over months would otherwise scan `bookings` and `form_submissions`
+on the primary for every request. Instead a scheduler job keeps two
+rollup tables current and the analytics routes read only those:
+
+- booking_daily_rollups: bookings created per workspace-local day, by
+  booking_type and current status
+- form_daily_rollups: submissions completed per local day, with the sum
+  and a histogram of how long after the booking they came in
+
+Each source is processed from a (timestamp, id) watermark in
+`rollup_watermarks`: bookings by `updated_at`, so cancellations and
+no-shows marked later are picked up too, and submissions by
+`submitted_at`. Every batch collects the (workspace, local day) rollup
+rows the changed rows belong to and recomputes just those days from the
+raw table, so reprocessing is idempotent and a change can never be
+counted twice. The job stops ROLLUP_LAG_SECONDS short of now so that
+transactions still in flight when it runs aren't skipped over.
+"""
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import Booking, BookingDailyRollup, FormDailyRollup, FormSubmission, RollupWatermark, Workspace
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_INTERVAL = int(os.getenv("ROLLUP_INTERVAL", "300"))
+ROLLUP_BATCH = int(os.getenv("ROLLUP_BATCH", "5000"))
+ROLLUP_LAG_SECONDS = int(os.getenv("ROLLUP_LAG_SECONDS", "120"))
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "731"))
+
+# Upper edges of the form latency buckets; the last bucket is everything later
+LATENCY_BUCKETS_HOURS = (1, 4, 12, 24, 48, 72, 168, 336, 720)
+INTERVALS = ("day", "week", "month")
+
+DayKeys = Dict[int, Set[date]]
+
+
+def _zone(timezone_name: Optional[str]):
+    try:
+        return ZoneInfo(timezone_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _local_date(value: datetime, tz) -> date:
+    return value.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def _utc_midnight(day: date, tz) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Consecutive days as inclusive (first, last) runs"""
+    runs = []
+    for day in sorted(days):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+class AnalyticsRollupService:
+    # Rollup name -> (watermark timestamp, id, column whose local day keys the rollup row)
+    SOURCES = {
+        # Keyed by created day, which an update never changes
+        "bookings": (Booking.updated_at, Booking.id, Booking.created_at),
+        "form_submissions": (FormSubmission.submitted_at, FormSubmission.id, FormSubmission.submitted_at),
+    }
+
+    def run(self, db: Session) -> int:
+        """Scheduler job: bring both rollups up to now - ROLLUP_LAG_SECONDS; returns rows processed"""
+        upto = datetime.utcnow() - timedelta(seconds=ROLLUP_LAG_SECONDS)
+        processed = 0
+        for name in self.SOURCES:
+            while True:
+                count = self._batch(db, name, upto)
+                processed += count
+                if count < ROLLUP_BATCH:
+                    break
+        if processed:
+            logger.info(f"Analytics rollups: {processed} changed rows processed")
+        return processed
+
+    def _watermark(self, db: Session, name: str) -> RollupWatermark:
+        """The source's watermark row, locked for this batch"""
+        query = select(RollupWatermark).where(RollupWatermark.name == name).with_for_update()
+        row = db.scalar(query)
+        if row is None:
+            try:
+                db.add(RollupWatermark(name=name, last_id=0))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            row = db.scalar(query)
+        return row
+
+    def _batch(self, db: Session, name: str, upto: datetime) -> int:
+        mark = self._watermark(db, name)
+        column, id_column, day_column = self.SOURCES[name]
+        query = select(column, id_column, Booking.workspace_id, day_column).where(column.is_not(None), column <= upto)
+        if name == "form_submissions":
+            query = query.join(Booking, Booking.id == FormSubmission.booking_id)
+        if mark.watermark is not None:
+            query = query.where(or_(column > mark.watermark, and_(column == mark.watermark, id_column > mark.last_id)))
+        rows = db.execute(query.order_by(column, id_column).limit(ROLLUP_BATCH)).all()
+        if not rows:
+            db.rollback()
+            return 0
+
+        zones = {workspace_id: _zone(timezone_name) for workspace_id, timezone_name in db.execute(
+            select(Workspace.id, Workspace.timezone).where(Workspace.id.in_({row[2] for row in rows}))
+        )}
+        keys = self._keys([(workspace_id, value) for _, _, workspace_id, value in rows], zones)
+        store = self._store_bookings if name == "bookings" else self._store_forms
+        for workspace_id, days in keys.items():
+            store(db, workspace_id, zones[workspace_id], days)
+
+        mark.watermark, mark.last_id = rows[-1][0], rows[-1][1]
+        db.commit()
+        for workspace_id in keys:
+            response_cache.bump(workspace_id)
+        return len(rows)
+
+    def _keys(self, rows, zones) -> DayKeys:
+        keys: DayKeys = defaultdict(set)
+        for workspace_id, value in rows:
+            if workspace_id in zones and value is not None:
+                keys[workspace_id].add(_local_date(value, zones[workspace_id]))
+        return keys
+
+    def _store_bookings(self, db: Session, workspace_id: int, tz, days: Set[date]):
+        counts: Counter = Counter()
+        for first, last in _runs(days):
+            for created_at, booking_type, status in db.execute(
+                select(Booking.created_at, Booking.booking_type, Booking.status).where(
+                    Booking.workspace_id == workspace_id,
+                    Booking.created_at >= _utc_midnight(first, tz),
+                    Booking.created_at < _utc_midnight(last + timedelta(days=1), tz)
+                )
+            ):
+                counts[(_local_date(created_at, tz), booking_type or "", status or "")] += 1
+        db.execute(delete(BookingDailyRollup).where(
+            BookingDailyRollup.workspace_id == workspace_id, BookingDailyRollup.day.in_(sorted(days))
+        ))
+        if counts:
+            db.execute(insert(BookingDailyRollup), [
+                {"workspace_id": workspace_id, "day": day, "booking_type": booking_type, "status": status, "bookings": n}
+                for (day, booking_type, status), n in counts.items()
+            ])
+
+    def _store_forms(self, db: Session, workspace_id: int, tz, days: Set[date]):
+        latencies: Dict[date, List[float]] = defaultdict(list)
+        for first, last in _runs(days):
+            for submitted_at, created_at in db.execute(
+                select(FormSubmission.submitted_at, Booking.created_at)
+                .join(Booking, Booking.id == FormSubmission.booking_id)
+                .where(
+                    Booking.workspace_id == workspace_id,
+                    FormSubmission.submitted_at >= _utc_midnight(first, tz),
+                    FormSubmission.submitted_at < _utc_midnight(last + timedelta(days=1), tz)
+                )
+            ):
+                waited = (submitted_at - created_at).total_seconds() if created_at else 0.0
+                latencies[_local_date(submitted_at, tz)].append(max(waited, 0.0))
+        db.execute(delete(FormDailyRollup).where(
+            FormDailyRollup.workspace_id == workspace_id, FormDailyRollup.day.in_(sorted(days))
+        ))
+        if latencies:
+            edges = np.array(LATENCY_BUCKETS_HOURS) * 3600.0
+            db.execute(insert(FormDailyRollup), [
+                {"workspace_id": workspace_id, "day": day, "completed": len(values), "latency_seconds": float(sum(values)),
+                 "latency_histogram": np.bincount(np.searchsorted(edges, values), minlength=len(edges) + 1).tolist()}
+                for day, values in latencies.items()
+            ])
+
+    def as_of(self, db: Session, name: str) -> Optional[datetime]:
+        """Everything up to this time is in the rollup"""
+        return db.scalar(select(RollupWatermark.watermark).where(RollupWatermark.name == name))
+
+
+# Reading
+
+def check_range(date_from: date, date_to: date, interval: str):
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(INTERVALS)}")
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    if (date_to - date_from).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {ANALYTICS_MAX_DAYS} days per request")
+
+
+def period_starts(date_from: date, date_to: date, interval: str) -> List[date]:
+    """Start of every day/week (Monday)/month period overlapping [date_from, date_to]"""
+    if interval == "day":
+        return [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    if interval == "week":
+        start = date_from - timedelta(days=date_from.weekday())
+        return [start + timedelta(weeks=i) for i in range((date_to - start).days // 7 + 1)]
+    starts = []
+    month = date_from.replace(day=1)
+    while month <= date_to:
+        starts.append(month)
+        month = (month + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def _bin(days: Iterable[date], starts: List[date]) -> np.ndarray:
+    """Period index of each day"""
+    ordinals = np.fromiter((day.toordinal() for day in days), dtype=np.int64)
+    return np.searchsorted(np.array([start.toordinal() for start in starts]), ordinals, side="right") - 1
+
+
+def _rate(part: np.ndarray, whole: np.ndarray) -> List[Optional[float]]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.round(part / whole, 4)
+    return [None if whole[i] == 0 else float(rates[i]) for i in range(len(whole))]
+
+
+def bookings_series(db: Session, workspace_id: int, date_from: date, date_to: date, interval: str) -> dict:
+    """Bookings per period with cancellation and no-show rates, from booking_daily_rollups only"""
+    starts = period_starts(date_from, date_to, interval)
+    rows = db.execute(select(
+        BookingDailyRollup.day, BookingDailyRollup.booking_type, BookingDailyRollup.status, BookingDailyRollup.bookings
+    ).where(
+        BookingDailyRollup.workspace_id == workspace_id,
+        BookingDailyRollup.day >= date_from,
+        BookingDailyRollup.day <= date_to
+    )).all()
+
+    counts = {key: np.zeros(len(starts), dtype=np.int64) for key in ("bookings", "completed", "no_show", "cancelled")}
+    by_type: Counter = Counter()
+    if rows:
+        days, types, statuses, bookings = zip(*rows)
+        index = _bin(days, starts)
+        bookings = np.array(bookings, dtype=np.int64)
+        statuses = np.array(statuses)
+        np.add.at(counts["bookings"], index, bookings)
+        for status in ("completed", "no_show", "cancelled"):
+            mask = statuses == status
+            np.add.at(counts[status], index[mask], bookings[mask])
+        for booking_type, n in zip(types, bookings.tolist()):
+            by_type[booking_type or "other"] += n
+
+    # No-show rate is over bookings whose outcome is known
+    cancellation = _rate(counts["cancelled"], counts["bookings"])
+    no_show = _rate(counts["no_show"], counts["completed"] + counts["no_show"])
+    return {
+        "interval": interval,
+        "periods": [
+            {"start": start, **{key: int(values[i]) for key, values in counts.items()},
+             "cancellation_rate": cancellation[i], "no_show_rate": no_show[i]}
+            for i, start in enumerate(starts)
+        ],
+        "by_type": dict(by_type),
+    }
+
+
+def _percentile(histogram: np.ndarray, q: float) -> Optional[float]:
+    """Upper edge (hours) of the bucket holding the q-th fraction; None past the last edge"""
+    total = histogram.sum()
+    if not total:
+        return None
+    bucket = int(np.searchsorted(np.cumsum(histogram), q * total))
+    return float(LATENCY_BUCKETS_HOURS[bucket]) if bucket < len(LATENCY_BUCKETS_HOURS) else None
+
+
+def forms_series(db: Session, workspace_id: int, date_from: date, date_to: date, interval: str) -> dict:
+    """Form completions per period with latency from booking to submission, from form_daily_rollups only"""
+    starts = period_starts(date_from, date_to, interval)
+    rows = db.execute(select(
+        FormDailyRollup.day, FormDailyRollup.completed, FormDailyRollup.latency_seconds, FormDailyRollup.latency_histogram
+    ).where(
+        FormDailyRollup.workspace_id == workspace_id,
+        FormDailyRollup.day >= date_from,
+        FormDailyRollup.day <= date_to
+    )).all()
+
+    completed = np.zeros(len(starts), dtype=np.int64)
+    latency = np.zeros(len(starts))
+    histograms = np.zeros((len(starts), len(LATENCY_BUCKETS_HOURS) + 1), dtype=np.int64)
+    if rows:
+        days, counts, seconds, day_histograms = zip(*rows)
+        index = _bin(days, starts)
+        np.add.at(completed, index, counts)
+        np.add.at(latency, index, seconds)
+        np.add.at(histograms, index, np.array([h or [0] * histograms.shape[1] for h in day_histograms], dtype=np.int64))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_hours = latency / completed / 3600
+    return {
+        "interval": interval,
+        "latency_buckets_hours": list(LATENCY_BUCKETS_HOURS),
+        "periods": [
+            {"start": start, "completed": int(completed[i]),
+             "mean_latency_hours": round(float(mean_hours[i]), 2) if completed[i] else None,
+             "median_latency_hours": _percentile(histograms[i], 0.5),
+             "p90_latency_hours": _percentile(histograms[i], 0.9),
+             "latency_histogram": histograms[i].tolist()}
+            for i, start in enumerate(starts)
+        ],
+    }
+
+
+# Singleton instance
+analytics_rollups = AnalyticsRollupService()
@@ -1,15 +1,36 @@
 """
 Automation Service - Handles event-driven automation rules
 """
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from app.models.models import Booking, Contact, Message, Conversation, FormSubmission, InventoryItem
+from app.models.models import Booking, Contact, Message, Conversation, Form, FormSubmission, InventoryItem
 from app.integrations.email_service import email_service
-from app.integrations.sms_service import sms_service
+from app.services import outbox_service
+from app.services.notification_coalescer import enqueue_form_reminders, notification_coalescer
+from app.services.notification_dispatcher import notification_dispatcher
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
+from itertools import groupby
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", "1000"))
+
+@dataclass
+class ReminderRunStats:
+    rows_scanned: int = 0
+    recipients: int = 0
+    emails_queued: int = 0
+    sms_queued: int = 0
+    failures: int = 0
+    duration_ms: float = 0.0
+    
+    def as_dict(self) -> dict:
+        return asdict(self)
+
 class AutomationService:
     
     @staticmethod
@@ -22,24 +43,20 @@ class AutomationService:
         """
         try:
             # Send forms that are linked to this booking type
-            forms = db.query(FormSubmission).filter(
-                FormSubmission.status == "pending",
-                FormSubmission.booking_id == booking.id
+            forms = db.execute(
+                select(FormSubmission.form_id, Form.name)
+                .outerjoin(Form, Form.id == FormSubmission.form_id)
+                .where(
+                    FormSubmission.status == "pending",
+                    FormSubmission.booking_id == booking.id
+                )
             ).all()
             
-            for form in forms:
-                # Send form reminder email
-                try:
-                    email_service.send_form_reminder(contact.email, f"Form: {form.form_id}")
-                except Exception as e:
-                    logger.error(f"Form reminder email failed: {e}")
-                
-                # Send SMS if phone exists
-                if contact.phone:
-                    try:
-                        sms_service.send_form_reminder(contact.phone, f"Form {form.form_id}")
-                    except Exception as e:
-                        logger.error(f"Form reminder SMS failed: {e}")
+            # Reminders within the coalescing window (e.g. back-to-back bookings) go out as one digest
+            for form_id, name in forms:
+                item = (form_id, name or f"Form {form_id}")
+                notification_coalescer.add("email", contact.email, item)
+                notification_coalescer.add("sms", contact.phone, item)
         except Exception as e:
             logger.error(f"Error in on_booking_created automation: {e}")
     
@@ -73,7 +90,7 @@ class AutomationService:
         """
         Triggered when a form becomes overdue
         - Send reminder email
-        - Send reminder SMS if available
+        - Send reminder SMS if available (via the outbox, so a throttled send is retried)
         - Create alert message
         """
         try:
@@ -82,7 +99,10 @@ class AutomationService:
             
             # Send reminder SMS
             if contact.phone:
-                sms_service.send_form_reminder(contact.phone, f"Overdue form {form_submission.form_id}")
+                row = outbox_service.enqueue(db, "sms.form_reminder", contact.phone,
+                                             {"form_name": f"Overdue form {form_submission.form_id}"})
+                db.commit()
+                notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, [row.id])
         except Exception as e:
             logger.error(f"Error in on_form_overdue automation: {e}")
     
@@ -91,55 +111,131 @@ class AutomationService:
         """
         Triggered when inventory falls below threshold
         - Send email alert to workspace owner
-        - Send SMS alert to workspace owner
+        - Send SMS alert to workspace owner (via the outbox, so a throttled send is retried)
         - Create dashboard alert
         """
         try:
             owner = workspace.owner
             if owner and owner.email:
-                email_service.send_email(
-                    owner.email,
-                    f"Low Inventory Alert: {item.name}",
-                    f"<h2>Low Inventory Alert</h2><p>{item.name} is at {item.quantity} units (threshold: {item.low_threshold})</p>"
-                )
+                email_service.send_inventory_alert(owner.email, item.name, item.quantity, item.low_threshold, workspace.id)
             
             # SMS alert if owner has phone
             if owner and owner.phone_number:
-                sms_service.send_inventory_alert(owner.phone_number, item.name, item.quantity)
+                row = outbox_service.enqueue(db, "sms.inventory_alert", owner.phone_number,
+                                             {"item_name": item.name, "quantity": item.quantity}, workspace.id)
+                db.commit()
+                notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, [row.id])
         except Exception as e:
             logger.error(f"Error in on_inventory_low automation: {e}")
     
     @staticmethod
-    def check_and_trigger_reminders(db: Session):
+    def check_and_trigger_reminders(db: Session) -> ReminderRunStats:
         """
         Periodic task - check for pending reminders and trigger them
         Should be run via a scheduler (APScheduler or Celery)
+        
+        Claims due submissions by stamping reminded_at in one UPDATE, then
+        streams the claimed rows joined to their booking and contact in
+        chunks of REMINDER_CHUNK_SIZE, ordered by contact so rows arrive
+        grouped by recipient. Each recipient gets one outbox row per channel
+        (a digest when several forms are due), minus forms already reminded
+        within the dedupe TTL. The claim and the outbox rows commit together,
+        so a form is reminded once however often the job runs and a failed
+        send is retried by the outbox rather than lost. Returns the run's stats.
         """
+        stats = ReminderRunStats()
+        started = time.perf_counter()
+        outbox_ids = []
+        claimed_keys = []
         try:
-            # Check for forms that are due soon
-            tomorrow = datetime.utcnow() + timedelta(days=1)
-            forms_due_soon = db.query(FormSubmission).filter(
-                FormSubmission.status == "pending",
-                FormSubmission.due_at <= tomorrow,
-                FormSubmission.due_at > datetime.utcnow()
-            ).all()
+            now = datetime.utcnow()
+            tomorrow = now + timedelta(days=1)
+            claimed = db.execute(
+                update(FormSubmission)
+                .where(
+                    FormSubmission.status == "pending",
+                    FormSubmission.reminded_at.is_(None),
+                    FormSubmission.due_at <= tomorrow,
+                    FormSubmission.due_at > now
+                )
+                .values(reminded_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                db.commit()
+                stats.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                return stats
+            rows = db.execute(
+                select(
+                    Contact.id,
+                    Contact.email,
+                    Contact.phone,
+                    Booking.workspace_id,
+                    FormSubmission.form_id,
+                    Form.name
+                )
+                .select_from(FormSubmission)
+                .join(Booking, Booking.id == FormSubmission.booking_id)
+                .join(Contact, Contact.id == Booking.contact_id)
+                .outerjoin(Form, Form.id == FormSubmission.form_id)
+                .where(
+                    FormSubmission.status == "pending",
+                    FormSubmission.due_at <= tomorrow,
+                    FormSubmission.due_at > now,
+                    FormSubmission.reminded_at == now
+                )
+                .order_by(Contact.id, FormSubmission.id)
+                .execution_options(yield_per=REMINDER_CHUNK_SIZE)
+            )
             
-            for form in forms_due_soon:
-                # Get contact info
-                booking = db.query(Booking).filter(Booking.id == form.booking_id).first()
-                if booking:
-                    contact = db.query(Contact).filter(Contact.id == booking.contact_id).first()
-                    if contact:
-                        try:
-                            email_service.send_form_reminder(contact.email, f"Form {form.form_id}")
-                            if contact.phone:
-                                sms_service.send_form_reminder(contact.phone, f"Form {form.form_id}")
-                        except Exception as e:
-                            logger.error(f"Reminder trigger failed: {e}")
+            pending = []
+            for contact_id, group in groupby(rows, key=lambda row: row[0]):
+                group = list(group)
+                stats.rows_scanned += len(group)
+                stats.recipients += 1
+                _, email, phone, workspace_id, _, _ = group[0]
+                forms = [(form_id, name or f"Form {form_id}") for _, _, _, _, form_id, name in group]
+                
+                for channel, recipient in (("email", email), ("sms", phone)):
+                    if not recipient:
+                        continue
+                    items = notification_coalescer.claim(channel, recipient, forms)
+                    if not items:
+                        continue
+                    claimed_keys.append((channel, recipient, items))
+                    pending.append(enqueue_form_reminders(db, channel, recipient, [name for _, name in items], workspace_id))
+                    if channel == "email":
+                        stats.emails_queued += 1
+                    else:
+                        stats.sms_queued += 1
+                
+                # Flush in chunks so the session never holds a whole run's rows
+                if len(pending) >= REMINDER_CHUNK_SIZE:
+                    db.flush()
+                    outbox_ids.extend(row.id for row in pending)
+                    pending = []
             
-            logger.info(f"Triggered {len(forms_due_soon)} form reminders")
+            db.flush()
+            outbox_ids.extend(row.id for row in pending)
+            db.commit()
         except Exception as e:
+            db.rollback()
+            outbox_ids = []
+            stats.failures += 1
             logger.error(f"Error in check_and_trigger_reminders: {e}")
+            # Nothing was queued: give the forms back so the next run is not deduped
+            for channel, recipient, items in claimed_keys:
+                notification_coalescer.release(channel, recipient, items)
+        
+        # Deliver right away; anything the fast path misses is picked up by the outbox relay
+        for i in range(0, len(outbox_ids), outbox_service.OUTBOX_BATCH_SIZE):
+            notification_dispatcher.submit(
+                "outbox_relay", outbox_service.deliver_ids, outbox_ids[i:i + outbox_service.OUTBOX_BATCH_SIZE]
+            )
+        
+        stats.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Form reminder run: {stats.as_dict()}")
+        return stats
 
 # Singleton instance
 automation_service = AutomationService()
@@ -0,0 +1,260 @@
+"""
+Availability - Free booking slots from working hours and existing bookings
+
+A workspace's working hours are local times per weekday, e.g.
+
+    {"mon": [["09:00", "12:00"], ["13:00", "17:00"]], "tue": [["09:00", "17:00"]], ...}
+
+(missing days are closed; no setting means DEFAULT_WORKING_HOURS), read
+in `Workspace.timezone` so DST shifts are handled per day. For each day
+the windows are swept once against that day's active bookings, sorted by
+start, and every slot-sized gap on the window's slot grid is free.
+
+Bookings for the whole requested range come from one indexed range query.
+Computed days are cached per (workspace, local day) and the booking routes
+invalidate the days a create/update touches. The cache is per process, so
+other workers see a change after AVAILABILITY_CACHE_TTL at the latest; a
+slot that was taken meanwhile is still refused by the booking conflict
+check.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Booking
+from app.services.booking_conflicts import BOOKING_MAX_DURATION_MINUTES, booking_end
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", "4096"))
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "300"))
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", "62"))
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEFAULT_WORKING_HOURS = {day: [["09:00", "17:00"]] for day in WEEKDAYS[:5]}
+
+Interval = Tuple[datetime, datetime]
+
+
+def _zone(timezone_name: Optional[str]):
+    try:
+        return ZoneInfo(timezone_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _clock(value: str) -> dtime:
+    if value == "24:00":
+        return dtime.max
+    return dtime.fromisoformat(value)
+
+
+def check_working_hours(working_hours: Optional[dict]) -> Optional[dict]:
+    """Validate a working hours setting; 400 if it isn't usable"""
+    if working_hours is None:
+        return None
+    try:
+        for day, windows in working_hours.items():
+            if day not in WEEKDAYS:
+                raise ValueError(f"unknown day {day!r}")
+            previous_end = dtime.min
+            for start, end in sorted(windows):
+                if not previous_end <= _clock(start) < _clock(end):
+                    raise ValueError(f"{day}: windows must be start < end and not overlap")
+                previous_end = _clock(end)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid working_hours: {e}")
+    return working_hours
+
+
+def working_windows(working_hours: Optional[dict], tz, day: date) -> List[Interval]:
+    """The day's working windows as naive UTC intervals, in order"""
+    windows = []
+    for start, end in sorted((working_hours or DEFAULT_WORKING_HOURS).get(WEEKDAYS[day.weekday()], [])):
+        end_clock = _clock(end)
+        local_end = (datetime.combine(day + timedelta(days=1), dtime.min) if end_clock == dtime.max
+                     else datetime.combine(day, end_clock))
+        windows.append(tuple(
+            local.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+            for local in (datetime.combine(day, _clock(start)), local_end)
+        ))
+    return windows
+
+
+def free_slots(windows: Sequence[Interval], busy: Sequence[Interval], slot: timedelta) -> List[Interval]:
+    """
+    One pass over windows and busy intervals (both sorted by start): every
+    slot on each window's grid that fits between bookings
+    """
+    slots = []
+    i = 0
+    for window_start, window_end in windows:
+        # Intervals that ended before this window can't matter to any later one
+        while i < len(busy) and busy[i][1] <= window_start:
+            i += 1
+        cursor = window_start
+        j = i
+        while cursor < window_end:
+            gap_end = busy[j][0] if j < len(busy) and busy[j][0] < window_end else window_end
+            # First grid point at or after the cursor
+            steps = -((window_start - cursor) // slot)
+            start = window_start + steps * slot
+            while start + slot <= gap_end:
+                slots.append((start, start + slot))
+                start += slot
+            if gap_end == window_end:
+                break
+            cursor = max(cursor, busy[j][1])
+            j += 1
+    return slots
+
+
+class AvailabilityCache:
+    """Per-process LRU of computed days, keyed by (workspace, local day)"""
+
+    def __init__(self, max_size: int = AVAILABILITY_CACHE_SIZE, ttl: float = AVAILABILITY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._days: "OrderedDict[Tuple[int, date], Tuple[float, Dict[tuple, list]]]" = OrderedDict()
+        # Bumped on every invalidation; a result computed across one isn't stored
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def generation(self, workspace_id: int) -> int:
+        return self._generations.get(workspace_id, 0)
+
+    def get(self, workspace_id: int, day: date, variant: tuple) -> Optional[list]:
+        with self._lock:
+            entry = self._days.get((workspace_id, day))
+            if entry is None or entry[0] <= time.monotonic() or variant not in entry[1]:
+                self.stats["misses"] += 1
+                return None
+            self._days.move_to_end((workspace_id, day))
+            self.stats["hits"] += 1
+            return entry[1][variant]
+
+    def put(self, workspace_id: int, day: date, variant: tuple, slots: list, generation: int):
+        with self._lock:
+            if self._generations.get(workspace_id, 0) != generation:
+                return
+            key = (workspace_id, day)
+            entry = self._days.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                entry = (time.monotonic() + self.ttl, {})
+                self._days[key] = entry
+            entry[1][variant] = slots
+            self._days.move_to_end(key)
+            while len(self._days) > self.max_size:
+                self._days.popitem(last=False)
+
+    def invalidate(self, workspace_id: int, days: Sequence[date]):
+        with self._lock:
+            self._generations[workspace_id] = self._generations.get(workspace_id, 0) + 1
+            for day in days:
+                self._days.pop((workspace_id, day), None)
+            self.stats["invalidations"] += 1
+
+    def status(self) -> Dict[str, int]:
+        return {"days": len(self._days), **self.stats}
+
+
+class AvailabilityService:
+    def __init__(self, cache: Optional[AvailabilityCache] = None):
+        self.cache = cache or AvailabilityCache()
+
+    async def free_slots(self, db: AsyncSession, workspace, date_from: date, date_to: date, slot_minutes: int,
+                         location: Optional[str] = None) -> Dict[date, List[Interval]]:
+        """
+        Free slots per local day, as naive UTC intervals. With a location
+        only bookings there block a slot; without, every active booking
+        in the workspace does
+        """
+        days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+        tz = _zone(workspace.timezone)
+        slot = timedelta(minutes=slot_minutes)
+        # Settings are part of the key, so changing them needs no invalidation
+        settings = json.dumps([workspace.timezone, workspace.working_hours], sort_keys=True)
+        variant = (location, slot_minutes, hashlib.blake2b(settings.encode(), digest_size=8).hexdigest())
+
+        result = {day: self.cache.get(workspace.id, day, variant) for day in days}
+        missing = [day for day, slots in result.items() if slots is None]
+        if not missing:
+            return result
+
+        generation = self.cache.generation(workspace.id)
+        windows = {day: working_windows(workspace.working_hours, tz, day) for day in missing}
+        bounds = [interval for day in missing for interval in windows[day]]
+        busy: List[Interval] = []
+        if bounds:
+            busy = await self._busy(db, workspace.id, location, min(s for s, _ in bounds), max(e for _, e in bounds))
+        starts = [start for start, _ in busy]
+        max_duration = timedelta(minutes=BOOKING_MAX_DURATION_MINUTES)
+        for day in missing:
+            day_windows = windows[day]
+            if day_windows:
+                # Only bookings that can reach into this day's windows
+                low = bisect.bisect_right(starts, day_windows[0][0] - max_duration)
+                high = bisect.bisect_left(starts, day_windows[-1][1])
+                slots = free_slots(day_windows, busy[low:high], slot)
+            else:
+                slots = []
+            result[day] = slots
+            self.cache.put(workspace.id, day, variant, slots, generation)
+        return result
+
+    async def _busy(self, db: AsyncSession, workspace_id: int, location: Optional[str],
+                    start: datetime, end: datetime) -> List[Interval]:
+        query = select(Booking.scheduled_at, Booking.duration_minutes).where(
+            Booking.workspace_id == workspace_id,
+            Booking.scheduled_at < end,
+            Booking.scheduled_at > start - timedelta(minutes=BOOKING_MAX_DURATION_MINUTES),
+            Booking.status != "cancelled"
+        ).order_by(Booking.scheduled_at)
+        if location:
+            query = query.where(Booking.location == location)
+        rows = await db.execute(query)
+        return [(scheduled_at, booking_end(scheduled_at, duration)) for scheduled_at, duration in rows]
+
+    def zone(self, workspace):
+        return _zone(workspace.timezone)
+
+    def invalidate(self, workspace, *slots: Tuple[Optional[datetime], Optional[int]]):
+        """Drop cached days touched by the given (scheduled_at, duration_minutes) slots"""
+        tz = _zone(workspace.timezone)
+        days = set()
+        for scheduled_at, duration_minutes in slots:
+            if scheduled_at is None:
+                continue
+            start = scheduled_at if scheduled_at.tzinfo else scheduled_at.replace(tzinfo=timezone.utc)
+            end = booking_end(start, duration_minutes)
+            day, last = start.astimezone(tz).date(), end.astimezone(tz).date()
+            while day <= last:
+                days.add(day)
+                day += timedelta(days=1)
+        self.cache.invalidate(workspace.id, sorted(days))
+
+
+def check_range(date_from: date, date_to: date, slot_minutes: int):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {AVAILABILITY_MAX_DAYS} days per request")
+    if not 5 <= slot_minutes <= 24 * 60:
+        raise HTTPException(status_code=400, detail="slot_minutes must be between 5 and 1440")
+
+
+# Singleton instance
+availability = AvailabilityService()
@@ -0,0 +1,90 @@
+"""
+Booking Conflicts - Overlap detection per workspace and location
+
+Two active (not cancelled, completed or no-show) bookings at the same
+location may not overlap.
+Bookings without a location (online) don't hold a shared resource and are
+never in conflict.
+
+A booking overlapping [start, end) has to start before `end`, and since no
+booking is longer than BOOKING_MAX_DURATION_MINUTES it has to start after
+`start - BOOKING_MAX_DURATION_MINUTES`. That bounded window is a range scan
+on (workspace_id, location, scheduled_at), so a check costs an index
+descent plus the few bookings near the requested time, however many
+bookings the workspace has. The exact overlap test runs on those
+candidates.
+
+The check and the insert are separate statements, so on PostgreSQL the
+exclusion constraint on bookings (see app.models.models) is what stops two
+concurrent requests from both passing; `is_overlap_violation` recognises
+its error so routes can answer 409 either way.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import BOOKING_INACTIVE_STATUSES, BOOKING_OVERLAP_CONSTRAINT, Booking
+from app.schemas.schemas import BookingConflict
+from app.services.timeutil import naive_utc
+
+logger = logging.getLogger(__name__)
+
+BOOKING_MAX_DURATION_MINUTES = int(os.getenv("BOOKING_MAX_DURATION_MINUTES", "1440"))
+
+
+def booking_end(scheduled_at: datetime, duration_minutes: Optional[int]) -> datetime:
+    return scheduled_at + timedelta(minutes=duration_minutes or 60)
+
+
+def check_duration(duration_minutes: int):
+    if not 0 < duration_minutes <= BOOKING_MAX_DURATION_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"duration_minutes must be between 1 and {BOOKING_MAX_DURATION_MINUTES}"
+        )
+
+
+def conflicts_query(workspace_id: int, location: str, start: datetime, end: datetime,
+                    exclude_id: Optional[int] = None) -> Select:
+    """Candidate bookings for [start, end): the bounded window described above"""
+    query = select(Booking).where(
+        Booking.workspace_id == workspace_id,
+        Booking.location == location,
+        Booking.scheduled_at < end,
+        Booking.scheduled_at > start - timedelta(minutes=BOOKING_MAX_DURATION_MINUTES),
+        Booking.status.notin_(BOOKING_INACTIVE_STATUSES)
+    ).order_by(Booking.scheduled_at)
+    if exclude_id is not None:
+        query = query.where(Booking.id != exclude_id)
+    return query
+
+
+async def find_conflicts(db: AsyncSession, workspace_id: int, location: Optional[str], scheduled_at: datetime,
+                         duration_minutes: Optional[int], exclude_id: Optional[int] = None) -> List[Booking]:
+    """Active bookings at `location` overlapping the given slot"""
+    if not location:
+        return []
+    start = naive_utc(scheduled_at)
+    end = booking_end(start, duration_minutes)
+    candidates = await db.scalars(conflicts_query(workspace_id, location, start, end, exclude_id))
+    return [
+        booking for booking in candidates
+        if booking_end(booking.scheduled_at, booking.duration_minutes) > start
+    ]
+
+
+def conflict_error(conflicts: List[Booking]) -> HTTPException:
+    return HTTPException(status_code=409, detail={
+        "message": "Booking overlaps existing bookings at this location",
+        "conflicts": [BookingConflict.model_validate(booking).model_dump(mode="json") for booking in conflicts],
+    })
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    return BOOKING_OVERLAP_CONSTRAINT in str(error.orig)
@@ -0,0 +1,77 @@
+"""
+Conversation Summary - Inbox summary columns maintained on write
+
+Each conversation row carries what the inbox list shows: when the last
+message arrived, a preview of it and how many customer messages came in
+since staff last opened the conversation. A session `after_flush` hook
+updates them from every flushed new Message, in the same transaction, so
+listing the inbox never touches the messages table. Opening a
+conversation's messages resets the unread count (`mark_read`).
+"""
+import logging
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_PREVIEW_LENGTH = 120
+
+
+def preview(content) -> str:
+    return (content or "")[:CONVERSATION_PREVIEW_LENGTH]
+
+
+def _apply_summaries(session: Session, flush_context):
+    latest: Dict[int, Dict[str, object]] = {}
+    unread = Counter()
+    for obj in session.new:
+        if not isinstance(obj, Message):
+            continue
+        values = inspect(obj).dict
+        conversation_id = values.get("conversation_id")
+        if conversation_id is None:
+            continue
+        current = latest.get(conversation_id)
+        if current is None or (values["created_at"], values["id"]) > (current["created_at"], current["id"]):
+            latest[conversation_id] = values
+        if values.get("sender_type") == "customer":
+            unread[conversation_id] += 1
+    if not latest:
+        return
+
+    conn = session.connection()
+    mapper = inspect(Conversation)
+    for conversation_id, message in latest.items():
+        summary = {
+            "last_message_at": message["created_at"],
+            "last_message_preview": preview(message.get("content")),
+            "updated_at": message["created_at"],
+        }
+        unread_count = conn.execute(
+            update(Conversation).where(Conversation.id == conversation_id).values(
+                unread_count=Conversation.unread_count + unread[conversation_id], **summary
+            ).returning(Conversation.unread_count)
+        ).scalar()
+        # Keep a loaded conversation in step without a refresh
+        conversation = session.identity_map.get(mapper.identity_key_from_primary_key((conversation_id,)))
+        if conversation is not None and unread_count is not None:
+            for key, value in {**summary, "unread_count": unread_count}.items():
+                set_committed_value(conversation, key, value)
+
+
+event.listen(Session, "after_flush", _apply_summaries)
+
+
+def mark_read(session: Session, conversation_id: int) -> bool:
+    """Reset the unread count; True if there was anything unread (caller commits)"""
+    result = session.execute(
+        update(Conversation).where(Conversation.id == conversation_id, Conversation.unread_count > 0)
+        .values(unread_count=0)
+    )
+    return result.rowcount > 0
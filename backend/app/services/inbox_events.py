@@ -0,0 +1,251 @@
+"""
+Inbox Events - Push channel for inbox changes
+
+Routes publish an event after they commit a change staff would otherwise
+poll for (a new message, a new conversation, a conversation marked read),
+and every inbox stream open on that workspace - WebSocket or SSE - gets it
+pushed. Events are small JSON objects:
+
+    {"type": "message.created", "conversation": {...}, "message": {...}}
+    {"type": "conversation.created", "conversation": {...}, "contact": {...}}
+    {"type": "conversation.updated", "conversation": {...}}
+    {"type": "resync"}  - events were dropped; refetch the inbox
+
+Fan-out to the streams is in-process. The broker decides which processes
+see an event: by default only the one that published it, so with
+WEB_CONCURRENCY > 1 set INBOX_EVENTS_URL (redis://...) to relay events
+through Redis pub/sub to every worker. Without it a multi-worker server
+refuses streams (`available` is false) and clients poll instead, since a
+stream would miss most events. Delivery is best effort; clients refetch
+the conversation list when they (re)connect.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.database import WEB_CONCURRENCY
+from app.schemas.schemas import ContactResponse, ConversationState, MessageResponse
+
+logger = logging.getLogger(__name__)
+
+INBOX_EVENTS_URL = os.getenv("INBOX_EVENTS_URL", "")
+INBOX_EVENTS_QUEUE_SIZE = int(os.getenv("INBOX_EVENTS_QUEUE_SIZE", "100"))
+INBOX_EVENTS_HEARTBEAT = float(os.getenv("INBOX_EVENTS_HEARTBEAT", "25"))
+
+RESYNC = json.dumps({"type": "resync"})
+HEARTBEAT = json.dumps({"type": "ping"})
+CLOSED = None
+
+
+class Subscription:
+    """One open stream: a bounded queue of encoded events"""
+
+    def __init__(self, workspace_id: int, max_size: int = INBOX_EVENTS_QUEUE_SIZE):
+        self.workspace_id = workspace_id
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        self.resyncs = 0
+
+    def deliver(self, event: Optional[str]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client can't keep up: drop its backlog and have it refetch instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSED if event is CLOSED else RESYNC)
+            self.resyncs += 1
+
+    async def next(self, heartbeat: float = INBOX_EVENTS_HEARTBEAT) -> Optional[str]:
+        """The next event, HEARTBEAT if none arrived in time, CLOSED on shutdown"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            return HEARTBEAT
+
+
+class MemoryBroker:
+    """Single process: publishing is local fan-out"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[int, str], None]] = None
+
+    def attach(self, deliver: Callable[[int, str], None]):
+        self._deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, workspace_id: int, event: str):
+        self._deliver(workspace_id, event)
+
+
+class RedisBroker:
+    """
+    Cross-worker: events are PUBLISHed to careops:inbox:<workspace_id> and
+    every process fans out what its pattern subscription receives,
+    including its own events
+    """
+
+    def __init__(self, url: str, prefix: str = "careops:inbox:"):
+        import redis.asyncio as redis  # only needed when INBOX_EVENTS_URL is set
+
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._deliver: Optional[Callable[[int, str], None]] = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, deliver: Callable[[int, str], None]):
+        self._deliver = deliver
+
+    async def start(self):
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.psubscribe(f"{self.prefix}*")
+        self._task = asyncio.create_task(self._listen(), name="inbox-events-listener")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub:
+            await self._pubsub.close()
+        await self._client.close()
+
+    async def publish(self, workspace_id: int, event: str):
+        await self._client.publish(f"{self.prefix}{workspace_id}", event)
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    workspace_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                    self._deliver(workspace_id, message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py resubscribes when the connection comes back
+                logger.warning(f"Inbox event listener error: {e}")
+                await asyncio.sleep(1)
+
+
+def _dump(schema, value) -> Dict[str, Any]:
+    return schema.model_validate(value).model_dump(mode="json")
+
+
+class InboxEvents:
+    """
+    Usage in a stream route:
+
+        async with inbox_events.subscribe(workspace_id) as subscription:
+            while (event := await subscription.next()) is not CLOSED:
+                ...send event...
+
+    and `await inbox_events.message_created(...)` etc. after the commit
+    that wrote the change. Publish errors are logged, never raised.
+    """
+
+    def __init__(self, broker=None, queue_size: int = INBOX_EVENTS_QUEUE_SIZE):
+        self.broker = broker or MemoryBroker()
+        self.broker.attach(self._fan_out)
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self.stats = {"published": 0, "delivered": 0, "errors": 0}
+
+    async def start(self):
+        try:
+            await self.broker.start()
+        except Exception as e:
+            logger.error(f"Inbox event broker failed to start ({e}); events stay in-process")
+            self.broker = MemoryBroker()
+            self.broker.attach(self._fan_out)
+
+    async def stop(self):
+        # End open streams so they don't hold up shutdown
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.deliver(CLOSED)
+        await self.broker.stop()
+
+    @property
+    def available(self) -> bool:
+        """Whether a stream here sees every worker's events"""
+        return WEB_CONCURRENCY == 1 or not isinstance(self.broker, MemoryBroker)
+
+    @asynccontextmanager
+    async def subscribe(self, workspace_id: int):
+        subscription = Subscription(workspace_id, self.queue_size)
+        self._subscribers[workspace_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscribers.get(workspace_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[workspace_id]
+
+    async def publish(self, workspace_id: int, event_type: str, **data):
+        """Call after the change has been committed"""
+        event = json.dumps({"type": event_type, **data})
+        try:
+            await self.broker.publish(workspace_id, event)
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Inbox event publish failed for workspace {workspace_id}: {e}")
+
+    async def message_created(self, workspace_id: int, conversation, message):
+        await self.publish(workspace_id, "message.created",
+                           conversation=_dump(ConversationState, conversation),
+                           message=_dump(MessageResponse, message))
+
+    async def conversation_created(self, workspace_id: int, conversation, contact):
+        await self.publish(workspace_id, "conversation.created",
+                           conversation=_dump(ConversationState, conversation),
+                           contact=_dump(ContactResponse, contact))
+
+    async def conversation_updated(self, workspace_id: int, conversation):
+        await self.publish(workspace_id, "conversation.updated",
+                           conversation=_dump(ConversationState, conversation))
+
+    def _fan_out(self, workspace_id: int, event: str):
+        for subscription in list(self._subscribers.get(workspace_id, ())):
+            subscription.deliver(event)
+            self.stats["delivered"] += 1
+
+    def status(self) -> Dict[str, Any]:
+        subscriptions = [s for subs in self._subscribers.values() for s in subs]
+        return {
+            "broker": type(self.broker).__name__,
+            "available": self.available,
+            "workspaces": len(self._subscribers),
+            "subscriptions": len(subscriptions),
+            "resyncs": sum(s.resyncs for s in subscriptions),
+            **self.stats,
+        }
+
+
+def _default_broker():
+    if INBOX_EVENTS_URL:
+        try:
+            return RedisBroker(INBOX_EVENTS_URL)
+        except Exception as e:
+            logger.error(f"Shared inbox event broker unavailable ({e}); events stay in-process")
+    return MemoryBroker()
+
+
+# Singleton instance
+inbox_events = InboxEvents(_default_broker())
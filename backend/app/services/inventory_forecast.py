@@ -0,0 +1,146 @@
+"""
+Inventory Forecast - Day-by-day stock projection from the booking schedule
+
+A booking takes `quantity_per_booking` of every item when it is created
+(app.services.inventory_service), so `quantity` is what is left once all
+booked appointments have been served. The stock physically on the shelf
+at the end of a local day is therefore `quantity` plus the usage of the
+confirmed bookings scheduled after that day:
+
+    level[item, d] = quantity + per_booking * (bookings after day d)
+
+An item goes low on the first day its level is at or below
+`low_threshold`, and runs out on the first day it goes below zero (more
+is booked than is in stock). Bookings are binned into local days with one
+searchsorted over the day boundaries and every item is projected at once
+as an outer product of the per-day counts, so the cost is one range query
+plus a few array operations regardless of how many items there are.
+"""
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Booking, InventoryItem
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_FORECAST_DEFAULT_WEEKS = int(os.getenv("INVENTORY_FORECAST_DEFAULT_WEEKS", "4"))
+INVENTORY_FORECAST_MAX_WEEKS = int(os.getenv("INVENTORY_FORECAST_MAX_WEEKS", "26"))
+
+# Stands in for "no threshold", so the item never counts as low
+NO_THRESHOLD = np.iinfo(np.int64).min
+
+
+def _zone(timezone_name: Optional[str]):
+    try:
+        return ZoneInfo(timezone_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def local_date(timezone_name: Optional[str], now: Optional[datetime] = None) -> date:
+    return (now or datetime.utcnow()).replace(tzinfo=timezone.utc).astimezone(_zone(timezone_name)).date()
+
+
+def day_boundaries(tz, first_day: date, days: int) -> np.ndarray:
+    """Local midnights first_day .. first_day + days as naive UTC datetime64"""
+    return np.array([
+        datetime.combine(first_day + timedelta(days=i), time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+        for i in range(days + 1)
+    ], dtype="datetime64[us]")
+
+
+def bookings_per_day(scheduled_at: List[datetime], boundaries: np.ndarray) -> np.ndarray:
+    """Count of bookings in each [boundary, next boundary) day"""
+    days = len(boundaries) - 1
+    if not scheduled_at:
+        return np.zeros(days, dtype=np.int64)
+    index = np.searchsorted(boundaries, np.array(scheduled_at, dtype="datetime64[us]"), side="right") - 1
+    return np.bincount(index[(index >= 0) & (index < days)], minlength=days)
+
+
+def project(quantity: np.ndarray, per_booking: np.ndarray, threshold: np.ndarray,
+            daily: np.ndarray, later: int):
+    """
+    End-of-day levels (items x days) for the given per-day booking counts,
+    with `later` more bookings after the last day, and the first low and
+    stock-out day index per item (-1 if none)
+    """
+    # Bookings still to come after each day: the day's remaining suffix plus `later`
+    after = later + daily.sum() - np.cumsum(daily)
+    levels = quantity[:, None] + np.outer(per_booking, after)
+    return levels, _first(levels <= threshold[:, None]), _first(levels < 0)
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def scheduled_query(workspace_id: int, start: datetime, end: datetime):
+    """Start times of the confirmed bookings in [start, end)"""
+    return select(Booking.scheduled_at).where(
+        Booking.workspace_id == workspace_id,
+        Booking.status == "confirmed",
+        Booking.scheduled_at >= start,
+        Booking.scheduled_at < end
+    )
+
+
+def check_weeks(weeks: int):
+    if not 1 <= weeks <= INVENTORY_FORECAST_MAX_WEEKS:
+        raise HTTPException(status_code=400, detail=f"weeks must be between 1 and {INVENTORY_FORECAST_MAX_WEEKS}")
+
+
+def forecast(db: Session, workspace, weeks: int, now: Optional[datetime] = None) -> dict:
+    """Projection for the workspace's items over `weeks` weeks from its local today"""
+    tz = _zone(workspace.timezone)
+    start_date = local_date(workspace.timezone, now)
+    boundaries = day_boundaries(tz, start_date, weeks * 7)
+    start, end = boundaries[0].item(), boundaries[-1].item()
+
+    scheduled_at = db.scalars(scheduled_query(workspace.id, start, end)).all()
+    later = db.scalar(select(func.count(Booking.id)).where(
+        Booking.workspace_id == workspace.id, Booking.status == "confirmed", Booking.scheduled_at >= end
+    ))
+    daily = bookings_per_day(scheduled_at, boundaries)
+
+    items = db.execute(select(
+        InventoryItem.id, InventoryItem.name, InventoryItem.quantity,
+        InventoryItem.quantity_per_booking, InventoryItem.low_threshold
+    ).where(
+        InventoryItem.workspace_id == workspace.id, InventoryItem.quantity.is_not(None)
+    ).order_by(InventoryItem.id)).all()
+
+    result = {"start_date": start_date, "timezone": str(tz), "bookings_per_day": daily.tolist(), "items": []}
+    if not items:
+        return result
+    ids, names, quantity, per_booking, threshold = zip(*items)
+    levels, low, stockout = project(
+        np.array(quantity, dtype=np.int64),
+        np.array([per or 0 for per in per_booking], dtype=np.int64),
+        np.array([NO_THRESHOLD if t is None else t for t in threshold], dtype=np.int64),
+        daily, later
+    )
+
+    def day(index):
+        return start_date + timedelta(days=int(index)) if index >= 0 else None
+
+    for i, item_id in enumerate(ids):
+        result["items"].append({
+            "item_id": item_id,
+            "name": names[i],
+            "quantity": quantity[i],
+            "quantity_per_booking": per_booking[i] or 0,
+            "low_threshold": threshold[i],
+            "levels": levels[i].tolist(),
+            "low_date": day(low[i]),
+            "stockout_date": day(stockout[i])
+        })
+    return result
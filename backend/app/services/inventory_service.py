@@ -0,0 +1,65 @@
+"""
+Inventory Service - Per-booking stock deduction and low-stock alerts
+
+Every booking uses `quantity_per_booking` of each of the workspace's
+inventory items. The deduction is one set-based UPDATE ... RETURNING, so
+concurrent bookings can't lose each other's decrements and the cost is a
+single statement however many items there are.
+
+An item is low once `quantity <= low_threshold`. The returned rows tell
+which items this booking took from above the threshold to at or below it;
+only those alert, so an item alerts once per crossing rather than on every
+booking while it stays low, and again only after a restock lifts it back
+above the threshold. The row lock taken by the UPDATE makes that exactly
+one booking per crossing, even under concurrency.
+"""
+import logging
+from typing import List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.database import SessionLocal
+from app.models.models import InventoryItem, Workspace
+from app.services.automation_service import automation_service
+from app.services.workspace_stats import counter_update
+
+logger = logging.getLogger(__name__)
+
+
+async def deduct_for_booking(db: AsyncSession, workspace_id: int) -> List[int]:
+    """Deduct one booking's usage; returns ids of items that just went low (caller commits)"""
+    rows = (await db.execute(
+        update(InventoryItem)
+        .where(
+            InventoryItem.workspace_id == workspace_id,
+            InventoryItem.quantity.is_not(None),
+            InventoryItem.quantity_per_booking > 0
+        )
+        .values(quantity=InventoryItem.quantity - InventoryItem.quantity_per_booking)
+        .returning(InventoryItem.id, InventoryItem.quantity, InventoryItem.quantity_per_booking, InventoryItem.low_threshold)
+        .execution_options(synchronize_session=False)
+    )).all()
+
+    crossed = [
+        item_id for item_id, quantity, used, threshold in rows
+        if threshold is not None and quantity <= threshold < quantity + used
+    ]
+    if crossed:
+        # The stats flush hook never sees this UPDATE
+        await db.execute(counter_update(workspace_id, low_inventory=len(crossed)))
+    return crossed
+
+
+def notify_low_stock(workspace_id: int, item_ids: List[int]):
+    """Dispatcher job: run the low-inventory automation for items that just went low"""
+    db = SessionLocal()
+    try:
+        workspace = db.scalar(select(Workspace).where(Workspace.id == workspace_id).options(joinedload(Workspace.owner)))
+        if not workspace:
+            return
+        for item in db.scalars(select(InventoryItem).where(InventoryItem.id.in_(item_ids))):
+            automation_service.on_inventory_low(item, workspace, db)
+    finally:
+        db.close()
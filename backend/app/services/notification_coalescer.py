@@ -0,0 +1,168 @@
+"""
+Notification Coalescer - Folds bursts of per-form notifications into digests
+
+Form reminders for the same recipient and channel that arrive within
+NOTIFY_COALESCE_WINDOW seconds (`add`) are held and queued as one outbox row
+listing every form; callers that already hold a recipient's reminders use
+`send_now`. Going through the outbox means a throttled or failed send is
+retried instead of dropped.
+
+Reminders are keyed by form id, so every path dedupes the same way:
+identical reminders (same channel, recipient and form) are dropped for
+NOTIFY_DEDUPE_TTL seconds. `claim` checks and records keys in one step under
+the lock (insert-if-absent), so two concurrent paths cannot both send a
+form; `release` gives keys back when their send was never queued.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import Outbox
+from app.services import outbox_service
+from app.services.notification_dispatcher import notification_dispatcher
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE_WINDOW", "30"))
+NOTIFY_DEDUPE_TTL = float(os.getenv("NOTIFY_DEDUPE_TTL", "3600"))
+NOTIFY_DEDUPE_MAX_KEYS = int(os.getenv("NOTIFY_DEDUPE_MAX_KEYS", "100000"))
+
+
+def enqueue_form_reminders(db: Session, channel: str, recipient: str, form_names: List[str],
+                           workspace_id: Optional[int] = None) -> Outbox:
+    """Add a single reminder, or one digest when several forms are pending, to the caller's transaction"""
+    if len(form_names) == 1:
+        kind, payload = f"{channel}.form_reminder", {"form_name": form_names[0]}
+    else:
+        kind, payload = f"{channel}.form_digest", {"form_names": form_names}
+    return outbox_service.enqueue(db, kind, recipient, payload, workspace_id)
+
+
+def queue_form_reminders(channel: str, recipient: str, form_names: List[str]) -> dict:
+    """Queue form reminders in their own transaction and hand them to the relay"""
+    db = SessionLocal()
+    try:
+        row = enqueue_form_reminders(db, channel, recipient, form_names)
+        db.commit()
+        outbox_id = row.id
+    finally:
+        db.close()
+    notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, [outbox_id])
+    return {"status": "queued", "outbox_id": outbox_id}
+
+
+# (form_id, display name); the form id is the dedupe key
+FormItem = Tuple[int, str]
+
+
+class NotificationCoalescer:
+    def __init__(self, window: float = NOTIFY_COALESCE_WINDOW, dedupe_ttl: float = NOTIFY_DEDUPE_TTL,
+                 max_keys: int = NOTIFY_DEDUPE_MAX_KEYS,
+                 sender: Callable[[str, str, List[str]], dict] = queue_form_reminders):
+        self.window = window
+        self.dedupe_ttl = dedupe_ttl
+        self.max_keys = max_keys
+        self.sender = sender
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], List[FormItem]] = {}
+        self._timers: Dict[Tuple[str, str], threading.Timer] = {}
+        self._seen: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+        self.stats = {"accepted": 0, "deduped": 0, "released": 0, "digests": 0, "singles": 0}
+
+    def _prune(self, now: float):
+        while self._seen:
+            key, expires = next(iter(self._seen.items()))
+            if expires > now and len(self._seen) <= self.max_keys:
+                break
+            self._seen.popitem(last=False)
+
+    def claim(self, channel: str, recipient: str, items: Iterable[FormItem]) -> List[FormItem]:
+        """Atomically drop forms already reminded within the TTL (and repeats) and record the rest"""
+        now = time.monotonic()
+        fresh = []
+        with self._lock:
+            self._prune(now)
+            for item in items:
+                key = (channel, recipient, item[0])
+                if key in self._seen:
+                    self.stats["deduped"] += 1
+                    continue
+                self._seen[key] = now + self.dedupe_ttl
+                fresh.append(item)
+            self.stats["accepted"] += len(fresh)
+        return fresh
+
+    def release(self, channel: str, recipient: str, items: Iterable[FormItem]):
+        """Forget claimed forms whose reminder was never queued, so a retry is not deduped"""
+        with self._lock:
+            for item in items:
+                if self._seen.pop((channel, recipient, item[0]), None) is not None:
+                    self.stats["released"] += 1
+
+    def add(self, channel: str, recipient: str, item: FormItem):
+        """Buffer one form reminder; the first one for a recipient opens the window"""
+        if not recipient:
+            return
+        if self.window <= 0:
+            self.send_now(channel, recipient, [item])
+            return
+        if not self.claim(channel, recipient, [item]):
+            return
+        key = (channel, recipient)
+        with self._lock:
+            self._pending.setdefault(key, []).append(item)
+            if key in self._timers:
+                return
+            timer = threading.Timer(self.window, self.flush, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+        timer.start()
+
+    def send_now(self, channel: str, recipient: str, items: List[FormItem]) -> dict:
+        """Queue an already-grouped set of reminders as one message (after dedupe)"""
+        items = self.claim(channel, recipient, items)
+        if not items:
+            return {"status": "skipped", "reason": "duplicate"}
+        return self._send(channel, recipient, items)
+
+    def _send(self, channel: str, recipient: str, items: List[FormItem]) -> dict:
+        with self._lock:
+            self.stats["digests" if len(items) > 1 else "singles"] += 1
+        try:
+            result = self.sender(channel, recipient, [name for _, name in items])
+        except Exception as e:
+            logger.error(f"Form reminder {channel} to {recipient} failed: {e}")
+            result = {"status": "failed", "error": str(e)}
+        if result.get("status") not in ("queued", "sent"):
+            self.release(channel, recipient, items)
+        return result
+
+    def flush(self, key: Tuple[str, str]):
+        with self._lock:
+            items = self._pending.pop(key, [])
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if items:
+            channel, recipient = key
+            queued = notification_dispatcher.submit(f"{channel}_form_digest", self._send, channel, recipient, items)
+            if not queued and notification_dispatcher.is_running:
+                # Shed by a full queue: let the reminder job pick these forms up again
+                self.release(channel, recipient, items)
+
+    def flush_all(self):
+        """Queue everything still buffered (called on shutdown)"""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.flush(key)
+
+
+# Singleton instance
+notification_coalescer = NotificationCoalescer()
@@ -0,0 +1,190 @@
+"""
+Notification Dispatcher - Runs outbound email/SMS off the request path
+"""
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "1000"))
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+NOTIFY_DRAIN_TIMEOUT = float(os.getenv("NOTIFY_DRAIN_TIMEOUT", "10"))
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@dataclass
+class NotificationJob:
+    name: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class NotificationDispatcher:
+    """
+    Bounded in-process queue drained by a pool of asyncio workers.
+
+    Routes run in Starlette's threadpool, so `submit` is thread-safe and never
+    blocks: it either hands the job to the event loop or reports backpressure.
+    Blocking senders (smtplib, requests) are run via `asyncio.to_thread`;
+    coroutine functions are awaited directly on the loop.
+    """
+
+    def __init__(self, max_queue_size: int = NOTIFY_QUEUE_SIZE, workers: int = NOTIFY_WORKERS):
+        self.max_queue_size = max_queue_size
+        self.worker_count = workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._accepting = False
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "inline": 0,
+            "high_water": 0,
+            "in_flight": 0,
+            "max_wait_ms": 0.0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._accepting and self._loop is not None
+
+    async def start(self):
+        """Start the worker pool on the running event loop (called from lifespan)"""
+        if self._accepting:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"notify-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._accepting = True
+        logger.info(f"Notification dispatcher started with {self.worker_count} workers")
+
+    async def stop(self, timeout: float = NOTIFY_DRAIN_TIMEOUT):
+        """Stop accepting jobs, drain what is queued, then cancel the workers"""
+        if not self._accepting:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Notification dispatcher drain timed out with {self._pending} jobs pending")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        logger.info("Notification dispatcher stopped")
+
+    def submit(self, name: str, func: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Queue a notification job
+
+        Returns True if the job was queued. When the dispatcher is not running
+        (scripts, tests) the job runs inline so nothing is lost - on a
+        short-lived thread if the caller is on an event loop, which must not
+        block. When the queue is full the job is shed: rejected and counted
+        (outbox rows it would have sent are retried by the outbox relay).
+        """
+        job = NotificationJob(name=name, func=func, args=args, kwargs=kwargs)
+
+        if not self.is_running:
+            with self._lock:
+                self._stats["inline"] += 1
+            if _on_event_loop():
+                threading.Thread(target=self._run_inline, args=(job,), name=f"notify-inline-{name}", daemon=True).start()
+            else:
+                self._run_inline(job)
+            return False
+
+        with self._lock:
+            if self._pending >= self.max_queue_size:
+                self._stats["rejected"] += 1
+                logger.warning(f"Notification queue full, rejected job {name}")
+                return False
+            self._pending += 1
+            self._stats["enqueued"] += 1
+            self._stats["high_water"] = max(self._stats["high_water"], self._pending)
+
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Backpressure metrics snapshot"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["queue_depth"] = self._pending
+        snapshot["max_queue_size"] = self.max_queue_size
+        snapshot["workers"] = self.worker_count
+        snapshot["running"] = self.is_running
+        return snapshot
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            wait_ms = (time.monotonic() - job.enqueued_at) * 1000
+            with self._lock:
+                self._stats["in_flight"] += 1
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            try:
+                if inspect.iscoroutinefunction(job.func):
+                    result = await job.func(*job.args, **job.kwargs)
+                else:
+                    result = await asyncio.to_thread(job.func, *job.args, **job.kwargs)
+                self._record(job, result)
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed"] += 1
+                logger.error(f"Notification job {job.name} failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._stats["in_flight"] -= 1
+                self._queue.task_done()
+
+    def _run_inline(self, job: NotificationJob):
+        # Only ever called off the event loop, so asyncio.run is safe here
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                asyncio.run(job.func(*job.args, **job.kwargs))
+                result = None
+            else:
+                result = job.func(*job.args, **job.kwargs)
+            self._record(job, result)
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+            logger.error(f"Notification job {job.name} failed: {e}")
+
+    def _record(self, job: NotificationJob, result: Any):
+        # Integrations report failures as {"status": "failed"} rather than raising
+        failed = isinstance(result, dict) and result.get("status") == "failed"
+        with self._lock:
+            self._stats["failed" if failed else "processed"] += 1
+        if failed:
+            logger.error(f"Notification job {job.name} failed: {result.get('error')}")
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,238 @@
+"""
+Outbox Service - Durable email/SMS delivery via the transactional outbox
+
+Routes write an Outbox row in the same transaction as the booking/contact it
+belongs to. Delivery happens afterwards, either through the in-process relay
+(`deliver_ids`, queued on the notification dispatcher right after commit),
+the scheduler's `outbox_relay` job (`relay_due`, which retries failed rows
+once their backoff passes) or any number of `outbox_worker.py` processes
+polling for due rows.
+
+Claiming uses a lease (locked_by/locked_until) so rows are never sent twice
+while a claim is live and are retried if a worker dies mid-batch. A send the
+client-side SMS rate limit turned away is rescheduled for when a token is
+free without counting as an attempt. Claiming:
+- PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED, then stamp the lease
+- SQLite: a single UPDATE ... WHERE id IN (SELECT ... LIMIT n) stamps the
+  lease; SQLite serializes writers, so the claim is atomic
+"""
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.integrations.email_service import email_service
+from app.integrations.sms_service import sms_service
+from app.models.models import Outbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "3600"))
+OUTBOX_RELAY_INTERVAL = int(os.getenv("OUTBOX_RELAY_INTERVAL", "30"))
+OUTBOX_RELAY_MAX_BATCHES = int(os.getenv("OUTBOX_RELAY_MAX_BATCHES", "20"))
+
+# kind -> sender(recipient, payload, workspace_id); senders return the integrations' status dicts
+HANDLERS: Dict[str, Callable[[str, dict, Optional[int]], dict]] = {
+    "email.raw": lambda to, p, ws: email_service.send_email(to, p["subject"], p["body"], text_body=p.get("text")),
+    "email.booking_confirmation": lambda to, p, ws: email_service.send_booking_confirmation(to, p, ws),
+    "email.welcome": lambda to, p, ws: email_service.send_welcome_message(to, p["name"], ws),
+    "email.form_reminder": lambda to, p, ws: email_service.send_form_reminder(to, p["form_name"], ws),
+    "email.form_digest": lambda to, p, ws: email_service.send_form_digest(to, p["form_names"], ws),
+    "sms.text": lambda to, p, ws: sms_service.send_sms(to, p["message"]),
+    "sms.booking_confirmation": lambda to, p, ws: sms_service.send_booking_confirmation(to, p, ws),
+    "sms.booking_reminder": lambda to, p, ws: sms_service.send_booking_reminder(to, p, ws),
+    "sms.form_reminder": lambda to, p, ws: sms_service.send_form_reminder(to, p["form_name"], ws),
+    "sms.form_digest": lambda to, p, ws: sms_service.send_form_digest(to, p["form_names"], ws),
+    "sms.verification_code": lambda to, p, ws: sms_service.send_verification_code(to, p["code"], ws),
+    "sms.inventory_alert": lambda to, p, ws: sms_service.send_inventory_alert(to, p["item_name"], p["quantity"], ws),
+}
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def enqueue(db: Session, kind: str, recipient: str, payload: dict, workspace_id: Optional[int] = None) -> Outbox:
+    """
+    Add an outbox row to the caller's transaction (does not commit)
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown outbox kind: {kind}")
+    row = Outbox(
+        workspace_id=workspace_id,
+        channel=kind.split(".", 1)[0],
+        kind=kind,
+        recipient=recipient,
+        payload=payload,
+        status="pending",
+        attempts=0,
+        available_at=datetime.utcnow()
+    )
+    db.add(row)
+    return row
+
+
+def backoff_delay(attempts: int) -> float:
+    """Full-jitter exponential backoff in seconds"""
+    ceiling = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * (2 ** attempts))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _due_filter(now: datetime, ids: Optional[List[int]] = None):
+    clauses = [
+        Outbox.status == "pending",
+        Outbox.available_at <= now,
+        or_(Outbox.locked_until.is_(None), Outbox.locked_until < now),
+    ]
+    if ids is not None:
+        clauses.append(Outbox.id.in_(ids))
+    return and_(*clauses)
+
+
+def claim_batch(db: Session, worker_id: str, batch_size: int = OUTBOX_BATCH_SIZE,
+                lease_seconds: int = OUTBOX_LEASE_SECONDS, ids: Optional[List[int]] = None) -> List[dict]:
+    """
+    Lease up to `batch_size` due rows to `worker_id` and commit the claim
+
+    Returns plain snapshots so sending can happen outside any transaction.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=lease_seconds)
+    due = _due_filter(now, ids)
+
+    if db.bind.dialect.name == "postgresql":
+        rows = db.execute(
+            select(Outbox).where(due).order_by(Outbox.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).scalars().all()
+        for row in rows:
+            row.locked_by = worker_id
+            row.locked_until = lease_until
+        claimed = [_snapshot(row) for row in rows]
+        db.commit()
+        return claimed
+
+    candidate_ids = select(Outbox.id).where(due).order_by(Outbox.id).limit(batch_size)
+    db.execute(
+        update(Outbox)
+        .where(Outbox.id.in_(candidate_ids))
+        .values(locked_by=worker_id, locked_until=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    rows = db.execute(
+        select(Outbox).where(
+            Outbox.locked_by == worker_id,
+            Outbox.locked_until == lease_until,
+            Outbox.status == "pending"
+        ).order_by(Outbox.id)
+    ).scalars().all()
+    return [_snapshot(row) for row in rows]
+
+
+def _snapshot(row: Outbox) -> dict:
+    return {
+        "id": row.id,
+        "kind": row.kind,
+        "recipient": row.recipient,
+        "payload": row.payload or {},
+        "workspace_id": row.workspace_id,
+        "attempts": row.attempts or 0,
+    }
+
+
+def send(item: dict) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Deliver one claimed row; returns (error or None on success, seconds to
+    hold off when the send was throttled locally rather than failed)
+    """
+    try:
+        result = HANDLERS[item["kind"]](item["recipient"], item["payload"], item["workspace_id"])
+    except Exception as e:
+        return str(e), None
+    if isinstance(result, dict) and result.get("status") == "failed":
+        retry_after = result.get("retry_after") if result.get("throttled") else None
+        return str(result.get("error", "send failed")), retry_after
+    return None, None
+
+
+def _record_result(db: Session, worker_id: str, item: dict, error: Optional[str], retry_after: Optional[float] = None):
+    owned = and_(Outbox.id == item["id"], Outbox.locked_by == worker_id)
+    if error is None:
+        values = {"status": "sent", "sent_at": datetime.utcnow(), "locked_by": None, "locked_until": None}
+    elif retry_after is not None:
+        # Throttled before reaching the provider: not an attempt
+        values = {"available_at": datetime.utcnow() + timedelta(seconds=retry_after),
+                  "last_error": error[:1000], "locked_by": None, "locked_until": None}
+    else:
+        attempts = item["attempts"] + 1
+        values = {"attempts": attempts, "last_error": error[:1000], "locked_by": None, "locked_until": None}
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            values["status"] = "dead"
+            logger.error(f"Outbox row {item['id']} ({item['kind']}) gave up after {attempts} attempts: {error}")
+        else:
+            values["available_at"] = datetime.utcnow() + timedelta(seconds=backoff_delay(attempts))
+    db.execute(update(Outbox).where(owned).values(**values).execution_options(synchronize_session=False))
+
+
+def process_batch(worker_id: Optional[str] = None, batch_size: int = OUTBOX_BATCH_SIZE,
+                  ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """
+    Claim, send and settle one batch; returns counts for logging/metrics
+    """
+    db = SessionLocal()
+    try:
+        return _process(db, worker_id or new_worker_id(), batch_size, ids)
+    finally:
+        db.close()
+
+
+def _process(db: Session, worker_id: str, batch_size: int, ids: Optional[List[int]] = None) -> Dict[str, int]:
+    claimed = claim_batch(db, worker_id, batch_size=batch_size, ids=ids)
+    sent = failed = deferred = 0
+    for item in claimed:
+        error, retry_after = send(item)
+        _record_result(db, worker_id, item, error, retry_after)
+        # Settle each row on its own so no write lock is held across a send
+        db.commit()
+        if error is None:
+            sent += 1
+        elif retry_after is not None:
+            deferred += 1
+        else:
+            failed += 1
+    return {"claimed": len(claimed), "sent": sent, "failed": failed, "deferred": deferred}
+
+
+def deliver_ids(ids: List[int]) -> Dict[str, int]:
+    """In-process fast path for rows the current request just committed"""
+    return process_batch(batch_size=len(ids), ids=ids)
+
+
+def relay_due(db: Session) -> Dict[str, int]:
+    """
+    Scheduler job: deliver every due row - retries whose backoff has passed
+    and rows the fast path never picked up - in up to
+    OUTBOX_RELAY_MAX_BATCHES batches per run
+    """
+    worker_id = new_worker_id()
+    totals = {"claimed": 0, "sent": 0, "failed": 0, "deferred": 0}
+    for _ in range(OUTBOX_RELAY_MAX_BATCHES):
+        result = _process(db, worker_id, OUTBOX_BATCH_SIZE)
+        for key in totals:
+            totals[key] += result[key]
+        if result["claimed"] < OUTBOX_BATCH_SIZE:
+            break
+    if totals["claimed"]:
+        logger.info(f"Outbox relay: {totals}")
+    return totals
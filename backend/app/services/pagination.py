@@ -0,0 +1,86 @@
+"""
+Pagination - Keyset (cursor) pagination for list endpoints
+
+A page is the next `limit` rows after the last row of the previous page,
+found with a row-value comparison on the list's sort key, e.g.
+`(scheduled_at, id) > (:last_scheduled_at, :last_id)`. With an index on
+(workspace_id, <sort key>) every page is an index range scan, however deep
+into the list it is, and rows inserted meanwhile never shift or repeat
+rows across pages the way OFFSET does. The sort key always ends in the
+primary key so the order is total.
+
+Cursors are opaque to clients: the last row's sort key values, JSON
+encoded and base64url'd. The list endpoints return the next page's cursor
+in the X-Next-Cursor header (absent on the last page) and leave the body
+a plain list.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "50"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "200"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_limit(limit: Optional[int]) -> int:
+    """Requested page size, capped at PAGE_MAX_LIMIT"""
+    if not limit or limit < 1:
+        return PAGE_DEFAULT_LIMIT
+    return min(limit, PAGE_MAX_LIMIT)
+
+
+def prefix_range(expression, prefix: str):
+    """
+    `expression LIKE 'prefix%'` as a plain range, which a default btree
+    index on the expression can serve (LIKE would need text_pattern_ops on
+    PostgreSQL and a NOCASE index on SQLite)
+    """
+    return expression >= prefix, expression < prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong shape")
+        return [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(statement: Select, columns: Sequence, cursor: Optional[str], limit: int,
+             descending: bool = False) -> Select:
+    """
+    Order `statement` by `columns` (ending in the primary key), continue
+    after `cursor` and fetch one row more than `limit`, which tells
+    `page()` whether there is a next page
+    """
+    if cursor:
+        key, after = tuple_(*columns), tuple_(*decode_cursor(cursor, columns))
+        statement = statement.where(key < after if descending else key > after)
+    order = [column.desc() if descending else column for column in columns]
+    return statement.order_by(*order).limit(limit + 1)
+
+
+def page(rows: Sequence, columns: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Split a `paginate()` result into the page and the next page's cursor"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
@@ -0,0 +1,39 @@
+"""
+Principal - The authenticated user behind a request
+
+`get_current_user_id` is the one FastAPI dependency every router uses:
+
+    @router.get("/{workspace_id}/list")
+    def list_things(workspace_id: int, user_id: int = Depends(get_current_user_id), ...):
+
+It takes the token from the `token` query parameter (what the API has
+always used) or an `Authorization: Bearer` header, and verifies it
+through auth_service's token cache, so a token is HMAC-checked once per
+process rather than on every request. FastAPI caches dependency results
+per request, so routes and sub-dependencies that ask for the user again
+share the same resolution.
+"""
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.services.auth_service import verify_token
+
+
+def user_id_from_token(token: Optional[str]) -> int:
+    """Verified user id for a raw token; 401 if there's none or it doesn't verify"""
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No token provided")
+    payload = verify_token(token)
+    try:
+        return int(payload["sub"])
+    except (TypeError, KeyError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+async def get_current_user_id(token: Optional[str] = None, authorization: Optional[str] = Header(None)) -> int:
+    if not token and authorization:
+        scheme, _, credentials = authorization.partition(" ")
+        if scheme.lower() == "bearer":
+            token = credentials.strip()
+    return user_id_from_token(token)
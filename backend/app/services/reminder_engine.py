@@ -0,0 +1,303 @@
+"""
+Reminder Engine - Fires booking reminder SMS from an in-memory timing wheel
+
+Instead of scanning `bookings` every minute, the engine loads the reminders
+that fall due in the next window (REMINDER_WINDOW_HOURS) into a hierarchical
+timing wheel and fires them as the wheel turns. bookings.py keeps the wheel
+current as bookings are created, rescheduled or cancelled. On startup the
+current window is reloaded from the database, including reminders that fell
+due while the process was down.
+
+Several processes may hold the same reminder; the one that flips
+`Booking.reminder_sent_at` from NULL sends it, via the outbox. Each wheel
+entry carries the scheduled_at it was computed from and the claim matches
+on it, so an entry left behind by a reschedule on another process claims
+nothing.
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+
+from app.database import SessionLocal
+from app.models.models import Booking, Contact, Workspace
+from app.services import outbox_service
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.timeutil import naive_utc, utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+REMINDER_ENGINE_ENABLED = os.getenv("REMINDER_ENGINE_ENABLED", "true").lower() == "true"
+REMINDER_TICK_SECONDS = int(os.getenv("REMINDER_TICK_SECONDS", "60"))
+REMINDER_WINDOW_HOURS = int(os.getenv("REMINDER_WINDOW_HOURS", "6"))
+REMINDER_LEAD_MINUTES = int(os.getenv("REMINDER_LEAD_MINUTES", "1440"))
+# Reminders that fell due while we were down are still sent if the booking is this far off
+REMINDER_CATCH_UP_MINUTES = int(os.getenv("REMINDER_CATCH_UP_MINUTES", "60"))
+
+
+class TimingWheel:
+    """
+    Two-level hierarchical timing wheel
+
+    Level 0 has `slots` buckets of one tick each; level 1 has `hours` buckets
+    of `slots` ticks each. Entries further out than both levels wait in an
+    overflow map that is re-checked once per full level-1 rotation. Adding,
+    removing and advancing by one tick are O(1) apart from the entries that
+    actually fire or cascade.
+    """
+
+    def __init__(self, tick_seconds: int, start: datetime, slots: int = 60, hours: int = 24):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.hours = hours
+        self.current_tick = self.to_tick(start)
+        self._level0: List[Dict[Any, Tuple[int, Any]]] = [dict() for _ in range(slots)]
+        self._level1: List[Dict[Any, Tuple[int, Any]]] = [dict() for _ in range(hours)]
+        self._overflow: Dict[Any, Tuple[int, Any]] = {}
+        self._due: Dict[Any, Any] = {}
+        self._where: Dict[Any, Dict[Any, Tuple[int, Any]]] = {}
+
+    def to_tick(self, when: datetime) -> int:
+        # Times are naive UTC; datetime.timestamp() would read them as local time
+        return int(utc_timestamp(when) // self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key) -> bool:
+        return key in self._where
+
+    def add(self, key, fire_at: datetime, payload: Any = None):
+        self.remove(key)
+        self._insert(key, self.to_tick(fire_at), payload)
+
+    def remove(self, key) -> bool:
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        bucket.pop(key, None)
+        return True
+
+    def _insert(self, key, fire_tick: int, payload: Any):
+        delta = fire_tick - self.current_tick
+        if delta <= 0:
+            bucket = self._due
+            bucket[key] = payload
+            self._where[key] = bucket
+            return
+        if delta < self.slots:
+            bucket = self._level0[fire_tick % self.slots]
+        elif delta < self.slots * self.hours:
+            bucket = self._level1[(fire_tick // self.slots) % self.hours]
+        else:
+            bucket = self._overflow
+        bucket[key] = (fire_tick, payload)
+        self._where[key] = bucket
+
+    def advance(self, now: datetime) -> List[Tuple[Any, Any]]:
+        """Turn the wheel up to `now`; returns (key, payload) for every entry that fired"""
+        fired = []
+        target = self.to_tick(now)
+        while self.current_tick < target:
+            self.current_tick += 1
+            if self.current_tick % self.slots == 0:
+                self._cascade()
+            bucket = self._level0[self.current_tick % self.slots]
+            if bucket:
+                for key, (fire_tick, payload) in list(bucket.items()):
+                    if fire_tick <= self.current_tick:
+                        del bucket[key]
+                        self._where.pop(key, None)
+                        fired.append((key, payload))
+        # Entries added already due, or cascaded onto the current tick
+        if self._due:
+            for key, payload in self._due.items():
+                self._where.pop(key, None)
+                fired.append((key, payload))
+            self._due.clear()
+        return fired
+
+    def _cascade(self):
+        bucket = self._level1[(self.current_tick // self.slots) % self.hours]
+        moving = list(bucket.items())
+        bucket.clear()
+        if self.current_tick % (self.slots * self.hours) == 0 and self._overflow:
+            moving.extend(self._overflow.items())
+            self._overflow.clear()
+        for key, (fire_tick, payload) in moving:
+            self._where.pop(key, None)
+            self._insert(key, fire_tick, payload)
+
+
+class ReminderEngine:
+    def __init__(self, tick_seconds: int = REMINDER_TICK_SECONDS, window_hours: int = REMINDER_WINDOW_HOURS):
+        self.tick_seconds = tick_seconds
+        self.window = timedelta(hours=window_hours)
+        self.wheel: Optional[TimingWheel] = None
+        self.loaded_until: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"loaded": 0, "fired": 0, "sent": 0, "already_sent": 0, "last_rebuild_ms": None}
+
+    @staticmethod
+    def fire_at(scheduled_at: datetime, lead_minutes: Optional[int]) -> datetime:
+        lead = REMINDER_LEAD_MINUTES if lead_minutes is None else lead_minutes
+        return scheduled_at - timedelta(minutes=lead)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self.rebuild)
+        self._task = asyncio.create_task(self._loop(), name="reminder-engine")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "scheduled": len(self.wheel) if self.wheel else 0,
+                "loaded_until": self.loaded_until.isoformat() if self.loaded_until else None,
+                "running": self._task is not None,
+            }
+
+    def rebuild(self):
+        """Reset the wheel and load the current window from the database"""
+        started = datetime.utcnow()
+        with self._lock:
+            self.wheel = TimingWheel(self.tick_seconds, started)
+            self.loaded_until = started - timedelta(minutes=REMINDER_CATCH_UP_MINUTES)
+        self.load_window(started + self.window)
+        elapsed = (datetime.utcnow() - started).total_seconds() * 1000
+        with self._lock:
+            self._stats["last_rebuild_ms"] = round(elapsed, 2)
+        logger.info(f"Reminder engine rebuilt with {len(self.wheel)} reminders in {elapsed:.0f}ms")
+
+    def load_window(self, until: datetime):
+        """Load reminders firing in (loaded_until, until] into the wheel"""
+        start = self.loaded_until
+        if start is None or until <= start:
+            return
+        db = SessionLocal()
+        try:
+            leads = [row[0] for row in db.execute(select(Workspace.reminder_lead_minutes).distinct())]
+            loaded = 0
+            for lead in leads:
+                lead_delta = timedelta(minutes=REMINDER_LEAD_MINUTES if lead is None else lead)
+                lead_filter = Workspace.reminder_lead_minutes.is_(None) if lead is None else Workspace.reminder_lead_minutes == lead
+                rows = db.execute(
+                    select(Booking.id, Booking.scheduled_at)
+                    .join(Workspace, Workspace.id == Booking.workspace_id)
+                    .where(
+                        lead_filter,
+                        Booking.status == "confirmed",
+                        Booking.reminder_sent_at.is_(None),
+                        Booking.scheduled_at > start + lead_delta,
+                        Booking.scheduled_at <= until + lead_delta,
+                        Booking.scheduled_at > datetime.utcnow()
+                    )
+                )
+                with self._lock:
+                    for booking_id, scheduled_at in rows:
+                        self.wheel.add(booking_id, scheduled_at - lead_delta, scheduled_at)
+                        loaded += 1
+            with self._lock:
+                self.loaded_until = until
+                self._stats["loaded"] += loaded
+        finally:
+            db.close()
+
+    def schedule(self, booking_id: int, scheduled_at: datetime, status: str, lead_minutes: Optional[int]):
+        """Keep the wheel in step with a booking that was just created or changed"""
+        with self._lock:
+            if self.wheel is None:
+                return
+            scheduled_at = naive_utc(scheduled_at)
+            fire_at = self.fire_at(scheduled_at, lead_minutes)
+            if status != "confirmed" or scheduled_at <= datetime.utcnow() or fire_at > self.loaded_until:
+                # Not due in the loaded window; a later window load will pick it up
+                self.wheel.remove(booking_id)
+                return
+            self.wheel.add(booking_id, fire_at, scheduled_at)
+
+    def cancel(self, booking_id: int):
+        with self._lock:
+            if self.wheel is not None:
+                self.wheel.remove(booking_id)
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.tick_seconds)
+                now = datetime.utcnow()
+                with self._lock:
+                    fired = self.wheel.advance(now)
+                    needs_window = self.loaded_until - now < self.window / 2
+                if fired:
+                    await asyncio.to_thread(self.send_reminders, fired)
+                if needs_window:
+                    await asyncio.to_thread(self.load_window, now + self.window)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder engine tick failed: {e}")
+
+    def send_reminders(self, reminders: List[Tuple[int, datetime]]):
+        """Claim each (booking id, scheduled_at) reminder and queue its SMS through the outbox"""
+        db = SessionLocal()
+        sent = already_sent = 0
+        outbox_rows = []
+        try:
+            now = datetime.utcnow()
+            for booking_id, scheduled_at in reminders:
+                claimed = db.execute(
+                    update(Booking)
+                    .where(
+                        Booking.id == booking_id,
+                        Booking.scheduled_at == scheduled_at,
+                        Booking.reminder_sent_at.is_(None),
+                        Booking.status == "confirmed",
+                        Booking.scheduled_at > now
+                    )
+                    .values(reminder_sent_at=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not claimed:
+                    # Sent elsewhere, or rescheduled since this entry was added
+                    already_sent += 1
+                    continue
+                row = db.execute(
+                    select(Booking.workspace_id, Booking.booking_type, Booking.scheduled_at, Contact.phone)
+                    .join(Contact, Contact.id == Booking.contact_id)
+                    .where(Booking.id == booking_id)
+                ).first()
+                if row and row.phone:
+                    outbox_rows.append(outbox_service.enqueue(db, "sms.booking_reminder", row.phone, {
+                        "booking_type": row.booking_type,
+                        "scheduled_at": row.scheduled_at.strftime('%B %d, %Y at %I:%M %p'),
+                    }, row.workspace_id))
+                    sent += 1
+            db.flush()
+            outbox_ids = [item.id for item in outbox_rows]
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self._stats["fired"] += len(reminders)
+            self._stats["sent"] += sent
+            self._stats["already_sent"] += already_sent
+        if outbox_ids:
+            notification_dispatcher.submit("outbox_relay", outbox_service.deliver_ids, outbox_ids)
+
+
+# Singleton instance
+reminder_engine = ReminderEngine()
@@ -0,0 +1,252 @@
+"""
+Response Cache - Versioned read-through cache for workspace read endpoints
+
+Each workspace has a version counter that the routers bump after every
+committed write. Serialized responses are cached under
+(route, workspace, version), so a write makes every older entry
+unreachable without having to find and delete it; they age out through
+LRU + TTL. Entries carry a content ETag, and `If-None-Match` polls that
+still match are answered 304 without touching the database or
+serializing anything.
+
+The in-process backend is per worker: with WEB_CONCURRENCY > 1 a write is
+only seen by the other workers' caches after RESPONSE_CACHE_TTL. So the
+cache defaults to on only when RESPONSE_CACHE_URL (redis://...) shares
+versions and entries across workers, or the server runs a single worker;
+RESPONSE_CACHE_ENABLED=true opts a multi-worker in-process cache back in.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.database import WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+RESPONSE_CACHE_ENABLED = os.getenv(
+    "RESPONSE_CACHE_ENABLED", "true" if RESPONSE_CACHE_URL or WEB_CONCURRENCY == 1 else "false"
+).lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+
+@dataclass
+class CachedResponse:
+    owner_id: int
+    etag: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def response(self, if_none_match: Optional[str] = None) -> Response:
+        # no-cache: browsers keep the body but must revalidate with the ETag each time
+        headers = {**self.headers, "ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if if_none_match and _etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+class MemoryCacheBackend:
+    """Per-process LRU of entries with a TTL; versions are kept apart and never evicted"""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self, workspace_id: int) -> int:
+        return self._versions.get(workspace_id, 0)
+
+    def bump(self, workspace_id: int) -> int:
+        with self._lock:
+            self._versions[workspace_id] = self._versions.get(workspace_id, 0) + 1
+            return self._versions[workspace_id]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Shared backend: versions are plain INCR counters, entries expire via
+    Redis TTL and LRU comes from the server's maxmemory-policy
+    """
+
+    def __init__(self, url: str, prefix: str = "careops:cache:"):
+        import redis  # only needed when RESPONSE_CACHE_URL is set
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        owner_id, etag, headers, body = raw.split(b"\n", 3)
+        return CachedResponse(int(owner_id), etag.decode(), body, json.loads(headers))
+
+    def set(self, key: str, value: CachedResponse, ttl: float):
+        raw = b"\n".join([str(value.owner_id).encode(), value.etag.encode(), json.dumps(value.headers).encode(), value.body])
+        self._client.set(self.prefix + key, raw, px=int(ttl * 1000))
+
+    def version(self, workspace_id: int) -> int:
+        return int(self._client.get(f"{self.prefix}version:{workspace_id}") or 0)
+
+    def bump(self, workspace_id: int) -> int:
+        return self._client.incr(f"{self.prefix}version:{workspace_id}")
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+class ResponseCache:
+    """
+    Usage in a read route:
+
+        version = response_cache.version(workspace_id)
+        cached = response_cache.get("contacts.list", workspace_id, version, user_id, if_none_match)
+        if cached:
+            return cached.response(if_none_match)
+        ...load as usual...
+        return response_cache.put("contacts.list", workspace_id, version, user_id,
+                                  list[ContactResponse], contacts).response(if_none_match)
+
+    and `response_cache.bump(workspace_id)` after every committed write.
+    Entries remember the owner they were built for and are only served to
+    that user. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "bumps": 0, "errors": 0}
+
+    def version(self, workspace_id: int) -> int:
+        if not self.enabled:
+            return 0
+        try:
+            return self.backend.version(workspace_id)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache version lookup failed for workspace {workspace_id}: {e}")
+            return -1
+
+    def bump(self, workspace_id: int):
+        """Call after a write to the workspace has been committed"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.bump(workspace_id)
+            self.stats["bumps"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache bump failed for workspace {workspace_id}: {e}")
+
+    def get(self, route: str, workspace_id: int, version: int, user_id: int,
+            if_none_match: Optional[str] = None) -> Optional[CachedResponse]:
+        if not self.enabled or version < 0:
+            return None
+        try:
+            entry = self.backend.get(f"{route}:{workspace_id}:{version}")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache read failed for {route}:{workspace_id}: {e}")
+            return None
+        if entry is None or entry.owner_id != user_id:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        if if_none_match and _etag_matches(if_none_match, entry.etag):
+            self.stats["not_modified"] += 1
+        return entry
+
+    def put(self, route: str, workspace_id: int, version: int, user_id: int, schema, value: Any,
+            headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Serialize `value` as `schema` once, cache it and return the entry to respond with"""
+        adapter = _adapter(schema)
+        body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+        headers = headers or {}
+        # Headers are part of the representation (e.g. whether there's a next page)
+        digest = hashlib.blake2b(body + json.dumps(headers, sort_keys=True).encode(), digest_size=12).hexdigest()
+        entry = CachedResponse(user_id, f'"{digest}"', body, headers)
+        if self.enabled and version >= 0:
+            try:
+                self.backend.set(f"{route}:{workspace_id}:{version}", entry, self.ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Response cache write failed for {route}:{workspace_id}: {e}")
+        return entry
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "entries": self.backend.size(),
+            "evictions": self.backend.evictions,
+            **self.stats,
+        }
+
+
+def _default_cache() -> ResponseCache:
+    if RESPONSE_CACHE_URL:
+        try:
+            return ResponseCache(RedisCacheBackend(RESPONSE_CACHE_URL))
+        except Exception as e:
+            # Per-worker entries would serve other workers' stale reads
+            enabled = RESPONSE_CACHE_ENABLED and WEB_CONCURRENCY == 1
+            logger.error(f"Shared response cache unavailable ({e}); "
+                         f"{'falling back to in-process cache' if enabled else 'caching disabled'}")
+            return ResponseCache(MemoryCacheBackend(), enabled=enabled)
+    return ResponseCache(MemoryCacheBackend())
+
+
+# Singleton instance
+response_cache = _default_cache()
@@ -4,7 +4,7 @@ Role-based access control utilities
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from app.models.models import StaffUser, Workspace
-from app.services.auth_service import decode_token
+from app.services.principal import user_id_from_token
 
 class RoleChecker:
     """
@@ -12,25 +12,11 @@ class RoleChecker:
     """
     
     @staticmethod
-    def check_workspace_owner(workspace_id: int, token: str, db: Session) -> int:
+    def check_workspace_owner(workspace_id: int, user_id: int, db: Session) -> int:
         """
-        Verify that the token belongs to the workspace owner
+        Verify that the user (see app.services.principal) is the workspace owner
         Returns: user_id if authorized, raises HTTPException otherwise
         """
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No authentication token provided"
-            )
-        
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
-            )
-        
-        user_id = int(payload["sub"])
         workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
         
         if not workspace:
@@ -48,28 +34,13 @@ class RoleChecker:
         return user_id
     
     @staticmethod
-    def check_staff_permission(workspace_id: int, token: str, permission: str, db: Session) -> int:
+    def check_staff_permission(workspace_id: int, user_id: int, permission: str, db: Session) -> int:
         """
-        Verify that the token belongs to a staff member with the required permission
+        Verify that the user is the owner or a staff member with the required permission
         
         permission options: 'inbox', 'bookings', 'inventory'
         Returns: user_id if authorized, raises HTTPException otherwise
         """
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No authentication token provided"
-            )
-        
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
-            )
-        
-        user_id = int(payload["sub"])
-        
         # Check if user is owner (owners can do everything)
         workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
         if not workspace:
@@ -119,17 +90,4 @@ class RoleChecker:
         """
         Extract and validate user ID from token
         """
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No authentication token provided"
-            )
-        
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
-            )
-        
-        return int(payload["sub"])
+        return user_id_from_token(token)
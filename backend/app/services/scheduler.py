@@ -0,0 +1,211 @@
+"""
+Scheduler - Runs periodic automation jobs once per tick across the fleet
+
+Every web process runs this scheduler from the lifespan, but a job only
+runs in the process that wins its row in `scheduler_leases`. Winning is a
+single conditional UPDATE that succeeds only if nobody holds the lease and
+the job's last run is at least one interval old, so it works the same on
+PostgreSQL and SQLite and needs no coordinator.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "5"))
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[Session], Any]
+    interval: float
+    jitter: float = 0.0
+    catch_up: bool = True
+    lease_seconds: Optional[float] = None
+    next_due: datetime = field(default_factory=datetime.utcnow)
+    metrics: Dict[str, Any] = field(default_factory=lambda: {
+        "runs": 0,
+        "failures": 0,
+        "missed": 0,
+        "last_run_at": None,
+        "last_duration_ms": None,
+        "max_duration_ms": 0.0,
+        "last_lag_ms": None,
+        "max_lag_ms": 0.0,
+        "last_error": None,
+    })
+
+
+class Scheduler:
+    """
+    Interval scheduler with DB-backed leader election per job
+
+    - `jitter` spreads processes' polling so they don't all hit the lease row at once
+    - `catch_up` runs an overdue job (e.g. after a deploy gap) as soon as the
+      scheduler starts instead of waiting a full interval; missed ticks are
+      coalesced into that one run and counted in the job's metrics
+    """
+
+    def __init__(self, tick_seconds: float = SCHEDULER_TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, func: Callable[[Session], Any], interval: float,
+                 jitter: float = 0.0, catch_up: bool = True, lease_seconds: Optional[float] = None):
+        """Register `func(db)` to run every `interval` seconds"""
+        job = ScheduledJob(name=name, func=func, interval=interval, jitter=jitter,
+                           catch_up=catch_up, lease_seconds=lease_seconds)
+        if not catch_up:
+            job.next_due = datetime.utcnow() + timedelta(seconds=interval)
+        self.jobs[name] = job
+        return job
+
+    async def start(self):
+        if self._task is None and self.jobs:
+            self._task = asyncio.create_task(self._loop(), name="scheduler")
+            logger.info(f"Scheduler {self.owner_id} started with jobs: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Let in-progress runs finish so their lease is released cleanly
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        logger.info("Scheduler stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "owner": self.owner_id,
+            "running": self._task is not None,
+            "jobs": {
+                name: {
+                    "interval": job.interval,
+                    "next_due": job.next_due.isoformat(),
+                    "in_progress": name in self._running,
+                    **job.metrics,
+                }
+                for name, job in self.jobs.items()
+            },
+        }
+
+    async def _loop(self):
+        while True:
+            now = datetime.utcnow()
+            for job in self.jobs.values():
+                if job.next_due <= now and job.name not in self._running:
+                    job.next_due = now + timedelta(seconds=job.interval + random.uniform(0, job.jitter))
+                    self._running[job.name] = asyncio.create_task(self._run(job))
+            await asyncio.sleep(self.tick_seconds)
+
+    async def _run(self, job: ScheduledJob):
+        try:
+            await asyncio.to_thread(self._run_if_leader, job)
+        except Exception as e:
+            logger.error(f"Scheduler job {job.name} crashed: {e}")
+        finally:
+            self._running.pop(job.name, None)
+
+    def _acquire(self, db: Session, job: ScheduledJob, now: datetime) -> Optional[SchedulerLease]:
+        """Try to take this tick's run; returns the lease row as it was before if we won"""
+        lease = db.get(SchedulerLease, job.name)
+        if lease is None:
+            try:
+                db.add(SchedulerLease(job_name=job.name))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            lease = db.get(SchedulerLease, job.name)
+        previous_run = lease.last_run_at
+        db.expunge(lease)
+
+        lease_seconds = job.lease_seconds or max(job.interval, 60)
+        # Small slack so jittered pollers don't skip a tick they are entitled to
+        due_before = now - timedelta(seconds=job.interval * 0.95)
+        result = db.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.job_name == job.name,
+                or_(SchedulerLease.lease_until.is_(None), SchedulerLease.lease_until < now),
+                or_(SchedulerLease.last_run_at.is_(None), SchedulerLease.last_run_at <= due_before),
+            )
+            .values(owner=self.owner_id, lease_until=now + timedelta(seconds=lease_seconds), last_run_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount != 1:
+            return None
+        lease.last_run_at = previous_run
+        return lease
+
+    def _release(self, db: Session, job: ScheduledJob):
+        db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.job_name == job.name, SchedulerLease.owner == self.owner_id)
+            .values(lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def _run_if_leader(self, job: ScheduledJob):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            lease = self._acquire(db, job, now)
+            if lease is None:
+                return
+
+            metrics = job.metrics
+            if lease.last_run_at is not None:
+                due_at = lease.last_run_at + timedelta(seconds=job.interval)
+                lag_ms = max(0.0, (now - due_at).total_seconds() * 1000)
+                metrics["last_lag_ms"] = round(lag_ms, 2)
+                metrics["max_lag_ms"] = max(metrics["max_lag_ms"], metrics["last_lag_ms"])
+                missed = int((now - lease.last_run_at).total_seconds() // job.interval) - 1
+                if missed > 0:
+                    metrics["missed"] += missed
+                    logger.warning(f"Scheduler job {job.name} catching up after {missed} missed runs")
+
+            started = datetime.utcnow()
+            try:
+                job.func(db)
+                metrics["last_error"] = None
+            except Exception as e:
+                db.rollback()
+                metrics["failures"] += 1
+                metrics["last_error"] = str(e)
+                logger.error(f"Scheduler job {job.name} failed: {e}")
+            finally:
+                duration_ms = round((datetime.utcnow() - started).total_seconds() * 1000, 2)
+                metrics["runs"] += 1
+                metrics["last_run_at"] = started.isoformat()
+                metrics["last_duration_ms"] = duration_ms
+                metrics["max_duration_ms"] = max(metrics["max_duration_ms"], duration_ms)
+                self._release(db, job)
+        finally:
+            db.close()
+
+
+# Singleton instance
+scheduler = Scheduler()
@@ -0,0 +1,16 @@
+"""
+Time Utilities - Conversions for the naive UTC datetimes the models store
+"""
+from datetime import datetime, timezone
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Stored times are naive UTC; requests may carry an offset"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_timestamp(value: datetime) -> float:
+    """POSIX timestamp of a naive UTC (or aware) datetime, independent of the host's timezone"""
+    return naive_utc(value).replace(tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,367 @@
+"""
+Workspace Stats - Incrementally maintained dashboard counters
+
+`workspace_stats` holds one row per workspace with the counters the
+dashboard shows, so a dashboard poll is a primary-key lookup instead of a
+scan of bookings, conversations, form submissions and inventory.
+
+A session `after_flush` hook turns every flushed insert, update or delete
+of those models into a delta UPDATE on the workspace's row, in the same
+transaction as the change. Clock-dependent counters are kept against the
+window stored on the row: today/upcoming bookings against the workspace's
+local day (`day_start`..`day_end`, UTC) and overdue forms as of the last
+check. Scheduler jobs roll rows over once their local midnight passes,
+move forms that fell overdue, and periodically recompute every row to
+correct drift from bulk UPDATEs that bypass the ORM.
+"""
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, case, event, func, inspect, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import Booking, Conversation, FormSubmission, InventoryItem, Workspace, WorkspaceStats
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+STATS_ROLLOVER_INTERVAL = int(os.getenv("STATS_ROLLOVER_INTERVAL", "60"))
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+STATS_RECONCILE_BATCH = int(os.getenv("STATS_RECONCILE_BATCH", "500"))
+
+COUNTERS = ("today_bookings", "upcoming_bookings", "new_inquiries", "pending_forms", "overdue_forms", "low_inventory")
+
+
+def count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def local_day(timezone_name: Optional[str], now: datetime) -> Tuple[datetime, datetime]:
+    """The workspace's current local day as naive UTC [start, end)"""
+    try:
+        tz = ZoneInfo(timezone_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = timezone.utc
+    today = now.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+    def utc_midnight(day):
+        return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+    return utc_midnight(today), utc_midnight(today + timedelta(days=1))
+
+
+# Delta maintenance
+
+def _values(state, keys, old: bool) -> Optional[Dict[str, object]]:
+    """
+    Attribute values before (`old`) or after this flush, without loading
+    anything; None if an old value was never loaded and so is unknown
+    """
+    values = {}
+    for key in keys:
+        if old:
+            history = state.attrs[key].history
+            if history.deleted:
+                values[key] = history.deleted[0]
+                continue
+            if history.added:
+                return None
+        values[key] = state.dict.get(key)
+    return values
+
+
+def _booking_terms(values, sign):
+    at = values["scheduled_at"]
+    if at is None:
+        return {}
+    return {
+        "today_bookings": case(
+            (and_(WorkspaceStats.day_start <= at, WorkspaceStats.day_end > at), sign), else_=0
+        ),
+        "upcoming_bookings": case((WorkspaceStats.day_end < at, sign), else_=0),
+    }
+
+
+def _conversation_terms(values, sign):
+    return {"new_inquiries": sign} if values["is_open"] else {}
+
+
+def _form_terms(values, sign, now):
+    if values["status"] != "pending":
+        return {}
+    terms = {"pending_forms": sign}
+    if values["due_at"] is not None and values["due_at"] < now:
+        terms["overdue_forms"] = sign
+    return terms
+
+
+def _inventory_terms(values, sign):
+    quantity, threshold = values["quantity"], values["low_threshold"]
+    if quantity is None or threshold is None or quantity > threshold:
+        return {}
+    return {"low_inventory": sign}
+
+
+TRACKED = {
+    Booking: (("workspace_id", "scheduled_at"), _booking_terms),
+    Conversation: (("workspace_id", "is_open"), _conversation_terms),
+    FormSubmission: (("booking_id", "status", "due_at"), _form_terms),
+    InventoryItem: (("workspace_id", "quantity", "low_threshold"), _inventory_terms),
+}
+
+
+def _changes(session: Session):
+    """(model, old values or None, new values or None) for every tracked object in this flush"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tracked = TRACKED.get(type(obj))
+        if tracked is None:
+            continue
+        keys, _ = tracked
+        state = inspect(obj)
+        is_new = obj in session.new
+        is_deleted = obj in session.deleted
+        old = None if is_new else _values(state, keys, old=True)
+        new = None if is_deleted else _values(state, keys, old=False)
+        if old is None and not is_new:
+            # Overwritten without being loaded; the next reconcile corrects the row
+            logger.debug(f"Workspace stats: skipping {type(obj).__name__} with unknown previous values")
+            continue
+        if old != new:
+            yield type(obj), old, new
+
+
+def _apply_deltas(session: Session, flush_context):
+    now = datetime.utcnow()
+    conn = session.connection()
+
+    for obj in session.new:
+        if isinstance(obj, Workspace):
+            # Brand new workspace: nothing to count yet
+            day_start, day_end = local_day(obj.timezone, now)
+            conn.execute(insert(WorkspaceStats).values(
+                workspace_id=obj.id, day_start=day_start, day_end=day_end, reconciled_at=now,
+                **{name: 0 for name in COUNTERS}
+            ))
+    for obj in session.dirty:
+        if isinstance(obj, Workspace) and inspect(obj).attrs.timezone.history.has_changes():
+            # Local day moved; mark the row stale so the next read/rollover recomputes it
+            conn.execute(update(WorkspaceStats).where(WorkspaceStats.workspace_id == obj.id).values(day_end=now))
+
+    changes = list(_changes(session))
+    if not changes:
+        return
+
+    # Form submissions only know their booking
+    booking_ids = {
+        values["booking_id"]
+        for model, old, new in changes if model is FormSubmission
+        for values in (old, new) if values and values["booking_id"] is not None
+    }
+    # Bookings deleted in this same flush are gone from the table but not the session
+    in_session = list(session.deleted) + [
+        session.identity_map.get(inspect(Booking).identity_key_from_primary_key((booking_id,)))
+        for booking_id in booking_ids
+    ]
+    booking_workspaces = {}
+    for booking in in_session:
+        if isinstance(booking, Booking):
+            loaded = inspect(booking).dict
+            if loaded.get("id") in booking_ids and loaded.get("workspace_id") is not None:
+                booking_workspaces[loaded["id"]] = loaded["workspace_id"]
+    missing = booking_ids - set(booking_workspaces)
+    if missing:
+        booking_workspaces.update(conn.execute(
+            select(Booking.id, Booking.workspace_id).where(Booking.id.in_(missing))
+        ).all())
+
+    deltas: Dict[int, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    for model, old, new in changes:
+        _, terms_for = TRACKED[model]
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            if model is FormSubmission:
+                workspace_id = booking_workspaces.get(values["booking_id"])
+                terms = _form_terms(values, sign, now)
+            else:
+                workspace_id = values["workspace_id"]
+                terms = terms_for(values, sign)
+            if workspace_id is None:
+                continue
+            for name, term in terms.items():
+                deltas[workspace_id][name].append(term)
+
+    for workspace_id, columns in deltas.items():
+        conn.execute(counter_update(workspace_id, **{
+            name: sum(terms[1:], terms[0]) for name, terms in columns.items()
+        }))
+
+
+event.listen(Session, "after_flush", _apply_deltas)
+
+
+def counter_update(workspace_id: int, **deltas):
+    """
+    UPDATE adding `deltas` to a workspace's counters. Set-based writes that
+    bypass the flush hook (e.g. inventory deduction) apply their own
+    deltas with it, in the same transaction
+    """
+    return update(WorkspaceStats).where(WorkspaceStats.workspace_id == workspace_id).values(**{
+        name: getattr(WorkspaceStats, name) + delta for name, delta in deltas.items()
+    })
+
+
+class WorkspaceStatsService:
+    """
+    Recomputes `workspace_stats` rows from the source tables
+
+    Rows are locked before counting, so on PostgreSQL a concurrent delta
+    either lands before the count (and is included) or waits for it (and
+    applies on top); neither is lost.
+    """
+
+    def compute(self, db: Session, workspaces: Iterable[Tuple[int, Optional[str]]],
+                now: Optional[datetime] = None) -> Dict[int, dict]:
+        """Counters from scratch for (workspace_id, timezone) pairs, with grouped queries"""
+        now = now or datetime.utcnow()
+        rows: Dict[int, dict] = {}
+        by_window: Dict[Tuple[datetime, datetime], List[int]] = defaultdict(list)
+        for workspace_id, timezone_name in workspaces:
+            day_start, day_end = local_day(timezone_name, now)
+            rows[workspace_id] = {
+                "workspace_id": workspace_id, "day_start": day_start, "day_end": day_end,
+                "reconciled_at": now, **{name: 0 for name in COUNTERS},
+            }
+            by_window[(day_start, day_end)].append(workspace_id)
+        if not rows:
+            return rows
+        ids = list(rows)
+
+        # One booking query per distinct local day (i.e. per timezone in use)
+        for (day_start, day_end), window_ids in by_window.items():
+            for workspace_id, today, upcoming in db.execute(
+                select(
+                    Booking.workspace_id,
+                    count_if(and_(Booking.scheduled_at >= day_start, Booking.scheduled_at < day_end)),
+                    count_if(Booking.scheduled_at > day_end)
+                ).where(Booking.workspace_id.in_(window_ids)).group_by(Booking.workspace_id)
+            ):
+                rows[workspace_id].update(today_bookings=today, upcoming_bookings=upcoming)
+
+        for workspace_id, count in db.execute(
+            select(Conversation.workspace_id, func.count())
+            .where(Conversation.workspace_id.in_(ids), Conversation.is_open == True)
+            .group_by(Conversation.workspace_id)
+        ):
+            rows[workspace_id]["new_inquiries"] = count
+
+        for workspace_id, pending, overdue in db.execute(
+            select(Booking.workspace_id, func.count(), count_if(FormSubmission.due_at < now))
+            .select_from(FormSubmission)
+            .join(Booking, Booking.id == FormSubmission.booking_id)
+            .where(Booking.workspace_id.in_(ids), FormSubmission.status == "pending")
+            .group_by(Booking.workspace_id)
+        ):
+            rows[workspace_id].update(pending_forms=pending, overdue_forms=overdue)
+
+        for workspace_id, count in db.execute(
+            select(InventoryItem.workspace_id, func.count())
+            .where(InventoryItem.workspace_id.in_(ids), InventoryItem.quantity <= InventoryItem.low_threshold)
+            .group_by(InventoryItem.workspace_id)
+        ):
+            rows[workspace_id]["low_inventory"] = count
+
+        return rows
+
+    def refresh(self, db: Session, workspace_ids: Optional[List[int]] = None) -> int:
+        """Recompute and store the rows for `workspace_ids` (default: every workspace); commits"""
+        query = select(Workspace.id, Workspace.timezone).order_by(Workspace.id)
+        if workspace_ids is not None:
+            query = query.where(Workspace.id.in_(workspace_ids))
+        workspaces = db.execute(query).all()
+
+        for i in range(0, len(workspaces), STATS_RECONCILE_BATCH):
+            batch = workspaces[i:i + STATS_RECONCILE_BATCH]
+            try:
+                self._store(db, batch)
+            except IntegrityError:
+                # Someone else created a missing row first; it exists now, so update it
+                db.rollback()
+                self._store(db, batch)
+        return len(workspaces)
+
+    def _store(self, db: Session, batch):
+        ids = [workspace_id for workspace_id, _ in batch]
+        existing = set(db.scalars(
+            select(WorkspaceStats.workspace_id).where(WorkspaceStats.workspace_id.in_(ids)).with_for_update()
+        ))
+        rows = self.compute(db, batch)
+        updates = [row for workspace_id, row in rows.items() if workspace_id in existing]
+        inserts = [row for workspace_id, row in rows.items() if workspace_id not in existing]
+        if updates:
+            db.execute(update(WorkspaceStats), updates)
+        if inserts:
+            db.execute(insert(WorkspaceStats), inserts)
+        db.commit()
+        for workspace_id in ids:
+            response_cache.bump(workspace_id)
+
+    def roll_over(self, db: Session) -> int:
+        """
+        Scheduler job: recompute rows whose local day has ended (or that
+        don't exist yet), and recount overdue forms for workspaces with
+        forms that fell due since the previous run
+        """
+        now = datetime.utcnow()
+        stale = list(db.scalars(
+            select(Workspace.id)
+            .outerjoin(WorkspaceStats, WorkspaceStats.workspace_id == Workspace.id)
+            .where(or_(WorkspaceStats.workspace_id.is_(None), WorkspaceStats.day_end <= now))
+        ))
+        if stale:
+            self.refresh(db, stale)
+
+        since = now - timedelta(seconds=STATS_ROLLOVER_INTERVAL * 2)
+        recounted = set(stale)
+        crossed = list(db.scalars(
+            select(Booking.workspace_id).distinct()
+            .select_from(FormSubmission)
+            .join(Booking, Booking.id == FormSubmission.booking_id)
+            .where(FormSubmission.status == "pending", FormSubmission.due_at > since, FormSubmission.due_at <= now)
+        ))
+        crossed = [workspace_id for workspace_id in crossed if workspace_id not in recounted]
+        for i in range(0, len(crossed), STATS_RECONCILE_BATCH):
+            batch = crossed[i:i + STATS_RECONCILE_BATCH]
+            db.scalars(select(WorkspaceStats.workspace_id).where(WorkspaceStats.workspace_id.in_(batch)).with_for_update()).all()
+            counts = dict(db.execute(
+                select(Booking.workspace_id, func.count())
+                .select_from(FormSubmission)
+                .join(Booking, Booking.id == FormSubmission.booking_id)
+                .where(Booking.workspace_id.in_(batch), FormSubmission.status == "pending", FormSubmission.due_at < now)
+                .group_by(Booking.workspace_id)
+            ).all())
+            db.execute(update(WorkspaceStats), [
+                {"workspace_id": workspace_id, "overdue_forms": counts.get(workspace_id, 0)} for workspace_id in batch
+            ])
+            db.commit()
+            for workspace_id in batch:
+                response_cache.bump(workspace_id)
+
+        if stale or crossed:
+            logger.info(f"Workspace stats rollover: {len(stale)} rows recomputed, {len(crossed)} overdue recounts")
+        return len(stale) + len(crossed)
+
+    def reconcile(self, db: Session) -> int:
+        """Scheduler job: recompute every row, correcting drift from writes outside the ORM"""
+        count = self.refresh(db)
+        logger.info(f"Workspace stats reconciled for {count} workspaces")
+        return count
+
+
+# Singleton instance
+workspace_stats = WorkspaceStatsService()
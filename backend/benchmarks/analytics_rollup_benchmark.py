@@ -0,0 +1,138 @@
+"""
+Analytics rollup benchmark - 12-month charts from rollups vs raw scans
+
+Seeds a throwaway SQLite workspace with --bookings bookings created over
+the past year (with completed/no-show/cancelled outcomes and a form
+submission for a third of them), runs the analytics_rollup job once to
+backfill, then compares for a 12-month weekly chart:
+- raw: what an analytics endpoint would do without rollups - read every
+  booking/submission in the range and bucket them
+- rollup: GET /api/analytics/{id}/bookings and /forms (cache bumped
+  before every request, so each one reads the rollup tables)
+
+and checks both agree on the booking counts.
+
+    python -m benchmarks.analytics_rollup_benchmark --bookings 200000 --requests 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'analytics.db')}"
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("REMINDER_ENGINE_ENABLED", "false")
+os.environ["ROLLUP_LAG_SECONDS"] = "0"
+
+from collections import Counter  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.models.models import Booking, Form, FormSubmission, User, Workspace  # noqa: E402
+from app.services.analytics_rollups import analytics_rollups, period_starts  # noqa: E402
+from app.services.auth_service import create_access_token  # noqa: E402
+from app.services.response_cache import response_cache  # noqa: E402
+
+
+def seed(bookings: int):
+    db = SessionLocal()
+    try:
+        user = User(email="analytics@careops.local", hashed_password="x", full_name="Analytics")
+        db.add(user)
+        db.flush()
+        workspace = Workspace(name="analytics", owner_id=user.id, timezone="UTC", contact_email="a@careops.local")
+        db.add(workspace)
+        db.flush()
+        form = Form(workspace_id=workspace.id, name="Intake")
+        db.add(form)
+        db.flush()
+        now = datetime.utcnow() - timedelta(hours=1)
+        rows = []
+        for _ in range(bookings):
+            created_at = now - timedelta(seconds=random.randrange(365 * 86400))
+            rows.append({"workspace_id": workspace.id, "booking_type": random.choice(("consultation", "service", "meeting")),
+                         "scheduled_at": created_at + timedelta(days=random.randrange(1, 14)),
+                         "status": random.choice(("completed",) * 6 + ("no_show", "cancelled", "cancelled", "confirmed")),
+                         "created_at": created_at, "updated_at": created_at})
+        db.execute(insert(Booking), rows)
+        ids = db.scalars(select(Booking.id)).all()
+        created = dict(db.execute(select(Booking.id, Booking.created_at)).all())
+        db.execute(insert(FormSubmission), [
+            {"form_id": form.id, "booking_id": booking_id, "status": "completed",
+             "submitted_at": min(created[booking_id] + timedelta(hours=random.expovariate(1 / 30)), now)}
+            for booking_id in ids[::3]
+        ])
+        db.commit()
+        return workspace.id, create_access_token({"sub": str(user.id)})
+    finally:
+        db.close()
+
+
+def raw_chart(workspace_id, date_from, date_to):
+    """Weekly booking counts straight from the bookings table"""
+    db = SessionLocal()
+    try:
+        counts = Counter()
+        starts = period_starts(date_from, date_to, "week")
+        for created_at, status in db.execute(select(Booking.created_at, Booking.status).where(
+            Booking.workspace_id == workspace_id,
+            Booking.created_at >= datetime.combine(date_from, datetime.min.time()),
+            Booking.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        )):
+            week = created_at.date() - timedelta(days=created_at.weekday())
+            counts[week, status] += 1
+        latencies = db.execute(select(FormSubmission.submitted_at, Booking.created_at)
+                               .join(Booking, Booking.id == FormSubmission.booking_id)
+                               .where(Booking.workspace_id == workspace_id)).all()
+        return [sum(n for (week, _), n in counts.items() if week == start) for start in starts], len(latencies)
+    finally:
+        db.close()
+
+
+def timed(requests, func, *args):
+    started = time.perf_counter()
+    for _ in range(requests):
+        result = func(*args)
+    return (time.perf_counter() - started) / requests, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    import main as app_main
+
+    workspace_id, token = seed(args.bookings)
+    db = SessionLocal()
+    started = time.perf_counter()
+    processed = analytics_rollups.run(db)
+    print(f"backfill: {processed} rows rolled up in {time.perf_counter() - started:.1f} s")
+    db.close()
+
+    date_to = datetime.utcnow().date()
+    date_from = date_to - timedelta(days=364)
+    params = {"token": token, "date_from": date_from.isoformat(), "date_to": date_to.isoformat(), "interval": "week"}
+    with TestClient(app_main.app) as client:
+        def rollup():
+            response_cache.bump(workspace_id)
+            bookings = client.get(f"/api/analytics/{workspace_id}/bookings", params=params)
+            forms = client.get(f"/api/analytics/{workspace_id}/forms", params=params)
+            assert bookings.status_code == forms.status_code == 200, (bookings.text, forms.text)
+            return [period["bookings"] for period in bookings.json()["periods"]]
+
+        raw_time, (raw_weeks, _) = timed(max(1, args.requests // 10), raw_chart, workspace_id, date_from, date_to)
+        rollup_time, rollup_weeks = timed(args.requests, rollup)
+    assert raw_weeks == rollup_weeks, (raw_weeks, rollup_weeks)
+    print(f"12-month weekly chart over {args.bookings} bookings ({len(rollup_weeks)} weeks)")
+    print(f"  raw scan : {raw_time * 1000:9.1f} ms")
+    print(f"  rollups  : {rollup_time * 1000:9.1f} ms  (bookings + forms endpoints)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Async route load test - sync def + Session vs async def + AsyncSession
+
+Serves the bookings list query two ways from one app in a child uvicorn
+process, using the app's own engines and session factories:
+- /sync/{workspace_id}: `def` route on SessionLocal (the shape every route
+  had before), which holds a Starlette threadpool thread while it waits
+- /async/{workspace_id}: `async def` route on AsyncSessionLocal, as the
+  bookings/contacts/inbox/dashboard routers are now
+
+A local SQLite file stands in for the database; --db-latency-ms adds a
+sleep inside the database connection before each query, the way a network
+round trip to PostgreSQL would. The client fires --requests requests with
+--concurrency in flight and reports throughput and latency for each route.
+
+    python -m benchmarks.async_load_test --requests 2000 --concurrency 200 --db-latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def create_app(db_latency_ms: float):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import event, func, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session, selectinload
+
+    from app.database import async_engine, engine, get_async_db, get_db
+    from app.models.models import Booking
+    from app.schemas.schemas import BookingResponse
+
+    def register_sleep(dbapi_connection, connection_record):
+        # Runs on the driver's own thread: the sync worker thread, or aiosqlite's connection thread
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+    event.listen(engine, "connect", register_sleep)
+    event.listen(async_engine.sync_engine, "connect", register_sleep)
+
+    app = FastAPI()
+
+    @app.get("/sync/{workspace_id}", response_model=list[BookingResponse])
+    def list_sync(workspace_id: int, db: Session = Depends(get_db)):
+        db.execute(select(func.sleep_ms(db_latency_ms)))
+        return db.query(Booking).filter(Booking.workspace_id == workspace_id).all()
+
+    @app.get("/async/{workspace_id}", response_model=list[BookingResponse])
+    async def list_async(workspace_id: int, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(select(func.sleep_ms(db_latency_ms)))
+        bookings = await db.scalars(
+            select(Booking).where(Booking.workspace_id == workspace_id).options(selectinload(Booking.contact))
+        )
+        return bookings.all()
+
+    return app
+
+
+def seed(bookings: int) -> int:
+    from datetime import datetime, timedelta
+
+    from app.database import Base, SessionLocal, engine
+    from app.models.models import Booking, Contact, User, Workspace
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        user = User(email="load@careops.local", hashed_password="x", full_name="Load Test")
+        db.add(user)
+        db.flush()
+        workspace = Workspace(name="load", owner_id=user.id)
+        db.add(workspace)
+        db.flush()
+        contact = Contact(workspace_id=workspace.id, name="Load Contact", email="contact@example.com")
+        db.add(contact)
+        db.flush()
+        start = datetime.utcnow()
+        db.add_all([
+            Booking(workspace_id=workspace.id, contact_id=contact.id, booking_type="consultation",
+                    scheduled_at=start + timedelta(hours=i), duration_minutes=60, status="confirmed")
+            for i in range(bookings)
+        ])
+        db.commit()
+        return workspace.id
+    finally:
+        db.close()
+
+
+async def _worker(host: str, port: int, path: str, count: int, latencies: list):
+    # Minimal keep-alive HTTP/1.1 client: httpx's pool itself becomes the
+    # bottleneck at a few hundred concurrent connections
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            writer.write(request)
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            assert b" 200 " in status, body
+    finally:
+        writer.close()
+
+
+async def hammer(url: str, requests: int, concurrency: int):
+    target = httpx.URL(url)
+    latencies = []
+    counts = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(target.host, target.port, target.raw_path.decode(), count, latencies) for count in counts if count
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=20)
+    parser.add_argument("--bookings", type=int, default=20, help="rows returned per request")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        uvicorn.run(create_app(args.db_latency_ms), host="127.0.0.1", port=args.serve, log_level="warning", timeout_keep_alive=120)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), "load.db")
+    # Large enough that the pool isn't what limits either route
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "DB_POOL_SIZE": str(args.concurrency),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_ASYNC_POOL_SIZE": str(args.concurrency),
+        "DB_ASYNC_MAX_OVERFLOW": "0",
+        "DB_POOL_TIMEOUT": "120",
+    }
+    os.environ.update(env)
+    workspace_id = seed(args.bookings)
+
+    port = free_port()
+    command = [sys.executable, "-m", "benchmarks.async_load_test", "--serve", str(port),
+               "--db-latency-ms", str(args.db_latency_ms)]
+    server = subprocess.Popen(command, env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                httpx.get(f"{base}/docs", timeout=0.2)
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        results = {}
+        for route in ("sync", "async"):
+            # Warm the pool so both routes start with open connections
+            asyncio.run(hammer(f"{base}/{route}/{workspace_id}", args.concurrency, args.concurrency))
+            results[route] = asyncio.run(hammer(f"{base}/{route}/{workspace_id}", args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} db_latency={args.db_latency_ms}ms rows={args.bookings}")
+    for route, label in (("sync", "def + Session (before)"), ("async", "async def + AsyncSession")):
+        r = results[route]
+        print(f"  {label:<26}: {r['rps']:8.1f} req/sec  p50 {r['p50_ms']:7.1f} ms  p99 {r['p99_ms']:7.1f} ms")
+    print(f"  speedup                   : {results['async']['rps'] / results['sync']['rps']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
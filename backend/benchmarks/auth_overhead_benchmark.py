@@ -0,0 +1,71 @@
+"""
+Auth overhead benchmark - per-request token resolution cost
+
+Times, per call, resolving a request's user from its token:
+- decode: what every route did before - HMAC-verify and JSON-decode the
+  JWT with auth_service.decode_token (the inbox routes did this twice
+  when the staff check failed)
+- cached: app.services.principal.user_id_from_token with the token
+  already verified (the steady state for a client polling with one token)
+- miss: the same with the cache cleared before every call, i.e. a
+  token's first request
+
+over --tokens distinct tokens, and checks that a cached token stops
+resolving once its `exp` passes.
+
+    python -m benchmarks.auth_overhead_benchmark --calls 20000 --tokens 100
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from fastapi import HTTPException
+
+from app.services.auth_service import create_access_token, decode_token, token_cache
+from app.services.principal import user_id_from_token
+
+
+def timed(calls, tokens, func):
+    started = time.perf_counter()
+    for i in range(calls):
+        func(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": str(i)}) for i in range(1, args.tokens + 1)]
+
+    def uncached(token):
+        token_cache._entries.clear()
+        return user_id_from_token(token)
+
+    decode = timed(args.calls, tokens, lambda token: int(decode_token(token)["sub"]))
+    miss = timed(args.calls, tokens, uncached)
+    for token in tokens:
+        user_id_from_token(token)
+    cached = timed(args.calls, tokens, user_id_from_token)
+
+    short = create_access_token({"sub": "1"}, timedelta(seconds=1))
+    assert user_id_from_token(short) == 1
+    # jose compares exp against whole seconds, so wait past the next one
+    time.sleep(2.1)
+    try:
+        user_id_from_token(short)
+        raise AssertionError("expired token resolved from the cache")
+    except HTTPException as e:
+        assert e.status_code == 401
+
+    print(f"{args.calls} resolutions over {args.tokens} tokens")
+    print(f"  decode : {decode * 1e6:8.1f} us")
+    print(f"  miss   : {miss * 1e6:8.1f} us")
+    print(f"  cached : {cached * 1e6:8.1f} us")
+    print(f"  cache  : {token_cache.status()}")
+
+
+if __name__ == "__main__":
+    main()
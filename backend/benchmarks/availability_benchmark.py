@@ -0,0 +1,135 @@
+"""
+Availability benchmark - free-slot search over a year of dense bookings
+
+Seeds a throwaway SQLite workspace with a year of back-to-back bookings
+(15-60 minutes with short gaps, 08:00-18:00 every day, at --locations
+locations) and compares, for a one-week and a one-month window:
+- client diff: what the booking widget did before - page through
+  GET /api/bookings/{id}/list (every booking ever) and sweep locally
+- server: GET /api/bookings/{id}/availability uncached, then cached
+
+reporting time per search and bytes transferred.
+
+    python -m benchmarks.availability_benchmark --locations 3 --searches 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'availability.db')}"
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("REMINDER_ENGINE_ENABLED", "false")
+
+from datetime import date, datetime, timedelta, timezone  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.models.models import Booking, Contact, User, Workspace  # noqa: E402
+from app.services.auth_service import create_access_token  # noqa: E402
+from app.services.availability import DEFAULT_WORKING_HOURS, availability, free_slots, working_windows  # noqa: E402
+
+YEAR_START = date(2030, 1, 1)
+LOCATION = "Room 0"
+
+
+def seed(locations: int):
+    db = SessionLocal()
+    try:
+        user = User(email="availability@careops.local", hashed_password="x", full_name="Availability")
+        db.add(user)
+        db.flush()
+        workspace = Workspace(name="availability", owner_id=user.id, timezone="UTC", contact_email="a@careops.local")
+        db.add(workspace)
+        db.flush()
+        contact = Contact(workspace_id=workspace.id, name="Client", email="client@example.com")
+        db.add(contact)
+        db.flush()
+        rows = []
+        for offset in range(365):
+            day = datetime.combine(YEAR_START + timedelta(days=offset), datetime.min.time())
+            for location in range(locations):
+                cursor = day + timedelta(hours=8)
+                while cursor < day + timedelta(hours=18):
+                    duration = random.choice((15, 30, 45, 60))
+                    rows.append({"workspace_id": workspace.id, "contact_id": contact.id, "booking_type": "service",
+                                 "scheduled_at": cursor, "duration_minutes": duration, "location": f"Room {location}",
+                                 "status": random.choice(("confirmed",) * 9 + ("cancelled",))})
+                    cursor += timedelta(minutes=duration + random.choice((0, 0, 15, 30)))
+        db.execute(insert(Booking), rows)
+        db.commit()
+        return workspace.id, create_access_token({"sub": str(user.id)}), len(rows)
+    finally:
+        db.close()
+
+
+def client_diff(client, workspace_id, token, date_from, days):
+    """Page through every booking, then find the free slots locally"""
+    received, busy, cursor = 0, [], None
+    while True:
+        params = {"token": token, "limit": 200, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/bookings/{workspace_id}/list", params=params)
+        received += len(response.content)
+        for booking in response.json():
+            if booking["location"] == LOCATION and booking["status"] != "cancelled":
+                start = datetime.fromisoformat(booking["scheduled_at"])
+                busy.append((start, start + timedelta(minutes=booking["duration_minutes"])))
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    busy.sort()
+    slots = [free_slots(working_windows(DEFAULT_WORKING_HOURS, timezone.utc, day), busy, timedelta(minutes=30))
+             for day in (date_from + timedelta(days=i) for i in range(days))]
+    return received, sum(len(day) for day in slots)
+
+
+def server(client, workspace_id, token, date_from, days):
+    response = client.get(f"/api/bookings/{workspace_id}/availability", params={
+        "token": token, "date_from": date_from.isoformat(),
+        "date_to": (date_from + timedelta(days=days - 1)).isoformat(), "slot_minutes": 30, "location": LOCATION
+    })
+    assert response.status_code == 200, response.text
+    return len(response.content), sum(len(day["slots"]) for day in response.json()["days"])
+
+
+def timed(searches, func, *args):
+    started = time.perf_counter()
+    for _ in range(searches):
+        result = func(*args)
+    return (time.perf_counter() - started) / searches, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--searches", type=int, default=20)
+    args = parser.parse_args()
+
+    import main as app_main
+
+    workspace_id, token, bookings = seed(args.locations)
+    print(f"{bookings} bookings over a year at {args.locations} locations")
+    with TestClient(app_main.app) as client:
+        for days in (7, 31):
+            date_from = YEAR_START + timedelta(days=180)
+            diff_time, (diff_bytes, diff_slots) = timed(1, client_diff, client, workspace_id, token, date_from, days)
+
+            def uncached():
+                availability.cache.invalidate(workspace_id, [date_from + timedelta(days=i) for i in range(days)])
+                return server(client, workspace_id, token, date_from, days)
+
+            cold_time, (cold_bytes, cold_slots) = timed(args.searches, uncached)
+            warm_time, _ = timed(args.searches, server, client, workspace_id, token, date_from, days)
+            # The 2030 window is in the future, so no slot is dropped as past
+            assert diff_slots == cold_slots, (diff_slots, cold_slots)
+            print(f"{days}-day search ({cold_slots} free 30-minute slots)")
+            print(f"  client diff     : {diff_time * 1000:9.1f} ms  {diff_bytes / 1024:9.1f} KiB")
+            print(f"  server uncached : {cold_time * 1000:9.1f} ms  {cold_bytes / 1024:9.1f} KiB")
+            print(f"  server cached   : {warm_time * 1000:9.1f} ms  {cold_bytes / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Booking conflict benchmark - overlap check cost as a location fills up
+
+Seeds one workspace location with back-to-back bookings in a throwaway
+SQLite database, in steps up to --bookings, and at each step times:
+- indexed: app.services.booking_conflicts.find_conflicts (bounded range
+  scan on (workspace_id, location, scheduled_at))
+- naive: load every active booking at the location and test each one
+
+for random requested slots, reporting the average time per check and how
+many rows the naive check reads. The indexed check should stay flat.
+
+    python -m benchmarks.booking_conflict_benchmark --bookings 100000 --checks 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'conflicts.db')}"
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.models.models import Booking, User, Workspace  # noqa: E402
+from app.services.booking_conflicts import booking_end, find_conflicts  # noqa: E402
+
+LOCATION = "Room 1"
+START = datetime(2030, 1, 1)
+
+
+def seed(workspace_id: int, first: int, last: int):
+    """Bookings first..last-1: 45 minutes each, one per hour"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(Booking), [
+            {"workspace_id": workspace_id, "contact_id": None, "booking_type": "service", "location": LOCATION,
+             "scheduled_at": START + timedelta(hours=i), "duration_minutes": 45, "status": "confirmed"}
+            for i in range(first, last)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def naive_conflicts(db, workspace_id: int, scheduled_at: datetime, duration_minutes: int):
+    bookings = (await db.scalars(select(Booking).where(
+        Booking.workspace_id == workspace_id, Booking.location == LOCATION, Booking.status != "cancelled"
+    ))).all()
+    end = booking_end(scheduled_at, duration_minutes)
+    conflicts = [b for b in bookings if b.scheduled_at < end and booking_end(b.scheduled_at, b.duration_minutes) > scheduled_at]
+    return conflicts, len(bookings)
+
+
+async def measure(workspace_id: int, total: int, checks: int):
+    slots = [START + timedelta(minutes=random.randrange(total * 60)) for _ in range(checks)]
+    results = {}
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        indexed = [await find_conflicts(db, workspace_id, LOCATION, slot, 30) for slot in slots]
+        results["indexed"] = (time.perf_counter() - started) / checks
+        db.expunge_all()
+        started = time.perf_counter()
+        # The naive check is slow enough that a few samples will do
+        naive = [await naive_conflicts(db, workspace_id, slot, 30) for slot in slots[:5]]
+        results["naive"] = (time.perf_counter() - started) / len(naive)
+        db.expunge_all()
+    # Both must agree on what conflicts
+    for found, (expected, _) in zip(indexed, naive):
+        assert sorted(b.id for b in found) == sorted(b.id for b in expected)
+    return results, naive[0][1]
+
+
+async def run(args):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="conflicts@careops.local", hashed_password="x", full_name="Conflicts")
+    db.add(user)
+    db.flush()
+    workspace = Workspace(name="conflicts", owner_id=user.id)
+    db.add(workspace)
+    db.commit()
+    workspace_id = workspace.id
+    db.close()
+
+    seeded = 0
+    step = 1000
+    print(f"{'bookings':>9}  {'indexed':>11}  {'naive':>11}  rows read (naive)")
+    while seeded < args.bookings:
+        target = min(args.bookings, step)
+        seed(workspace_id, seeded, target)
+        seeded = target
+        results, scanned = await measure(workspace_id, seeded, args.checks)
+        print(f"{seeded:>9}  {results['indexed'] * 1000:8.3f} ms  {results['naive'] * 1000:8.3f} ms  {scanned}")
+        step *= 10
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
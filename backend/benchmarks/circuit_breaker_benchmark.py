@@ -0,0 +1,78 @@
+"""
+Circuit breaker benchmark - cost of a send while the SMTP server is hung
+
+Runs a TCP listener that accepts connections but never answers (an SMTP
+server that is down in the worst way), then times EmailService.send_email
+against it with the breaker effectively disabled and with the default
+breaker settings.
+
+    python -m benchmarks.circuit_breaker_benchmark --messages 20 --timeout 1
+"""
+import argparse
+import socket
+import threading
+import time
+
+from app.integrations.circuit_breaker import CircuitBreaker
+from app.integrations.email_service import EmailService, SMTPConnectionPool
+
+
+def start_blackhole() -> socket.socket:
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(128)
+    held = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener
+
+
+def run(port: int, messages: int, timeout: float, breaker: CircuitBreaker):
+    service = EmailService()
+    service.sender_email = "bench@careops.local"
+    service.pool = SMTPConnectionPool("127.0.0.1", port, None, None, use_tls=False, max_size=1, timeout=timeout)
+    service.breaker = breaker
+    latencies = []
+    for i in range(messages):
+        started = time.perf_counter()
+        result = service.send_email(f"user{i}@example.com", "bench", "<p>hello</p>")
+        latencies.append(time.perf_counter() - started)
+        assert result["status"] == "failed", result
+    return latencies
+
+
+def describe(label: str, latencies):
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    print(f"  {label:<16}: total {sum(latencies):7.3f}s  p50 {p50 * 1e6:12.1f} us  max {ordered[-1] * 1e6:12.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=1.0, help="SMTP socket timeout in seconds")
+    args = parser.parse_args()
+
+    listener = start_blackhole()
+    port = listener.getsockname()[1]
+    try:
+        without = run(port, args.messages, args.timeout, CircuitBreaker("smtp-off", failure_threshold=10 ** 9))
+        with_breaker = run(port, args.messages, args.timeout, CircuitBreaker("smtp"))
+    finally:
+        listener.close()
+
+    print(f"messages={args.messages} smtp_timeout={args.timeout}s (server accepts but never replies)")
+    describe("no breaker", without)
+    describe("with breaker", with_breaker)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Dashboard query-count check - GET /api/dashboard must stay a fixed number of statements
+
+Seeds a throwaway SQLite workspace with bookings, conversations (with
+messages), form submissions and inventory, calls the dashboard through the
+app and counts the SQL statements it sends. Exits non-zero if the count
+exceeds --max-queries or grows with the amount of data.
+
+Between calls it also updates and deletes some of the seeded rows, and
+checks the incrementally maintained counters the dashboard reports against
+a from-scratch recount. Finally it re-polls with the returned ETag, which
+must be answered 304 from the response cache without any statements.
+
+    python -m benchmarks.dashboard_query_count
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'dashboard.db')}"
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("REMINDER_ENGINE_ENABLED", "false")
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, count_queries  # noqa: E402
+from app.models.models import (  # noqa: E402
+    Booking, Contact, Conversation, FormSubmission, InventoryItem, Message, User, Workspace, WorkspaceStats
+)
+from app.services.auth_service import create_access_token  # noqa: E402
+from app.services.response_cache import response_cache  # noqa: E402
+from app.services.workspace_stats import COUNTERS, workspace_stats  # noqa: E402
+
+
+def seed(db, workspace_id: int, rows: int):
+    now = datetime.utcnow()
+    for i in range(rows):
+        contact = Contact(workspace_id=workspace_id, name=f"Contact {i}", email=f"c{i}@example.com")
+        db.add(contact)
+        db.flush()
+        conversation = Conversation(workspace_id=workspace_id, contact_id=contact.id, is_open=i % 2 == 0)
+        db.add(conversation)
+        db.flush()
+        db.add_all([
+            Message(conversation_id=conversation.id, sender_type="system", sender_name="CareOps",
+                    content=f"message {j}", channel="system")
+            for j in range(3)
+        ])
+        booking = Booking(workspace_id=workspace_id, contact_id=contact.id, booking_type="consultation",
+                          scheduled_at=now + timedelta(hours=i * 6), duration_minutes=60, status="confirmed")
+        db.add(booking)
+        db.flush()
+        db.add(FormSubmission(form_id=1, booking_id=booking.id, status="pending" if i % 3 else "completed",
+                              due_at=now + timedelta(days=i - rows // 2)))
+        db.add(InventoryItem(workspace_id=workspace_id, name=f"Item {i}", quantity=i, low_threshold=5))
+    db.commit()
+
+
+def churn(db, workspace_id: int):
+    """Updates and deletes that the workspace_stats deltas must follow"""
+    now = datetime.utcnow()
+    for conversation in db.query(Conversation).filter(Conversation.workspace_id == workspace_id).limit(3):
+        conversation.is_open = not conversation.is_open
+    for booking in db.query(Booking).filter(Booking.workspace_id == workspace_id).limit(4):
+        booking.scheduled_at = now + timedelta(minutes=1)
+    for submission in db.query(FormSubmission).filter(FormSubmission.status == "pending").limit(2):
+        submission.status = "completed"
+    for item in db.query(InventoryItem).filter(InventoryItem.workspace_id == workspace_id).limit(3):
+        item.quantity += 10
+    booking = db.query(Booking).filter(Booking.workspace_id == workspace_id).order_by(Booking.id.desc()).first()
+    for submission in db.query(FormSubmission).filter(FormSubmission.booking_id == booking.id):
+        db.delete(submission)
+    db.delete(booking)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-queries", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true", help="print the statements")
+    args = parser.parse_args()
+
+    import main as app_main
+
+    db = SessionLocal()
+    user = User(email="dash@careops.local", hashed_password="x", full_name="Dashboard")
+    db.add(user)
+    db.flush()
+    workspace = Workspace(name="dash", owner_id=user.id)
+    db.add(workspace)
+    db.commit()
+    # Read once: the committed objects would reload inside the counted block
+    workspace_id = workspace.id
+    token = create_access_token({"sub": str(user.id)})
+
+    counts = []
+    counts_ok = True
+    with TestClient(app_main.app) as client:
+        for rows in (5, 50):
+            seed(db, workspace_id, rows)
+            churn(db, workspace_id)
+            # Written straight through the ORM, not a router, so invalidate by hand
+            response_cache.bump(workspace_id)
+            with count_queries() as statements:
+                response = client.get(f"/api/dashboard/{workspace_id}", params={"token": token})
+            assert response.status_code == 200, response.text
+            counts.append(len(statements))
+            if args.verbose:
+                print("\n\n".join(statements))
+            print(f"{rows:>4} rows seeded: {len(statements)} statements, stats={response.json()['stats']}")
+            expected = workspace_stats.compute(db, [(workspace_id, "UTC")])[workspace_id]
+            stored = db.get(WorkspaceStats, workspace_id, populate_existing=True)
+            drift = {name: (getattr(stored, name), expected[name]) for name in COUNTERS if getattr(stored, name) != expected[name]}
+            counts_ok = counts_ok and not drift
+            if drift:
+                print(f"     counters drifted (stored, recounted): {drift}")
+        with count_queries() as statements:
+            revalidated = client.get(f"/api/dashboard/{workspace_id}", params={"token": token},
+                                     headers={"If-None-Match": response.headers["ETag"]})
+        not_modified = revalidated.status_code == 304 and not statements
+    db.close()
+
+    failed = max(counts) > args.max_queries or counts[0] != counts[-1]
+    print(f"{'FAIL' if failed else 'ok'}: dashboard uses {counts[-1]} statements (max {args.max_queries})")
+    print(f"{'ok' if counts_ok else 'FAIL'}: stored counters match a recount")
+    print(f"{'ok' if not_modified else 'FAIL'}: If-None-Match poll answered {revalidated.status_code} with {len(statements)} statements")
+    failed = failed or not counts_ok or not not_modified
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Fake Twilio Messages endpoint for SMS tests and throughput benchmarks
+
+Serves POST /2010-04-01/Accounts/{sid}/Messages.json like Twilio does, with
+optional latency and a share of 429/503 responses to exercise retries.
+Point SMSService at it with TWILIO_API_BASE=http://127.0.0.1:8099. With
+--tls it serves HTTPS on a throwaway self-signed certificate (needs the
+openssl CLI) so connection setup costs a real TLS handshake, as with Twilio.
+
+    python -m benchmarks.fake_twilio --port 8099 --latency 0.05 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import subprocess
+import tempfile
+
+from fastapi import FastAPI, Form, Response
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.0, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Twilio")
+    app.state.stats = {"requests": 0, "accepted": 0, "throttled": 0, "errors": 0}
+    counter = itertools.count(1)
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def create_message(account_sid: str, To: str = Form(...), From: str = Form(...), Body: str = Form(...)):
+        stats = app.state.stats
+        stats["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            if random.random() < 0.5:
+                stats["throttled"] += 1
+                return JSONResponse(
+                    {"code": 20429, "message": "Too Many Requests"},
+                    status_code=429,
+                    headers={"Retry-After": "0"}
+                )
+            stats["errors"] += 1
+            return JSONResponse({"code": 20500, "message": "Service Unavailable"}, status_code=503)
+        stats["accepted"] += 1
+        return JSONResponse(
+            {"sid": f"SM{next(counter):032d}", "to": To, "from": From, "body": Body, "status": "queued"},
+            status_code=201
+        )
+
+    @app.get("/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+def self_signed_cert(directory: str):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+        "-subj", "/CN=127.0.0.1", "-keyout", keyfile, "-out", certfile
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Twilio Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS on a self-signed certificate")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate)
+    with tempfile.TemporaryDirectory() as directory:
+        ssl_options = {}
+        if args.tls:
+            certfile, keyfile = self_signed_cert(directory)
+            ssl_options = {"ssl_certfile": certfile, "ssl_keyfile": keyfile}
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning", **ssl_options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Inventory forecast benchmark - vectorized projection vs a per-item loop
+
+Builds a random per-day booking schedule and --items inventory items and
+times, for --weeks weeks:
+- loop: walk every item day by day in Python, as a straightforward
+  implementation would
+- numpy: app.services.inventory_forecast.project (one outer product and
+  two masked argmax)
+
+checking both find the same low and stock-out days.
+
+    python -m benchmarks.inventory_forecast_benchmark --items 2000 --weeks 26
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.inventory_forecast import NO_THRESHOLD, project
+
+
+def loop(quantity, per_booking, threshold, daily, later):
+    low, stockout = [], []
+    for q, per, limit in zip(quantity, per_booking, threshold):
+        after = later + sum(daily)
+        first_low = first_out = -1
+        for day, count in enumerate(daily):
+            after -= count
+            level = q + per * after
+            if first_low < 0 and limit is not None and level <= limit:
+                first_low = day
+            if first_out < 0 and level < 0:
+                first_out = day
+        low.append(first_low)
+        stockout.append(first_out)
+    return low, stockout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=26)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    days = args.weeks * 7
+    daily = [random.randrange(0, 40) for _ in range(days)]
+    later = random.randrange(0, 500)
+    quantity = [random.randrange(-200, 500) for _ in range(args.items)]
+    per_booking = [random.choice((0, 1, 1, 2, 5)) for _ in range(args.items)]
+    threshold = [random.choice((None, 5, 20, 100)) for _ in range(args.items)]
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        expected = loop(quantity, per_booking, threshold, daily, later)
+    loop_time = (time.perf_counter() - started) / args.runs
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        _, low, stockout = project(
+            np.array(quantity, dtype=np.int64), np.array(per_booking, dtype=np.int64),
+            np.array([NO_THRESHOLD if t is None else t for t in threshold], dtype=np.int64),
+            np.array(daily, dtype=np.int64), later
+        )
+    numpy_time = (time.perf_counter() - started) / args.runs
+
+    assert (low.tolist(), stockout.tolist()) == expected
+    print(f"{args.items} items x {days} days")
+    print(f"  loop  : {loop_time * 1000:8.2f} ms")
+    print(f"  numpy : {numpy_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Response cache benchmark - list/dashboard polls with and without the cache
+
+Seeds a throwaway SQLite workspace, then polls GET /api/contacts/{id}/list
+and GET /api/dashboard/{id} through the app three ways:
+- uncached: the response cache disabled (every poll queries and serializes)
+- cached: plain GETs answered from the versioned cache
+- revalidated: GETs with If-None-Match, answered 304
+
+and reports polls/sec and SQL statements per poll for each.
+
+    python -m benchmarks.response_cache_benchmark --contacts 500 --polls 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cache.db')}"
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("REMINDER_ENGINE_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, count_queries  # noqa: E402
+from app.models.models import Contact, Conversation, User, Workspace  # noqa: E402
+from app.services.auth_service import create_access_token  # noqa: E402
+from app.services.response_cache import response_cache  # noqa: E402
+
+
+def seed(contacts: int):
+    db = SessionLocal()
+    try:
+        user = User(email="cache@careops.local", hashed_password="x", full_name="Cache")
+        db.add(user)
+        db.flush()
+        workspace = Workspace(name="cache", owner_id=user.id)
+        db.add(workspace)
+        db.flush()
+        for i in range(contacts):
+            contact = Contact(workspace_id=workspace.id, name=f"Contact {i}", email=f"c{i}@example.com", phone="+15550100")
+            db.add(contact)
+            db.flush()
+            db.add(Conversation(workspace_id=workspace.id, contact_id=contact.id))
+        db.commit()
+        return workspace.id, create_access_token({"sub": str(user.id)})
+    finally:
+        db.close()
+
+
+def poll(client, path, token, polls, revalidate=False):
+    headers = {}
+    if revalidate:
+        headers["If-None-Match"] = client.get(path, params={"token": token}).headers["ETag"]
+    else:
+        client.get(path, params={"token": token})  # warm up / fill the cache
+    with count_queries() as statements:
+        started = time.perf_counter()
+        for _ in range(polls):
+            response = client.get(path, params={"token": token}, headers=headers)
+            assert response.status_code == (304 if revalidate else 200), response.status_code
+        elapsed = time.perf_counter() - started
+    return polls / elapsed, len(statements) / polls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=500)
+    args = parser.parse_args()
+
+    import main as app_main
+
+    workspace_id, token = seed(args.contacts)
+    with TestClient(app_main.app) as client:
+        for path in (f"/api/contacts/{workspace_id}/list", f"/api/dashboard/{workspace_id}"):
+            print(f"GET {path} ({args.contacts} contacts, {args.polls} polls)")
+            response_cache.enabled = False
+            results = {"uncached": poll(client, path, token, args.polls)}
+            response_cache.enabled = True
+            results["cached"] = poll(client, path, token, args.polls)
+            results["revalidated (304)"] = poll(client, path, token, args.polls, revalidate=True)
+            for label, (rate, statements) in results.items():
+                print(f"  {label:<18}: {rate:8.1f} polls/sec  {statements:4.1f} statements/poll")
+            print(f"  speedup           : {results['revalidated (304)'][0] / results['uncached'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
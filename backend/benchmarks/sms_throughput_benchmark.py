@@ -0,0 +1,122 @@
+"""
+SMS throughput benchmark - bare requests.post vs the pooled async path
+
+Starts the fake Twilio endpoint (HTTPS by default) in a child process, then
+sends the same batch once with a fresh requests.post per message (the
+pre-pool behaviour) and once through SMSService.send_sms_async with bounded
+concurrency.
+
+    python -m benchmarks.sms_throughput_benchmark --messages 300 --latency 0.02
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+import urllib3
+
+from app.integrations.sms_service import SMSService, TokenBucket
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_service(api_base: str) -> SMSService:
+    service = SMSService()
+    service.account_sid, service.auth_token, service.from_number = "ACbench", "token", "+15550000000"
+    service.api_url = f"{api_base}/2010-04-01/Accounts/ACbench/Messages.json"
+    service.is_configured = True
+    service.rate_limiter = TokenBucket(rate=1e9, capacity=1e9)
+    # The fake endpoint uses a throwaway self-signed certificate
+    service.transport = httpx.AsyncHTTPTransport(
+        verify=False,
+        limits=httpx.Limits(max_connections=service.max_connections, max_keepalive_connections=service.max_connections)
+    )
+    return service
+
+
+def send_unpooled(service: SMSService, count: int, concurrency: int):
+    def send(i):
+        response = requests.post(
+            service.api_url,
+            data={"From": service.from_number, "To": f"+1555{i:07d}", "Body": "bench"},
+            auth=(service.account_sid, service.auth_token),
+            verify=False
+        )
+        assert response.status_code == 201
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(count)))
+
+
+async def send_pooled(service: SMSService, count: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i):
+        async with semaphore:
+            result = await service.send_sms_async(f"+1555{i:07d}", "bench")
+            assert result["status"] == "sent", result
+
+    await asyncio.gather(*(send(i) for i in range(count)))
+    await service.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake Twilio response latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 429/503 responses (runs the async path only)")
+    parser.add_argument("--plain-http", action="store_true", help="skip TLS on the fake endpoint")
+    args = parser.parse_args()
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    port = free_port()
+    scheme = "http" if args.plain_http else "https"
+    api_base = f"{scheme}://127.0.0.1:{port}"
+    command = [
+        sys.executable, "-m", "benchmarks.fake_twilio", "--port", str(port),
+        "--latency", str(args.latency), "--error-rate", str(args.error_rate)
+    ]
+    server = subprocess.Popen(command if args.plain_http else command + ["--tls"])
+    try:
+        for _ in range(200):
+            try:
+                requests.get(f"{api_base}/stats", timeout=0.2, verify=False)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.05)
+
+        service = make_service(api_base)
+        if not args.error_rate:
+            start = time.perf_counter()
+            send_unpooled(service, args.messages, args.concurrency)
+            unpooled = args.messages / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(send_pooled(service, args.messages, args.concurrency))
+        pooled = args.messages / (time.perf_counter() - start)
+        stats = requests.get(f"{api_base}/stats", verify=False).json()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"messages={args.messages} concurrency={args.concurrency} latency={args.latency}s {scheme}")
+    if not args.error_rate:
+        print(f"  requests.post per message : {unpooled:8.1f} sms/sec")
+        print(f"  async keep-alive client   : {pooled:8.1f} sms/sec  ({pooled / unpooled:.1f}x)")
+    else:
+        print(f"  async keep-alive client   : {pooled:8.1f} sms/sec with retries")
+    print(f"  fake twilio stats         : {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+SMTP pool benchmark - emails/sec with and without pooled sessions
+
+Runs a local SMTP stand-in that charges a fixed delay per new connection
+(standing in for TCP + STARTTLS + AUTH round trips), then sends the same
+batch of messages the old way (connect per message) and through the pool.
+
+    python -m benchmarks.smtp_pool_benchmark --messages 200 --connect-delay 0.05
+"""
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.integrations.email_service import EmailService, SMTPConnectionPool
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    connect_delay = 0.05
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+        self.wfile.flush()
+
+    def handle(self):
+        time.sleep(self.connect_delay)
+        self.reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="ignore").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-stand-in")
+                self.reply("250 SIZE 10485760")
+            elif command.startswith("HELO"):
+                self.reply("250 stand-in")
+            elif command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.reply("250 OK queued")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def send_unpooled(host: str, port: int, count: int, concurrency: int):
+    """Pre-pool behaviour: a fresh session per message"""
+    def send(i):
+        with smtplib.SMTP(host, port) as server:
+            server.sendmail("bench@careops.local", f"user{i}@example.com", "Subject: bench\r\n\r\nhello")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(count)))
+
+
+def send_pooled(host: str, port: int, count: int, concurrency: int):
+    service = EmailService()
+    service.sender_email = "bench@careops.local"
+    service.pool = SMTPConnectionPool(host, port, None, None, use_tls=False, max_size=concurrency)
+
+    def send(i):
+        result = service.send_email(f"user{i}@example.com", "bench", "<p>hello</p>")
+        assert result["status"] == "sent", result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(count)))
+    service.close()
+    return service.pool.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--connect-delay", type=float, default=0.05, help="seconds charged per new SMTP session")
+    args = parser.parse_args()
+
+    StandInSMTPHandler.connect_delay = args.connect_delay
+    server = StandInSMTPServer(("127.0.0.1", 0), StandInSMTPHandler)
+    host, port = server.server_address
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        start = time.perf_counter()
+        send_unpooled(host, port, args.messages, args.concurrency)
+        unpooled = args.messages / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        stats = send_pooled(host, port, args.messages, args.concurrency)
+        pooled = args.messages / (time.perf_counter() - start)
+    finally:
+        server.shutdown()
+
+    print(f"messages={args.messages} concurrency={args.concurrency} connect_delay={args.connect_delay}s")
+    print(f"  connect per message : {unpooled:8.1f} emails/sec")
+    print(f"  pooled sessions     : {pooled:8.1f} emails/sec  ({pooled / unpooled:.1f}x)")
+    print(f"  pool stats          : {stats}")
+
+
+if __name__ == "__main__":
+    main()
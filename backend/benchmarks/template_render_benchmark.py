@@ -0,0 +1,60 @@
+"""
+Template render benchmark - renders/sec with and without the compiled cache
+
+Compares three ways of producing the booking confirmation email:
+- parse: parse the template source on every render (what an uncached
+  engine does)
+- compiled: render the precompiled default template
+- override: render a workspace override, either looked up on every render
+  (--ttl 0) or served from the registry's LRU; the lookup is a stand-in that
+  sleeps --lookup-delay seconds per call in place of the database round trip
+
+    python -m benchmarks.template_render_benchmark --renders 20000
+"""
+import argparse
+import time
+
+from app.integrations.templates import DEFAULT_TEMPLATES, CompiledTemplate, TemplateRegistry
+
+CONTEXT = {
+    "booking_type": "Initial Consultation",
+    "scheduled_at": "March 03, 2026 at 10:30 AM",
+    "duration_minutes": 45,
+}
+
+
+def timed(label: str, renders: int, func):
+    started = time.perf_counter()
+    for _ in range(renders):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {renders / elapsed:>12,.0f} renders/sec  ({elapsed * 1e6 / renders:.2f} us each)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=20000)
+    parser.add_argument("--lookup-delay", type=float, default=0.001, help="seconds per stand-in override lookup")
+    args = parser.parse_args()
+
+    parts = DEFAULT_TEMPLATES["email.booking_confirmation"]
+    compiled = CompiledTemplate("email.booking_confirmation", parts)
+
+    def lookup(workspace_id, name, locale):
+        time.sleep(args.lookup_delay)
+        return {"subject": "Your booking is confirmed", "html": None, "text": None}
+
+    uncached = TemplateRegistry(ttl=0, override_loader=lookup)
+    cached = TemplateRegistry(override_loader=lookup)
+    # Lookups sleep, so time the uncached path on fewer renders
+    lookup_renders = max(1, min(args.renders, int(1 / max(args.lookup_delay, 1e-6))))
+
+    timed("parse every render", args.renders, lambda: CompiledTemplate("email.booking_confirmation", parts).render(CONTEXT))
+    timed("compiled", args.renders, lambda: compiled.render(CONTEXT))
+    timed("override, no cache", lookup_renders, lambda: uncached.render("email.booking_confirmation", CONTEXT, 1))
+    timed("override, cached", args.renders, lambda: cached.render("email.booking_confirmation", CONTEXT, 1))
+    print(f"cache stats: {cached.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import os
 import re
 from dotenv import load_dotenv
@@ -9,10 +11,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import routes
-from app.routes import auth, workspace, contacts, bookings, inbox, dashboard, forms, inventory
+from app.routes import auth, workspace, contacts, bookings, inbox, dashboard, forms, inventory, analytics
 
 # Initialize database
-from app.database import engine, Base
+from app.database import engine, async_engine, Base, check_database, pool_status
+from app.services.notification_dispatcher import notification_dispatcher
+from app.integrations.email_service import email_service
+from app.integrations.sms_service import sms_service
+from app.integrations.circuit_breaker import breaker_status
+from app.services.scheduler import scheduler, SCHEDULER_ENABLED
+from app.services.automation_service import automation_service
+from app.services.reminder_engine import reminder_engine, REMINDER_ENGINE_ENABLED
+from app.services.notification_coalescer import notification_coalescer
+from app.services.response_cache import response_cache
+from app.services.auth_service import token_cache
+from app.services.inbox_events import inbox_events
+from app.services import conversation_summary  # noqa: F401 - registers the inbox summary hook
+from app.services.workspace_stats import workspace_stats, STATS_ROLLOVER_INTERVAL, STATS_RECONCILE_INTERVAL
+from app.services.analytics_rollups import analytics_rollups, ROLLUP_INTERVAL
+from app.services.outbox_service import relay_due, OUTBOX_RELAY_INTERVAL
 
 # Create tables - THIS MUST RUN BEFORE APP STARTS
 try:
@@ -25,9 +42,49 @@ except Exception as e:
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 CareOps Backend Starting...")
+    await notification_dispatcher.start()
+    await inbox_events.start()
+    if SCHEDULER_ENABLED:
+        scheduler.register(
+            "form_reminders",
+            automation_service.check_and_trigger_reminders,
+            interval=int(os.getenv("REMINDER_JOB_INTERVAL", "900")),
+            jitter=int(os.getenv("SCHEDULER_JITTER", "10"))
+        )
+        scheduler.register("workspace_stats_rollover", workspace_stats.roll_over, interval=STATS_ROLLOVER_INTERVAL)
+        scheduler.register(
+            "workspace_stats_reconcile",
+            workspace_stats.reconcile,
+            interval=STATS_RECONCILE_INTERVAL,
+            jitter=int(os.getenv("SCHEDULER_JITTER", "10")),
+            catch_up=False
+        )
+        scheduler.register(
+            "outbox_relay",
+            relay_due,
+            interval=OUTBOX_RELAY_INTERVAL,
+            jitter=int(os.getenv("SCHEDULER_JITTER", "10"))
+        )
+        scheduler.register(
+            "analytics_rollup",
+            analytics_rollups.run,
+            interval=ROLLUP_INTERVAL,
+            jitter=int(os.getenv("SCHEDULER_JITTER", "10"))
+        )
+        await scheduler.start()
+    if REMINDER_ENGINE_ENABLED:
+        await reminder_engine.start()
     yield
     # Shutdown
     print("🛑 CareOps Backend Shutting Down...")
+    await inbox_events.stop()
+    await reminder_engine.stop()
+    await scheduler.stop()
+    notification_coalescer.flush_all()
+    await notification_dispatcher.stop()
+    email_service.close()
+    await sms_service.aclose()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="CareOps API",
@@ -45,6 +102,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routers
@@ -56,6 +114,7 @@ app.include_router(inbox.router, prefix="/api/inbox", tags=["inbox"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(forms.router, prefix="/api/forms", tags=["forms"])
 app.include_router(inventory.router, prefix="/api/inventory", tags=["inventory"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 
 @app.get("/")
 async def root():
@@ -69,6 +128,44 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    # Run off the event loop: a starved pool blocks for up to DB_POOL_TIMEOUT
+    ok, latency_ms, error = await asyncio.to_thread(check_database)
+    pool = pool_status()
+    body = {
+        "status": "ready" if ok else "unavailable",
+        "database": {"ok": ok, "latency_ms": latency_ms, "error": error},
+        "pool": pool,
+        # Either engine running out of connections stalls its routes
+        "saturated": pool["saturated"] or pool["async"]["saturated"],
+    }
+    return JSONResponse(body, status_code=200 if ok else 503)
+
+@app.get("/health/notifications")
+async def notification_health():
+    return {**notification_dispatcher.stats(), "coalescer": notification_coalescer.stats}
+
+@app.get("/health/scheduler")
+async def scheduler_health():
+    return scheduler.stats()
+
+@app.get("/health/reminders")
+async def reminder_health():
+    return reminder_engine.stats()
+
+@app.get("/health/providers")
+async def provider_health():
+    return breaker_status()
+
+@app.get("/health/cache")
+async def cache_health():
+    return {**response_cache.status(), "auth_tokens": token_cache.status()}
+
+@app.get("/health/inbox-events")
+async def inbox_events_health():
+    return inbox_events.status()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,217 @@
+"""Baseline schema
+
+Creates every table the app had before migrations were introduced. Until
+now the schema came only from Base.metadata.create_all, so existing
+databases may already have some or all of it: tables that exist are left
+alone and only the columns added since (workspaces.reminder_lead_minutes,
+bookings.reminder_sent_at) are filled in.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(existing, name, *columns, indexes=()):
+    if name in existing:
+        return
+    op.create_table(name, *columns)
+    op.create_index(f"ix_{name}_id", name, ["id"])
+    for index_name, cols, unique in indexes:
+        op.create_index(index_name, name, cols, unique=unique)
+
+
+def _add_column(table, column):
+    columns = {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+    if column.name not in columns:
+        op.add_column(table, column)
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    _create_table(
+        existing, "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("full_name", sa.String()),
+        sa.Column("phone_number", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_phone_verified", sa.Boolean()),
+        sa.Column("verification_code", sa.String(), nullable=True),
+        sa.Column("verification_code_expires", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[("ix_users_email", ["email"], True)],
+    )
+    _create_table(
+        existing, "workspaces",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("address", sa.String()),
+        sa.Column("timezone", sa.String()),
+        sa.Column("contact_email", sa.String()),
+        sa.Column("reminder_lead_minutes", sa.Integer()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=[("ix_workspaces_name", ["name"], False)],
+    )
+    _create_table(
+        existing, "contacts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("phone", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("last_contacted", sa.DateTime()),
+    )
+    _create_table(
+        existing, "conversations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("contact_id", sa.Integer(), sa.ForeignKey("contacts.id")),
+        sa.Column("is_open", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id")),
+        sa.Column("sender_type", sa.String()),
+        sa.Column("sender_name", sa.String()),
+        sa.Column("content", sa.Text()),
+        sa.Column("channel", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "bookings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("contact_id", sa.Integer(), sa.ForeignKey("contacts.id")),
+        sa.Column("booking_type", sa.String()),
+        sa.Column("scheduled_at", sa.DateTime()),
+        sa.Column("duration_minutes", sa.Integer()),
+        sa.Column("location", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("forms_sent", sa.Boolean()),
+        sa.Column("reminder_sent_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "forms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("required_fields", sa.JSON()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "form_submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("form_id", sa.Integer(), sa.ForeignKey("forms.id")),
+        sa.Column("booking_id", sa.Integer()),
+        sa.Column("contact_email", sa.String()),
+        sa.Column("data", sa.JSON()),
+        sa.Column("submitted_at", sa.DateTime()),
+        sa.Column("status", sa.String()),
+        sa.Column("due_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "inventory_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("quantity_per_booking", sa.Integer()),
+        sa.Column("low_threshold", sa.Integer()),
+        sa.Column("last_restocked", sa.DateTime()),
+    )
+    _create_table(
+        existing, "staff_users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("role", sa.String()),
+        sa.Column("can_manage_inbox", sa.Boolean()),
+        sa.Column("can_manage_bookings", sa.Boolean()),
+        sa.Column("can_view_inventory", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "integrations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("provider", sa.String()),
+        sa.Column("is_connected", sa.Boolean()),
+        sa.Column("config", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    _create_table(
+        existing, "outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id"), nullable=True),
+        sa.Column("channel", sa.String()),
+        sa.Column("kind", sa.String()),
+        sa.Column("recipient", sa.String()),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("status", sa.String()),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("available_at", sa.DateTime()),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_outbox_status_available_at", ["status", "available_at"], False)],
+    )
+    if "scheduler_leases" not in existing:
+        op.create_table(
+            "scheduler_leases",
+            sa.Column("job_name", sa.String(), primary_key=True),
+            sa.Column("owner", sa.String(), nullable=True),
+            sa.Column("lease_until", sa.DateTime(), nullable=True),
+            sa.Column("last_run_at", sa.DateTime(), nullable=True),
+        )
+    _create_table(
+        existing, "message_templates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("locale", sa.String()),
+        sa.Column("subject", sa.String(), nullable=True),
+        sa.Column("html_body", sa.Text(), nullable=True),
+        sa.Column("text_body", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.UniqueConstraint("workspace_id", "name", "locale", name="uq_message_templates_workspace_name_locale"),
+    )
+
+    # Columns added to tables that predate migrations
+    _add_column("workspaces", sa.Column("reminder_lead_minutes", sa.Integer(), server_default="1440"))
+    _add_column("bookings", sa.Column("reminder_sent_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    for name in [
+        "message_templates", "scheduler_leases", "outbox", "integrations", "staff_users",
+        "inventory_items", "form_submissions", "forms", "bookings", "messages",
+        "conversations", "contacts", "workspaces", "users",
+    ]:
+        op.drop_table(name)
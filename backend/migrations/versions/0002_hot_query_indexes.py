@@ -0,0 +1,84 @@
+"""Composite and partial indexes for hot query shapes
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside
+the migration transaction, so bookings/conversations/messages stay
+writable while they build. A concurrent build that fails leaves an INVALID
+index behind; it is dropped and rebuilt on the next run.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_hot_query_indexes"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REMINDER_DUE = "status = 'confirmed' AND reminder_sent_at IS NULL"
+
+# name, table, columns, partial-index predicate
+INDEXES = [
+    ("ix_bookings_workspace_scheduled_at", "bookings", ["workspace_id", "scheduled_at"], None),
+    ("ix_bookings_workspace_created_at", "bookings", ["workspace_id", "created_at"], None),
+    ("ix_bookings_reminder_due", "bookings", ["scheduled_at"], REMINDER_DUE),
+    ("ix_conversations_workspace_updated_at", "conversations", ["workspace_id", "updated_at"], None),
+    ("ix_conversations_workspace_is_open", "conversations", ["workspace_id", "is_open"], None),
+    ("ix_form_submissions_status_due_at", "form_submissions", ["status", "due_at"], None),
+    ("ix_form_submissions_booking_id", "form_submissions", ["booking_id"], None),
+    ("ix_messages_conversation_created_at", "messages", ["conversation_id", "created_at"], None),
+    ("ix_inventory_items_workspace_id", "inventory_items", ["workspace_id"], None),
+]
+
+
+def _invalid_indexes(bind) -> set:
+    rows = bind.execute(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ))
+    return {row[0] for row in rows}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+
+    if postgres:
+        with op.get_context().autocommit_block():
+            invalid = _invalid_indexes(bind)
+            for name, table, columns, where in INDEXES:
+                if name in invalid:
+                    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            inspector = sa.inspect(bind)
+            for name, table, columns, where in INDEXES:
+                if name in {ix["name"] for ix in inspector.get_indexes(table)}:
+                    continue
+                op.create_index(
+                    name, table, columns,
+                    postgresql_concurrently=True,
+                    postgresql_where=sa.text(where) if where else None
+                )
+        return
+
+    inspector = sa.inspect(bind)
+    for name, table, columns, where in INDEXES:
+        if name in {ix["name"] for ix in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, sqlite_where=sa.text(where) if where else None)
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    if postgres:
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in INDEXES:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+    for name, table, _, _ in INDEXES:
+        op.drop_index(name, table_name=table)
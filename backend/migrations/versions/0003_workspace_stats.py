@@ -0,0 +1,44 @@
+"""Per-workspace dashboard counter rollup
+
+Rows are not backfilled here: the workspace_stats_rollover job creates a
+row for every workspace that lacks one on its first run, and the
+dashboard computes a missing row on first read.
+
+Revision ID: 0003_workspace_stats
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_workspace_stats"
+down_revision: Union[str, None] = "0002_hot_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "workspace_stats" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "workspace_stats",
+        sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id"), primary_key=True),
+        sa.Column("today_bookings", sa.Integer(), nullable=False),
+        sa.Column("upcoming_bookings", sa.Integer(), nullable=False),
+        sa.Column("new_inquiries", sa.Integer(), nullable=False),
+        sa.Column("pending_forms", sa.Integer(), nullable=False),
+        sa.Column("overdue_forms", sa.Integer(), nullable=False),
+        sa.Column("low_inventory", sa.Integer(), nullable=False),
+        sa.Column("day_start", sa.DateTime()),
+        sa.Column("day_end", sa.DateTime()),
+        sa.Column("reconciled_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("workspace_stats")
@@ -0,0 +1,80 @@
+"""Indexes for keyset-paginated, filtered list endpoints
+
+Every list is paged on (workspace_id, <sort key>) and every filter has an
+index that leads with workspace_id. The contact name/email prefix filters
+run on lower(...) expression indexes. ix_conversations_workspace_is_open
+is replaced by (workspace_id, is_open, updated_at), which serves the same
+lookups and also the open/closed inbox filter in activity order.
+
+As in 0002, PostgreSQL builds run CONCURRENTLY outside the transaction and
+INVALID leftovers from a failed build are rebuilt.
+
+Revision ID: 0004_list_pagination_indexes
+Revises: 0003_workspace_stats
+Create Date: 2026-10-18 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_list_pagination_indexes"
+down_revision: Union[str, None] = "0003_workspace_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns
+INDEXES = [
+    ("ix_workspaces_owner_id", "workspaces", ["owner_id"]),
+    ("ix_contacts_workspace_id", "contacts", ["workspace_id", "id"]),
+    ("ix_contacts_workspace_name_lower", "contacts", ["workspace_id", sa.text("lower(name)")]),
+    ("ix_contacts_workspace_email_lower", "contacts", ["workspace_id", sa.text("lower(email)")]),
+    ("ix_bookings_workspace_status_scheduled_at", "bookings", ["workspace_id", "status", "scheduled_at"]),
+    ("ix_conversations_workspace_open_updated_at", "conversations", ["workspace_id", "is_open", "updated_at"]),
+    ("ix_forms_workspace_id", "forms", ["workspace_id"]),
+]
+REPLACED = ("ix_conversations_workspace_is_open", "conversations", ["workspace_id", "is_open"])
+
+
+def _invalid_indexes(bind) -> set:
+    rows = bind.execute(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ))
+    return {row[0] for row in rows}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    replaced_name, replaced_table, _ = REPLACED
+
+    # IF [NOT] EXISTS rather than reflection: SQLite can't reflect expression indexes
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            invalid = _invalid_indexes(bind)
+            for name, table, columns in INDEXES:
+                if name in invalid:
+                    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(replaced_name, table_name=replaced_table, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.drop_index(replaced_name, table_name=replaced_table, if_exists=True)
+
+
+def downgrade() -> None:
+    replaced_name, replaced_table, replaced_columns = REPLACED
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(replaced_name, replaced_table, replaced_columns, postgresql_concurrently=True, if_not_exists=True)
+            for name, table, _ in INDEXES:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+    op.create_index(replaced_name, replaced_table, replaced_columns, if_not_exists=True)
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
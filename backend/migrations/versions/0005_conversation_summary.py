@@ -0,0 +1,58 @@
+"""Conversation inbox summary columns
+
+The inbox list reads last message time/preview and the unread count off
+the conversation row instead of loading every message. Existing rows are
+backfilled from their latest message; history from before this revision
+is treated as read. unread_count is NOT NULL with a server default of 0,
+also where the column already existed (e.g. built by create_all).
+
+Revision ID: 0005_conversation_summary
+Revises: 0004_list_pagination_indexes
+Create Date: 2026-10-18 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_conversation_summary"
+down_revision: Union[str, None] = "0004_list_pagination_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match CONVERSATION_PREVIEW_LENGTH in app.services.conversation_summary
+PREVIEW_LENGTH = 120
+
+
+def upgrade() -> None:
+    existing = {column["name"]: column for column in sa.inspect(op.get_bind()).get_columns("conversations")}
+    if "last_message_at" not in existing:
+        op.add_column("conversations", sa.Column("last_message_at", sa.DateTime(), nullable=True))
+    if "last_message_preview" not in existing:
+        op.add_column("conversations", sa.Column("last_message_preview", sa.String(), nullable=True))
+    if "unread_count" not in existing:
+        op.add_column("conversations", sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"))
+    elif existing["unread_count"]["nullable"]:
+        op.execute("UPDATE conversations SET unread_count = 0 WHERE unread_count IS NULL")
+        with op.batch_alter_table("conversations") as batch:
+            batch.alter_column("unread_count", existing_type=sa.Integer(), nullable=False, server_default="0")
+
+    latest = (
+        "SELECT {column} FROM messages m WHERE m.conversation_id = conversations.id "
+        "ORDER BY m.created_at DESC, m.id DESC LIMIT 1"
+    )
+    op.execute(
+        "UPDATE conversations SET "
+        f"last_message_at = ({latest.format(column='m.created_at')}), "
+        f"last_message_preview = ({latest.format(column=f'substr(m.content, 1, {PREVIEW_LENGTH})')}) "
+        "WHERE last_message_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("conversations", "unread_count")
+    op.drop_column("conversations", "last_message_preview")
+    op.drop_column("conversations", "last_message_at")
@@ -0,0 +1,92 @@
+"""Booking overlap index and exclusion constraint
+
+Adds (workspace_id, location, scheduled_at) for the conflict checks in
+app.services.booking_conflicts. On PostgreSQL, also adds the exclusion
+constraint that refuses overlapping active bookings at one location
+(needs btree_gist). Only active bookings count - cancelled, completed and
+no-show ones are history, so overlaps among them are fine.
+
+Existing overlaps between active bookings would make the constraint fail
+to build. They are logged and the constraint is skipped, so the upgrade
+(which runs on container start) never crash-loops; the application-level
+check still applies. After cancelling or moving them, add the constraint
+with `alembic stamp 0005_conversation_summary && alembic upgrade
+0006_booking_overlap && alembic stamp head`.
+
+Revision ID: 0006_booking_overlap
+Revises: 0005_conversation_summary
+Create Date: 2026-10-18 00:00:05
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_booking_overlap"
+down_revision: Union[str, None] = "0005_conversation_summary"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+INDEX = ("ix_bookings_workspace_location_scheduled_at", "bookings", ["workspace_id", "location", "scheduled_at"])
+CONSTRAINT = "ex_bookings_location_overlap"
+INACTIVE = "('cancelled', 'completed', 'no_show')"
+ACTIVE = f"status NOT IN {INACTIVE} AND location IS NOT NULL"
+
+
+def slot(alias: str = "") -> str:
+    column = f"{alias}." if alias else ""
+    return (f"tsrange({column}scheduled_at, "
+            f"{column}scheduled_at + coalesce({column}duration_minutes, 60) * interval '1 minute')")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    name, table, columns = INDEX
+
+    if bind.dialect.name != "postgresql":
+        op.create_index(name, table, columns, if_not_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        invalid = bind.execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid AND c.relname = :name"
+        ), {"name": name}).first()
+        if invalid:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+    if bind.execute(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT}).first():
+        return
+    overlaps = bind.execute(sa.text(
+        f"SELECT a.id, b.id FROM bookings a JOIN bookings b "
+        f"ON a.workspace_id = b.workspace_id AND a.location = b.location AND a.id < b.id "
+        f"AND {slot('a')} && {slot('b')} "
+        f"WHERE a.status NOT IN {INACTIVE} AND b.status NOT IN {INACTIVE} LIMIT 50"
+    )).all()
+    if overlaps:
+        pairs = ", ".join(f"{a}/{b}" for a, b in overlaps)
+        logger.warning(f"Skipping {CONSTRAINT}: overlapping active bookings must be cancelled or moved "
+                       f"first (booking ids): {pairs}")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT} EXCLUDE USING gist ("
+        f"workspace_id WITH =, location WITH =, {slot()} WITH &&) WHERE ({ACTIVE})"
+    )
+
+
+def downgrade() -> None:
+    name, table, _ = INDEX
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+    op.drop_index(name, table_name=table, if_exists=True)
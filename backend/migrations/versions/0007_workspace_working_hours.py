@@ -0,0 +1,31 @@
+"""Workspace working hours for the availability API
+
+NULL means the default (Mon-Fri 09:00-17:00 local), so nothing is
+backfilled.
+
+Revision ID: 0007_workspace_working_hours
+Revises: 0006_booking_overlap
+Create Date: 2026-10-18 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_workspace_working_hours"
+down_revision: Union[str, None] = "0006_booking_overlap"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("workspaces")}
+    if "working_hours" not in existing:
+        op.add_column("workspaces", sa.Column("working_hours", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("workspaces", "working_hours")
@@ -0,0 +1,93 @@
+"""Analytics rollup tables and watermark columns
+
+Adds bookings.updated_at (backfilled from created_at) and the indexes the
+rollup job scans by, plus the booking/form daily rollup tables and their
+watermarks. The rollups are not backfilled here: with no watermark row
+the analytics_rollup job starts from the beginning and works through the
+history in ROLLUP_BATCH-sized commits.
+
+Revision ID: 0008_analytics_rollups
+Revises: 0007_workspace_working_hours
+Create Date: 2026-10-18 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_analytics_rollups"
+down_revision: Union[str, None] = "0007_workspace_working_hours"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_bookings_updated_at", "bookings", ["updated_at", "id"]),
+    ("ix_form_submissions_submitted_at", "form_submissions", ["submitted_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "updated_at" not in {column["name"] for column in inspector.get_columns("bookings")}:
+        op.add_column("bookings", sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute("UPDATE bookings SET updated_at = created_at")
+
+    tables = set(inspector.get_table_names())
+    if "booking_daily_rollups" not in tables:
+        op.create_table(
+            "booking_daily_rollups",
+            sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("booking_type", sa.String(), primary_key=True),
+            sa.Column("status", sa.String(), primary_key=True),
+            sa.Column("bookings", sa.Integer(), nullable=False),
+        )
+    if "form_daily_rollups" not in tables:
+        op.create_table(
+            "form_daily_rollups",
+            sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("completed", sa.Integer(), nullable=False),
+            sa.Column("latency_seconds", sa.Float(), nullable=False),
+            sa.Column("latency_histogram", sa.JSON()),
+        )
+    if "rollup_watermarks" not in tables:
+        op.create_table(
+            "rollup_watermarks",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("watermark", sa.DateTime()),
+            sa.Column("last_id", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if bind.dialect.name != "postgresql":
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            invalid = bind.execute(sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relname = :name"
+            ), {"name": name}).first()
+            if invalid:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _ in INDEXES:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_table("rollup_watermarks")
+    op.drop_table("form_daily_rollups")
+    op.drop_table("booking_daily_rollups")
+    op.drop_column("bookings", "updated_at")
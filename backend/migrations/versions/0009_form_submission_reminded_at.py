@@ -0,0 +1,31 @@
+"""Form submission reminded_at
+
+Adds form_submissions.reminded_at, which the form_reminders job stamps when
+it claims a pending submission so each one is reminded once.
+
+Revision ID: 0009_form_submission_reminded_at
+Revises: 0008_analytics_rollups
+Create Date: 2026-10-18 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_form_submission_reminded_at"
+down_revision: Union[str, None] = "0008_analytics_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "reminded_at" not in {column["name"] for column in inspector.get_columns("form_submissions")}:
+        op.add_column("form_submissions", sa.Column("reminded_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("form_submissions", "reminded_at")
@@ -0,0 +1,49 @@
+"""Booking overlap constraint covers active bookings only
+
+0006 first built ex_bookings_location_overlap over every booking that was
+not cancelled, so completed and no-show bookings still held their slot.
+Where that constraint exists, it is rebuilt with the active-only predicate
+the models use. The predicate only gets narrower, so the rebuild cannot fail
+on existing rows.
+
+Revision ID: 0010_booking_overlap_active_only
+Revises: 0009_form_submission_reminded_at
+Create Date: 2026-10-18 00:00:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_booking_overlap_active_only"
+down_revision: Union[str, None] = "0009_form_submission_reminded_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT = "ex_bookings_location_overlap"
+SLOT = "tsrange(scheduled_at, scheduled_at + coalesce(duration_minutes, 60) * interval '1 minute')"
+
+
+def rebuild(predicate: str):
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    if not bind.execute(sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": CONSTRAINT}).first():
+        return
+    op.execute(f"ALTER TABLE bookings DROP CONSTRAINT {CONSTRAINT}")
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT} EXCLUDE USING gist ("
+        f"workspace_id WITH =, location WITH =, {SLOT} WITH &&) WHERE ({predicate})"
+    )
+
+
+def upgrade() -> None:
+    rebuild("status NOT IN ('cancelled', 'completed', 'no_show') AND location IS NOT NULL")
+
+
+def downgrade() -> None:
+    # Fails if completed/no-show bookings now overlap; cancel or move them first
+    rebuild("status <> 'cancelled' AND location IS NOT NULL")
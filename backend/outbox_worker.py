@@ -0,0 +1,60 @@
+"""
+Outbox worker - delivers queued email/SMS rows from the outbox table
+
+Run as many copies as needed; each claims its own batches:
+    python outbox_worker.py
+    python outbox_worker.py --batch-size 100 --poll-interval 1
+"""
+import argparse
+import logging
+import signal
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.database import engine, Base
+from app.services import outbox_service
+
+logger = logging.getLogger("outbox_worker")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CareOps outbox worker")
+    parser.add_argument("--batch-size", type=int, default=outbox_service.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds to sleep when no rows are due")
+    parser.add_argument("--once", action="store_true", help="process a single batch and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    Base.metadata.create_all(bind=engine)
+
+    worker_id = outbox_service.new_worker_id()
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+        logger.info("Stopping after current batch...")
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    logger.info(f"Outbox worker {worker_id} started (batch size {args.batch_size})")
+    while running:
+        try:
+            result = outbox_service.process_batch(worker_id, batch_size=args.batch_size)
+        except Exception as e:
+            logger.error(f"Outbox batch failed: {e}")
+            result = {"claimed": 0}
+        if result["claimed"]:
+            logger.info(f"Outbox batch: {result}")
+        if args.once:
+            break
+        if result["claimed"] < args.batch_size:
+            time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -98,7 +98,7 @@ echo "4. Settings:"
 echo "   Name: careops-api"
 echo "   Runtime: Python 3.11"
 echo "   Build command: pip install -r requirements.txt"
-echo "   Start command: gunicorn main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:10000"
+echo "   Start command: alembic upgrade head && gunicorn main:app --workers 4 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:10000"
 echo ""
 echo "5. Add PostgreSQL database:"
 echo "   Name: careops_db"
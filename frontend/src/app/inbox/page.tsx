@@ -1,16 +1,21 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuthStore, useWorkspaceStore } from '@/services/store';
-import { inboxApi } from '@/services/api';
+import { inboxApi, nextCursor } from '@/services/api';
 import { format } from 'date-fns';
 
+const INBOX_POLL_MS = 15000;
+
 export default function InboxPage() {
   const { token } = useAuthStore();
   const { currentWorkspace } = useWorkspaceStore();
   const [conversations, setConversations] = useState<any[]>([]);
+  const [conversationsCursor, setConversationsCursor] = useState<string | undefined>();
   const [selectedConversation, setSelectedConversation] = useState<any>(null);
+  const [messages, setMessages] = useState<any[]>([]);
+  const selectedId = useRef<number | null>(null);
   const [messageText, setMessageText] = useState('');
   const [loading, setLoading] = useState(true);
   const router = useRouter();
@@ -24,10 +29,71 @@ export default function InboxPage() {
     loadConversations();
   }, [token, currentWorkspace, router]);
 
+  useEffect(() => {
+    selectedId.current = selectedConversation?.id ?? null;
+    if (selectedConversation) {
+      loadMessages(selectedConversation.id);
+    }
+  }, [selectedConversation?.id]);
+
+  // New messages and conversations are pushed instead of polled
+  useEffect(() => {
+    if (!token || !currentWorkspace) return;
+
+    let poll: ReturnType<typeof setInterval> | undefined;
+    const source = new EventSource(inboxApi.eventsUrl(token, currentWorkspace.id));
+    // Events may have been missed while (re)connecting
+    source.onopen = () => refreshInbox();
+    source.onerror = () => {
+      // CLOSED means the server refused the stream (e.g. 503 without a shared broker): poll instead
+      if (source.readyState === EventSource.CLOSED && !poll) {
+        poll = setInterval(refreshInbox, INBOX_POLL_MS);
+      }
+    };
+    source.onmessage = (e) => {
+      const event = JSON.parse(e.data);
+      if (event.type === 'conversation.created') {
+        setConversations((current) => [{ ...event.conversation, contact: event.contact }, ...current]);
+      } else if (event.type === 'message.created' || event.type === 'conversation.updated') {
+        setConversations((current) => {
+          const existing = current.find((conv) => conv.id === event.conversation.id);
+          if (!existing) return current;
+          const updated = { ...existing, ...event.conversation };
+          const rest = current.filter((conv) => conv.id !== updated.id);
+          return event.type === 'message.created' ? [updated, ...rest] : current.map((conv) => (conv.id === updated.id ? updated : conv));
+        });
+        if (event.type === 'message.created' && event.conversation.id === selectedId.current) {
+          setMessages((current) => (current.some((msg) => msg.id === event.message.id) ? current : [...current, event.message]));
+        }
+      } else if (event.type === 'resync') {
+        loadConversations();
+      }
+    };
+    return () => {
+      source.close();
+      clearInterval(poll);
+    };
+  }, [token, currentWorkspace]);
+
+  // Refetch the first page without changing the selection
+  const refreshInbox = async () => {
+    try {
+      const response = await inboxApi.getConversations(token!, currentWorkspace.id);
+      setConversations(response.data);
+      setConversationsCursor(nextCursor(response));
+      if (selectedId.current !== null) {
+        await loadMessages(selectedId.current);
+      }
+    } catch (error) {
+      console.error('Failed to refresh inbox:', error);
+    }
+  };
+
   const loadConversations = async () => {
     try {
       const response = await inboxApi.getConversations(token!, currentWorkspace.id);
       setConversations(response.data);
+      setConversationsCursor(nextCursor(response));
       if (response.data.length > 0) {
         setSelectedConversation(response.data[0]);
       }
@@ -38,6 +104,33 @@ export default function InboxPage() {
     }
   };
 
+  // Older conversations load on demand, a page at a time
+  const loadMoreConversations = async () => {
+    try {
+      const response = await inboxApi.getConversations(token!, currentWorkspace.id, { cursor: conversationsCursor });
+      setConversations((current) => [
+        ...current,
+        ...response.data.filter((conv: any) => !current.some((existing) => existing.id === conv.id)),
+      ]);
+      setConversationsCursor(nextCursor(response));
+    } catch (error) {
+      console.error('Failed to load more conversations:', error);
+    }
+  };
+
+  const loadMessages = async (conversationId: number) => {
+    try {
+      // Newest first from the API; the latest page is enough for the chat view
+      const response = await inboxApi.getMessages(token!, currentWorkspace.id, conversationId);
+      setMessages([...response.data].reverse());
+      setConversations((current) =>
+        current.map((conv) => (conv.id === conversationId ? { ...conv, unread_count: 0 } : conv))
+      );
+    } catch (error) {
+      console.error('Failed to load messages:', error);
+    }
+  };
+
   const handleSendMessage = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!messageText.trim() || !selectedConversation) return;
@@ -51,7 +144,8 @@ export default function InboxPage() {
       });
 
       setMessageText('');
-      await loadConversations();
+      // The conversation list is updated by the pushed message.created event
+      await loadMessages(selectedConversation.id);
     } catch (error) {
       console.error('Failed to send message:', error);
     } finally {
@@ -67,7 +161,7 @@ export default function InboxPage() {
       <div className="w-80 bg-white border-r border-gray-200">
         <div className="p-4 border-b border-gray-200">
           <h2 className="text-xl font-bold">💬 Inbox</h2>
-          <p className="text-sm text-gray-600">{conversations.length} conversations</p>
+          <p className="text-sm text-gray-600">{conversations.length}{conversationsCursor ? '+' : ''} conversations</p>
         </div>
 
         <div className="overflow-y-auto h-[calc(100vh-80px)]">
@@ -79,13 +173,25 @@ export default function InboxPage() {
                 selectedConversation?.id === conv.id ? 'bg-blue-50' : ''
               }`}
             >
-              <p className="font-semibold">{conv.contact.name}</p>
-              <p className="text-sm text-gray-600">{conv.contact.email}</p>
+              <div className="flex justify-between items-center">
+                <p className="font-semibold">{conv.contact.name}</p>
+                {conv.unread_count > 0 && (
+                  <span className="text-xs bg-blue-600 text-white rounded-full px-2">{conv.unread_count}</span>
+                )}
+              </div>
+              <p className="text-sm text-gray-600 truncate">
+                {conv.last_message_preview || conv.contact.email}
+              </p>
               <p className="text-xs text-gray-500 mt-1">
-                {format(new Date(conv.updated_at), 'MMM d, HH:mm')}
+                {format(new Date(conv.last_message_at || conv.updated_at), 'MMM d, HH:mm')}
               </p>
             </div>
           ))}
+          {conversationsCursor && (
+            <button onClick={loadMoreConversations} className="w-full p-4 text-sm text-blue-600 hover:bg-gray-50">
+              Load more
+            </button>
+          )}
         </div>
       </div>
 
@@ -101,7 +207,7 @@ export default function InboxPage() {
 
             {/* Messages */}
             <div className="flex-1 overflow-y-auto p-4 space-y-4">
-              {selectedConversation.messages?.map((msg: any) => (
+              {messages.map((msg: any) => (
                 <div
                   key={msg.id}
                   className={`flex ${msg.sender_type === 'staff' ? 'justify-end' : 'justify-start'}`}
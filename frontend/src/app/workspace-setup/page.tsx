@@ -3,15 +3,17 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuthStore, useWorkspaceStore } from '@/services/store';
-import { workspaceApi, bookingsApi, contactsApi } from '@/services/api';
+import { workspaceApi, bookingsApi, contactsApi, nextCursor } from '@/services/api';
 
 export default function WorkspaceSetupPage() {
   const { token } = useAuthStore();
   const { currentWorkspace, setWorkspace } = useWorkspaceStore();
   const [step, setStep] = useState(1);
   const [bookingTypes, setBookingTypes] = useState<any[]>([]);
+  const [bookingsCursor, setBookingsCursor] = useState<string | undefined>();
   const [newBooking, setNewBooking] = useState({ booking_type: '', duration_minutes: 60 });
   const [contacts, setContacts] = useState<any[]>([]);
+  const [contactsCursor, setContactsCursor] = useState<string | undefined>();
   const [newContact, setNewContact] = useState({ name: '', email: '', phone: '' });
   const [loading, setLoading] = useState(false);
   const router = useRouter();
@@ -24,17 +26,42 @@ export default function WorkspaceSetupPage() {
     loadWorkspaceData();
   }, [token, currentWorkspace, router]);
 
+  // First page of each list; further pages load on demand
   const loadWorkspaceData = async () => {
     try {
-      const contactsRes = await contactsApi.list(token!, currentWorkspace.id);
+      const [contactsRes, bookingsRes] = await Promise.all([
+        contactsApi.list(token!, currentWorkspace.id),
+        bookingsApi.list(token!, currentWorkspace.id),
+      ]);
       setContacts(contactsRes.data);
-      const bookingsRes = await bookingsApi.list(token!, currentWorkspace.id);
+      setContactsCursor(nextCursor(contactsRes));
       setBookingTypes(bookingsRes.data);
+      setBookingsCursor(nextCursor(bookingsRes));
     } catch (error) {
       console.error('Failed to load workspace data:', error);
     }
   };
 
+  const loadMoreContacts = async () => {
+    try {
+      const res = await contactsApi.list(token!, currentWorkspace.id, { cursor: contactsCursor });
+      setContacts((current) => [...current, ...res.data]);
+      setContactsCursor(nextCursor(res));
+    } catch (error) {
+      console.error('Failed to load contacts:', error);
+    }
+  };
+
+  const loadMoreBookings = async () => {
+    try {
+      const res = await bookingsApi.list(token!, currentWorkspace.id, { cursor: bookingsCursor });
+      setBookingTypes((current) => [...current, ...res.data]);
+      setBookingsCursor(nextCursor(res));
+    } catch (error) {
+      console.error('Failed to load bookings:', error);
+    }
+  };
+
   const handleAddBooking = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newBooking.booking_type.trim()) return;
@@ -145,6 +172,11 @@ export default function WorkspaceSetupPage() {
                     <p className="text-sm text-gray-600">{bt.duration_minutes} minutes</p>
                   </div>
                 ))}
+                {bookingsCursor && (
+                  <button onClick={loadMoreBookings} className="w-full text-sm text-blue-600 py-2 hover:underline">
+                    Load more
+                  </button>
+                )}
               </div>
             </div>
 
@@ -190,6 +222,11 @@ export default function WorkspaceSetupPage() {
                     <p className="text-sm text-gray-600">{contact.email} | {contact.phone}</p>
                   </div>
                 ))}
+                {contactsCursor && (
+                  <button onClick={loadMoreContacts} className="w-full text-sm text-blue-600 py-2 hover:underline">
+                    Load more
+                  </button>
+                )}
               </div>
             </div>
           </div>
@@ -207,11 +244,11 @@ export default function WorkspaceSetupPage() {
               </div>
               <div>
                 <p className="text-gray-600 text-sm">Booking Types</p>
-                <p className="text-lg font-semibold">{bookingTypes.length}</p>
+                <p className="text-lg font-semibold">{bookingTypes.length}{bookingsCursor ? '+' : ''}</p>
               </div>
               <div>
                 <p className="text-gray-600 text-sm">Contacts</p>
-                <p className="text-lg font-semibold">{contacts.length}</p>
+                <p className="text-lg font-semibold">{contacts.length}{contactsCursor ? '+' : ''}</p>
               </div>
             </div>
 
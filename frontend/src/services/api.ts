@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosResponse } from 'axios';
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api';
 
@@ -6,6 +6,13 @@ export const api = axios.create({
   baseURL: API_BASE,
 });
 
+type PageParams = { cursor?: string; limit?: number };
+
+// List endpoints return one page (50 rows by default) and the next page's cursor in X-Next-Cursor;
+// pages load on demand ("Load more") rather than all up front
+export const nextCursor = (response: AxiosResponse): string | undefined =>
+  response.headers['x-next-cursor'] || undefined;
+
 export const authApi = {
   register: (data: { email: string; password: string; full_name: string; phone_number?: string }) =>
     api.post('/auth/register', data),
@@ -40,6 +47,24 @@ export const workspaceApi = {
     api.post(`/workspace/${workspaceId}/activate`, {}, {
       headers: { Authorization: `Bearer ${token}` }
     }),
+
+  // Workspace wording for outbound messages (name e.g. 'sms.booking_reminder'); empty parts use the default
+  templates: (token: string, workspaceId: number) =>
+    api.get(`/workspace/${workspaceId}/templates`, {
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+
+  saveTemplate: (token: string, workspaceId: number, name: string, data: { subject?: string; html_body?: string; text_body?: string }, locale = 'en') =>
+    api.put(`/workspace/${workspaceId}/templates/${name}`, data, {
+      params: { locale },
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+
+  deleteTemplate: (token: string, workspaceId: number, name: string, locale = 'en') =>
+    api.delete(`/workspace/${workspaceId}/templates/${name}`, {
+      params: { locale },
+      headers: { Authorization: `Bearer ${token}` }
+    }),
 };
 
 export const contactsApi = {
@@ -48,8 +73,9 @@ export const contactsApi = {
       headers: { Authorization: `Bearer ${token}` }
     }),
   
-  list: (token: string, workspaceId: number) =>
+  list: (token: string, workspaceId: number, params?: PageParams) =>
     api.get(`/contacts/${workspaceId}/list`, {
+      params,
       headers: { Authorization: `Bearer ${token}` }
     }),
 };
@@ -60,8 +86,16 @@ export const bookingsApi = {
       headers: { Authorization: `Bearer ${token}` }
     }),
   
-  list: (token: string, workspaceId: number) =>
+  list: (token: string, workspaceId: number, params?: PageParams) =>
     api.get(`/bookings/${workspaceId}/list`, {
+      params,
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+  
+  // Free slots per local day, computed server-side (dates are YYYY-MM-DD, date_to inclusive)
+  availability: (token: string, workspaceId: number, params: { date_from: string; date_to?: string; slot_minutes?: number; location?: string }) =>
+    api.get(`/bookings/${workspaceId}/availability`, {
+      params,
       headers: { Authorization: `Bearer ${token}` }
     }),
 };
@@ -73,12 +107,40 @@ export const dashboardApi = {
     }),
 };
 
+// Charts from daily rollups (dates are YYYY-MM-DD; defaults to the last 12 months by week)
+type AnalyticsParams = { date_from?: string; date_to?: string; interval?: 'day' | 'week' | 'month' };
+
+export const analyticsApi = {
+  bookings: (token: string, workspaceId: number, params: AnalyticsParams = {}) =>
+    api.get(`/analytics/${workspaceId}/bookings`, {
+      params,
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+
+  forms: (token: string, workspaceId: number, params: AnalyticsParams = {}) =>
+    api.get(`/analytics/${workspaceId}/forms`, {
+      params,
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+};
+
 export const inboxApi = {
-  getConversations: (token: string, workspaceId: number) =>
+  getConversations: (token: string, workspaceId: number, params?: PageParams) =>
     api.get(`/inbox/${workspaceId}/conversations`, {
+      params,
+      headers: { Authorization: `Bearer ${token}` }
+    }),
+  
+  getMessages: (token: string, workspaceId: number, conversationId: number, cursor?: string) =>
+    api.get(`/inbox/${workspaceId}/conversations/${conversationId}/messages`, {
+      params: cursor ? { cursor } : undefined,
       headers: { Authorization: `Bearer ${token}` }
     }),
   
+  // Server-Sent Events stream of inbox changes (EventSource can't send headers)
+  eventsUrl: (token: string, workspaceId: number) =>
+    `${API_BASE}/inbox/${workspaceId}/events?token=${encodeURIComponent(token)}`,
+  
   sendMessage: (token: string, workspaceId: number, conversationId: number, message: any) =>
     api.post(`/inbox/${workspaceId}/conversations/${conversationId}/send`, message, {
       headers: { Authorization: `Bearer ${token}` }